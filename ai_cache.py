@@ -0,0 +1,186 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+import ticket_manager as tm
+
+ANALYSIS_CACHE_DIR = Path(os.getenv("ATTACHMENT_CACHE_DIR", str(tm.DATA_DIR / "analysis_cache")))
+ANALYSIS_CACHE_ENABLED = os.getenv("ATTACHMENT_CACHE", "on").strip().lower() not in {"0", "off", "false", "no"}
+ANALYSIS_CACHE_TTL = float(os.getenv("ATTACHMENT_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("ATTACHMENT_CACHE_MAX_ENTRIES", "5000"))
+RESPONSE_CACHE_TTL = float(os.getenv("AI_RESPONSE_CACHE_TTL_SECONDS", "300"))
+RESPONSE_CACHE_SIZE = int(os.getenv("AI_RESPONSE_CACHE_SIZE", "256"))
+
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _mtime(path: Path) -> float:
+    try:
+        return path.stat().st_mtime
+    except OSError:
+        return 0.0
+
+
+class AnalysisCache:
+    # Content-addressed store for attachment analysis results. The key covers the
+    # image bytes, the ticket flow and the prompt/model version, so the same
+    # screenshot re-posted in another message or ticket skips the Gemini call.
+    def __init__(self, root: Path, *, ttl_seconds: float, max_entries: int, enabled: bool = True):
+        self.root = Path(root)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._entries: Optional[int] = None
+        self._counters = {"hits": 0, "misses": 0, "writes": 0, "expired": 0, "evictions": 0, "bypassed": 0}
+
+    @staticmethod
+    def key(digests: Iterable[str], flow: str, prompt_version: int | str, model_name: str) -> str:
+        material = "|".join([str(prompt_version), model_name, flow or "general", *sorted(digests)])
+        return sha256_bytes(material.encode("utf-8"))
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def _count(self) -> int:
+        if self._entries is None:
+            self._entries = sum(1 for _ in self.root.glob("*/*.json")) if self.root.exists() else 0
+        return self._entries
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            self._counters["bypassed"] += 1
+            return None
+        path = self._path(key)
+        try:
+            record = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self._counters["misses"] += 1
+            return None
+        if self.ttl_seconds > 0 and time.time() - float(record.get("created_at") or 0) > self.ttl_seconds:
+            self._counters["expired"] += 1
+            self._counters["misses"] += 1
+            self._remove(path)
+            return None
+        self._counters["hits"] += 1
+        return record.get("result")
+
+    def put(self, key: str, result: Dict[str, Any]):
+        if not self.enabled:
+            return
+        path = self._path(key)
+        self.root.mkdir(parents=True, exist_ok=True)
+        existed = path.exists()
+        tm._save_json(path, {"created_at": time.time(), "result": result}, compact=True)
+        self._counters["writes"] += 1
+        with self._lock:
+            if not existed:
+                self._entries = self._count() + 1
+            if self._entries > self.max_entries:
+                self._evict()
+
+    def _remove(self, path: Path):
+        try:
+            path.unlink()
+        except OSError:
+            return
+        with self._lock:
+            if self._entries is not None:
+                self._entries -= 1
+
+    def _evict(self):
+        # Drop the oldest tenth in one pass so eviction cost is amortised over many writes.
+        files = sorted(self.root.glob("*/*.json"), key=_mtime)
+        target = max(0, len(files) - int(self.max_entries * 0.9))
+        for path in files[:target]:
+            path.unlink(missing_ok=True)
+        self._counters["evictions"] += target
+        self._entries = len(files) - target
+
+    def clear(self):
+        with self._lock:
+            for path in self.root.glob("*/*.json"):
+                path.unlink(missing_ok=True)
+            self._entries = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._counters["hits"] + self._counters["misses"]
+        return {
+            **self._counters,
+            "enabled": self.enabled,
+            "entries": self._count(),
+            "hit_rate": round(self._counters["hits"] / lookups, 3) if lookups else 0.0,
+        }
+
+
+class TTLCache:
+    # In-process LRU with per-entry expiry, used to memoise ask_ai_async decisions.
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max(0, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._items: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+
+    @staticmethod
+    def key(*parts: str) -> str:
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self._counters["misses"] += 1
+                return None
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._items[key]
+                self._counters["expired"] += 1
+                self._counters["misses"] += 1
+                return None
+            self._items.move_to_end(key)
+            self._counters["hits"] += 1
+            return value
+
+    def put(self, key: str, value: Any):
+        if not self.max_entries or self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._counters["hits"] + self._counters["misses"]
+        return {
+            **self._counters,
+            "entries": len(self._items),
+            "hit_rate": round(self._counters["hits"] / lookups, 3) if lookups else 0.0,
+        }
+
+
+analysis_cache = AnalysisCache(
+    ANALYSIS_CACHE_DIR,
+    ttl_seconds=ANALYSIS_CACHE_TTL,
+    max_entries=ANALYSIS_CACHE_MAX_ENTRIES,
+    enabled=ANALYSIS_CACHE_ENABLED,
+)
+
+response_cache = TTLCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL)
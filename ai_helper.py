@@ -1,12 +1,17 @@
+import asyncio
 import json
 import logging
 import mimetypes
 import os
+import time
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
 import google.generativeai as genai
 
+from ai_cache import analysis_cache, response_cache, sha256_bytes
+from image_preprocess import ImagePreprocessor
+
 logger = logging.getLogger("ai_helper")
 
 API_KEY = os.getenv("GOOGLE_API_KEY")
@@ -15,7 +20,78 @@ if not API_KEY:
 else:
     genai.configure(api_key=API_KEY)
 
-model = genai.GenerativeModel("models/gemini-2.5-flash")
+MODEL_NAME = "models/gemini-2.5-flash"
+model = genai.GenerativeModel(MODEL_NAME)
+
+# Bump whenever the attachment prompt or ATTACHMENT_SCHEMA changes so cached analyses are not reused.
+ATTACHMENT_PROMPT_VERSION = 1
+
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "4"))
+GEMINI_QPS = float(os.getenv("GEMINI_QPS", "2"))
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "30"))
+
+
+class GeminiLimiter:
+    # Caps in-flight Gemini calls and smooths bursts with a token bucket so a
+    # wave of tickets queues here instead of tripping the API quota.
+    def __init__(self, max_concurrency: int, qps: float, burst: int | None = None):
+        self.max_concurrency = max(1, max_concurrency)
+        self.qps = qps
+        self.burst = max(1, burst if burst is not None else self.max_concurrency)
+        self._semaphore: asyncio.Semaphore | None = None
+        self._bucket_lock: asyncio.Lock | None = None
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self.in_flight = 0
+        self.waiting = 0
+
+    async def _take_token(self):
+        if self.qps <= 0:
+            return
+        if self._bucket_lock is None:
+            self._bucket_lock = asyncio.Lock()
+        async with self._bucket_lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.qps)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.qps)
+
+    async def __aenter__(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+            try:
+                await self._take_token()
+            except BaseException:
+                self._semaphore.release()
+                raise
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.in_flight -= 1
+        self._semaphore.release()
+        return False
+
+
+limiter = GeminiLimiter(GEMINI_MAX_CONCURRENCY, GEMINI_QPS)
+preprocessor = ImagePreprocessor()
+
+
+async def _generate_async(contents, timeout: float | None = None):
+    async with limiter:
+        return await asyncio.wait_for(
+            model.generate_content_async(contents),
+            timeout=GEMINI_TIMEOUT if timeout is None else timeout,
+        )
 
 
 DECISION_SCHEMA = {
@@ -125,45 +201,56 @@ def _safe_json(text: str) -> Dict:
     }
 
 
-def _supported_image(path: str) -> bool:
-    mime_type = mimetypes.guess_type(path)[0] or ""
-    return mime_type.startswith("image/")
+def _decision(text: str) -> Dict:
+    decision = _safe_json(text)
+    if decision["ask_clarifying_question"] and not decision["reply"]:
+        decision["reply"] = decision["clarifying_question"]
+    return decision
 
 
-def analyze_attachments(flow: str, user_text: str, attachments: List[dict]) -> Dict:
-    if not API_KEY:
-        raise RuntimeError("GOOGLE_API_KEY not set")
-
+def _attachment_parts(attachments: List[dict]) -> Tuple[List[dict], List[str], List[str]]:
+    # Attachments may arrive with their bytes already in memory (and hashed) from the downloader.
     valid_parts: List[dict] = []
     filenames: List[str] = []
+    digests: List[str] = []
     for item in attachments:
         path = str(item.get("path") or "")
         filename = str(item.get("filename") or Path(path).name or "attachment")
-        if not path or not os.path.exists(path) or not _supported_image(path):
+        data = item.get("data")
+        mime_type = str(item.get("content_type") or "") or mimetypes.guess_type(path or filename)[0] or ""
+        if not mime_type.startswith("image/"):
             continue
-        mime_type = mimetypes.guess_type(path)[0] or "image/png"
-        with open(path, "rb") as handle:
-            valid_parts.append({"mime_type": mime_type, "data": handle.read()})
+        if data is None:
+            if not path or not os.path.exists(path):
+                continue
+            with open(path, "rb") as handle:
+                data = handle.read()
+        valid_parts.append({"mime_type": mime_type, "data": data})
         filenames.append(filename)
+        digests.append(str(item.get("sha256") or "") or sha256_bytes(data))
+    return valid_parts, filenames, digests
 
-    if not valid_parts:
-        return {
-            "has_relevant_proof": False,
-            "proof_type": "unknown",
-            "confidence": 0.0,
-            "winner_detected": False,
-            "deposit_detected": False,
-            "kyc_detected": False,
-            "code_proof_detected": False,
-            "youtube_proof_detected": False,
-            "supporting_proof_detected": False,
-            "platform_hint": "unknown",
-            "username": "",
-            "visible_text": "",
-            "notes": "",
-        }
-
-    prompt = f"""
+
+def _empty_attachment_result() -> Dict:
+    return {
+        "has_relevant_proof": False,
+        "proof_type": "unknown",
+        "confidence": 0.0,
+        "winner_detected": False,
+        "deposit_detected": False,
+        "kyc_detected": False,
+        "code_proof_detected": False,
+        "youtube_proof_detected": False,
+        "supporting_proof_detected": False,
+        "platform_hint": "unknown",
+        "username": "",
+        "visible_text": "",
+        "notes": "",
+    }
+
+
+def _attachment_prompt(flow: str, user_text: str, filenames: List[str]) -> str:
+    return f"""
 You are checking Discord ticket screenshots for support automation.
 Return only valid JSON and do not wrap it in markdown.
 
@@ -189,41 +276,119 @@ Required JSON schema:
 {json.dumps(ATTACHMENT_SCHEMA, indent=2)}
 """.strip()
 
+
+def _attachment_result(text: str) -> Dict:
+    payload = _extract_json(text)
+    return {
+        "has_relevant_proof": bool(payload.get("has_relevant_proof")),
+        "proof_type": str(payload.get("proof_type") or "unknown"),
+        "confidence": float(payload.get("confidence") or 0.0),
+        "winner_detected": bool(payload.get("winner_detected")),
+        "deposit_detected": bool(payload.get("deposit_detected")),
+        "kyc_detected": bool(payload.get("kyc_detected")),
+        "code_proof_detected": bool(payload.get("code_proof_detected")),
+        "youtube_proof_detected": bool(payload.get("youtube_proof_detected")),
+        "supporting_proof_detected": bool(payload.get("supporting_proof_detected")),
+        "platform_hint": str(payload.get("platform_hint") or "unknown").strip().lower(),
+        "username": str(payload.get("username") or "").strip(),
+        "visible_text": str(payload.get("visible_text") or "").strip(),
+        "notes": str(payload.get("notes") or "").strip(),
+    }
+
+
+def _shrunk(original: List[dict], prepared: List[dict]) -> bool:
+    return sum(len(part["data"]) for part in prepared) < sum(len(part["data"]) for part in original)
+
+
+def _prepare_attachments(flow: str, attachments: List[dict], use_cache: bool) -> Tuple[List[dict], List[str], str, Dict | None]:
+    valid_parts, filenames, digests = _attachment_parts(attachments)
+    if not valid_parts or not use_cache:
+        return valid_parts, filenames, "", None
+    cache_key = analysis_cache.key(digests, flow, ATTACHMENT_PROMPT_VERSION, MODEL_NAME)
+    return valid_parts, filenames, cache_key, analysis_cache.get(cache_key)
+
+
+async def analyze_attachments_async(
+    flow: str,
+    user_text: str,
+    attachments: List[dict],
+    *,
+    timeout: float | None = None,
+    use_cache: bool = True,
+) -> Dict:
+    if not API_KEY:
+        raise RuntimeError("GOOGLE_API_KEY not set")
+
+    valid_parts, filenames, cache_key, cached = await asyncio.to_thread(_prepare_attachments, flow, attachments, use_cache)
+    if not valid_parts:
+        return _empty_attachment_result()
+    if cached is not None:
+        return cached
+
+    parts = await preprocessor.prepare_async(valid_parts)
     try:
-        resp = model.generate_content([prompt, *valid_parts])
-        payload = _extract_json(resp.text)
-        return {
-            "has_relevant_proof": bool(payload.get("has_relevant_proof")),
-            "proof_type": str(payload.get("proof_type") or "unknown"),
-            "confidence": float(payload.get("confidence") or 0.0),
-            "winner_detected": bool(payload.get("winner_detected")),
-            "deposit_detected": bool(payload.get("deposit_detected")),
-            "kyc_detected": bool(payload.get("kyc_detected")),
-            "code_proof_detected": bool(payload.get("code_proof_detected")),
-            "youtube_proof_detected": bool(payload.get("youtube_proof_detected")),
-            "supporting_proof_detected": bool(payload.get("supporting_proof_detected")),
-            "platform_hint": str(payload.get("platform_hint") or "unknown").strip().lower(),
-            "username": str(payload.get("username") or "").strip(),
-            "visible_text": str(payload.get("visible_text") or "").strip(),
-            "notes": str(payload.get("notes") or "").strip(),
-        }
+        started = time.perf_counter()
+        resp = await _generate_async([_attachment_prompt(flow, user_text, filenames), *parts], timeout)
+        preprocessor.record_call((time.perf_counter() - started) * 1000, _shrunk(valid_parts, parts))
+        result = _attachment_result(resp.text)
+        if cache_key:
+            await asyncio.to_thread(analysis_cache.put, cache_key, result)
+        return result
+    except asyncio.CancelledError:
+        raise
     except Exception as exc:
         logger.exception("Gemini attachment analysis failed: %s", exc)
         raise
 
 
-def ask_ai(system_prompt: str, conv: List[dict]) -> Dict:
+def _response_cache_key(system_prompt: str, conv: List[dict]) -> str:
+    return response_cache.key(system_prompt, _conversation_window(conv), MODEL_NAME)
+
+
+async def ask_ai_async(
+    system_prompt: str,
+    conv: List[dict],
+    *,
+    timeout: float | None = None,
+    use_cache: bool = True,
+) -> Dict:
     if not API_KEY:
         raise RuntimeError("GOOGLE_API_KEY not set")
 
+    cache_key = _response_cache_key(system_prompt, conv) if use_cache else ""
+    cached = response_cache.get(cache_key) if cache_key else None
+    if cached is not None:
+        return dict(cached)
+
     prompt = _build_prompt(system_prompt, conv)
 
     try:
-        resp = model.generate_content(prompt)
-        decision = _safe_json(resp.text)
-        if decision["ask_clarifying_question"] and not decision["reply"]:
-            decision["reply"] = decision["clarifying_question"]
+        resp = await _generate_async(prompt, timeout)
+        decision = _decision(resp.text)
+        if cache_key:
+            response_cache.put(cache_key, dict(decision))
         return decision
+    except asyncio.CancelledError:
+        raise
     except Exception as exc:
         logger.exception("Gemini structured response failed: %s", exc)
         raise
+
+
+def ai_stats() -> Dict[str, Dict]:
+    return {
+        "limiter": {
+            "max_concurrency": limiter.max_concurrency,
+            "qps": limiter.qps,
+            "in_flight": limiter.in_flight,
+            "waiting": limiter.waiting,
+            "timeout": GEMINI_TIMEOUT,
+        },
+        "attachment_cache": analysis_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "image_preprocess": preprocessor.stats(),
+    }
+
+
+def close_ai():
+    preprocessor.close()
@@ -0,0 +1,133 @@
+import asyncio
+import hashlib
+import logging
+import mimetypes
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import aiohttp
+
+logger = logging.getLogger("attachment_downloader")
+
+DOWNLOAD_CONCURRENCY = int(os.getenv("ATTACHMENT_DOWNLOAD_CONCURRENCY", "4"))
+MAX_ATTACHMENT_BYTES = int(os.getenv("ATTACHMENT_MAX_BYTES", str(10 * 1024 * 1024)))
+DOWNLOAD_TIMEOUT = float(os.getenv("ATTACHMENT_DOWNLOAD_TIMEOUT", "30"))
+CHUNK_SIZE = 64 * 1024
+
+# (filename, data, sha256, content_type) -> path the bytes were stored at
+SaveAttachment = Callable[[str, bytes, str, str], Path]
+
+
+class AttachmentTooLarge(Exception):
+    pass
+
+
+class DownloadedAttachment:
+    __slots__ = ("filename", "path", "sha256", "size", "content_type", "data")
+
+    def __init__(self, filename: str, path: Path, sha256: str, size: int, content_type: str, data: bytes):
+        self.filename = filename
+        self.path = path
+        self.sha256 = sha256
+        self.size = size
+        self.content_type = content_type
+        self.data = data
+
+    def analyzer_input(self) -> Dict[str, Any]:
+        return {
+            "filename": self.filename,
+            "path": str(self.path),
+            "data": self.data,
+            "sha256": self.sha256,
+            "content_type": self.content_type,
+        }
+
+
+class AttachmentDownloader:
+    # Downloads Discord attachments concurrently (bounded across all tickets),
+    # hashing each body as it streams in and keeping the bytes for the analyzer
+    # so nothing is read back from disk.
+    def __init__(
+        self,
+        *,
+        concurrency: int = DOWNLOAD_CONCURRENCY,
+        max_bytes: int = MAX_ATTACHMENT_BYTES,
+        timeout: float = DOWNLOAD_TIMEOUT,
+    ):
+        self.concurrency = max(1, concurrency)
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._counters = {"downloaded": 0, "bytes": 0, "too_large": 0, "failed": 0}
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.concurrency * 2),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def _stream(self, url: str) -> tuple[bytes, str]:
+        session = await self._get_session()
+        digest = hashlib.sha256()
+        body = bytearray()
+        async with session.get(url) as response:
+            response.raise_for_status()
+            if response.content_length and response.content_length > self.max_bytes:
+                raise AttachmentTooLarge(url)
+            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                body.extend(chunk)
+                if len(body) > self.max_bytes:
+                    raise AttachmentTooLarge(url)
+                digest.update(chunk)
+        return bytes(body), digest.hexdigest()
+
+    async def fetch(self, attachment: Any, save: SaveAttachment) -> Optional[DownloadedAttachment]:
+        filename = str(getattr(attachment, "filename", "") or "attachment")
+        declared_size = int(getattr(attachment, "size", 0) or 0)
+        if declared_size > self.max_bytes:
+            self._counters["too_large"] += 1
+            logger.warning("Skipping %s: %s bytes exceeds the %s byte cap", filename, declared_size, self.max_bytes)
+            return None
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        urls = [url for url in (getattr(attachment, "url", ""), getattr(attachment, "proxy_url", "")) if url]
+        async with self._semaphore:
+            for url in urls:
+                try:
+                    data, sha256 = await self._stream(url)
+                    break
+                except AttachmentTooLarge:
+                    self._counters["too_large"] += 1
+                    logger.warning("Skipping %s: body exceeds the %s byte cap", filename, self.max_bytes)
+                    return None
+                except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                    logger.warning("Download of %s from %s failed: %s", filename, url, exc)
+            else:
+                self._counters["failed"] += 1
+                return None
+
+        content_type = str(getattr(attachment, "content_type", "") or mimetypes.guess_type(filename)[0] or "")
+        try:
+            path = await asyncio.to_thread(save, filename, data, sha256, content_type)
+        except OSError as exc:
+            self._counters["failed"] += 1
+            logger.warning("Saving %s failed: %s", filename, exc)
+            return None
+        self._counters["downloaded"] += 1
+        self._counters["bytes"] += len(data)
+        return DownloadedAttachment(path.name, path, sha256, len(data), content_type, data)
+
+    async def fetch_all(self, attachments: Sequence[Any], save: SaveAttachment) -> List[Optional[DownloadedAttachment]]:
+        return list(await asyncio.gather(*(self.fetch(attachment, save) for attachment in attachments)))
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._counters, "concurrency": self.concurrency, "max_bytes": self.max_bytes}
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
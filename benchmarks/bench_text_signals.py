@@ -0,0 +1,138 @@
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import text_signals  # noqa: E402
+
+ROUNDS = int(os.getenv("BENCH_ROUNDS", "20"))
+# Point at a TICKET_DATA_DIR/conversations folder to benchmark real ticket traffic.
+CORPUS_DIR = os.getenv("BENCH_CORPUS_DIR", "")
+
+SAMPLE_MESSAGES = [
+    "hi",
+    "hello i won the giveaway on twitter yesterday",
+    "I won gw on discord, username is tester_77",
+    "where is my payout?? its been 3 days this is a scam",
+    "deposit bonus not working, I deposited 200 usd",
+    "can i claim the 50$ bonus, kyc level 2 done",
+    "already attached the code proof and yt comment",
+    "how does the leaderboard work",
+    "is there a raffle this month",
+    "ok thanks",
+    "I used code donde when I signed up, here is the screenshot",
+    "won the kick giveaway, sent screenshot",
+    "need this asap please",
+    "my stake username: player_one",
+    "retweeted and commented on youtube, extra proof attached",
+]
+
+
+def load_corpus() -> list:
+    if not CORPUS_DIR:
+        return SAMPLE_MESSAGES
+    texts = []
+    for path in Path(CORPUS_DIR).glob("conv_*.jsonl"):
+        for line in path.read_text(encoding="utf-8").splitlines()[1:]:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry.get("role") == "user" and entry.get("text"):
+                texts.append(entry["text"])
+    return texts or SAMPLE_MESSAGES
+
+
+LEGACY_CATEGORIES = text_signals.CATEGORY_MAP
+
+
+def legacy_signals(text: str):
+    # The pre-matcher helpers: every function lowercases and substring-scans its own list.
+    lowered = text.lower()
+    category = next((name for name, keys in LEGACY_CATEGORIES.items() if any(key in lowered for key in keys)), None)
+    if any(word in lowered for word in ["issue", "problem", "not working", "angry", "refund", "complaint"]):
+        intent = "complaint"
+    elif any(word in lowered for word in ["hi", "hii", "hiii", "hello", "helloo", "hey", "yo", "bro"]):
+        intent = "casual"
+    elif any(word in lowered for word in ["help", "claim", "payout", "bonus", "deposit", "won"]):
+        intent = "support"
+    else:
+        intent = "query"
+    lowered = text.lower()
+    if any(word in lowered for word in ["twitter", "x.com", "x giveaway", "tweet", "retweet"]):
+        platform = "twitter"
+    elif "discord" in lowered:
+        platform = "discord"
+    elif "kick" in lowered:
+        platform = "kick"
+    else:
+        platform = None
+    lowered = text.lower()
+    proof = {
+        "winner": any(word in lowered for word in ["winner", "won", "giveaway", "gw win"]),
+        "deposit": any(word in lowered for word in ["deposit", "payment"]),
+        "kyc": "kyc" in lowered,
+        "code": any(word in lowered for word in ["donde code", "code proof", "used code donde", "code donde"]),
+        "youtube": any(word in lowered for word in ["youtube", "yt proof", "yt comment", "comment proof"]),
+        "supporting": any(word in lowered for word in ["supporting proof", "extra proof"]),
+    }
+    lowered = text.lower()
+    existing = any(
+        phrase in lowered
+        for phrase in ["already attached", "i attached", "sent screenshot", "i sent proof", "already sent", "uploaded already"]
+    )
+    lowered = text.lower()
+    if any(word in lowered for word in ["scam", "fraud", "angry", "worst", "refund", "useless", "idiot"]):
+        sentiment = "angry"
+    elif any(word in lowered for word in ["urgent", "asap", "immediately", "fast", "now", "quick"]):
+        sentiment = "urgent"
+    elif any(word in lowered for word in ["thanks", "thank you", "nice", "okay", "cool"]):
+        sentiment = "positive"
+    else:
+        sentiment = "neutral"
+    return category, intent, platform, proof, existing, sentiment
+
+
+def matcher_signals(text: str):
+    return (
+        text_signals.detect_category(text),
+        text_signals.detect_intent(text),
+        text_signals.detect_giveaway_platform(text),
+        text_signals.text_proof_signals(text, "gw"),
+        text_signals.mentions_existing_proof(text),
+        text_signals.detect_sentiment(text),
+    )
+
+
+def measure(label: str, corpus: list, run, clear_cache: bool = False) -> None:
+    timings = []
+    for _ in range(ROUNDS):
+        if clear_cache:
+            text_signals.matcher.scan.cache_clear()
+        started = time.perf_counter()
+        for text in corpus:
+            run(text)
+        timings.append((time.perf_counter() - started) * 1_000_000 / len(corpus))
+    timings.sort()
+    print(f"{label:<24} mean={statistics.mean(timings):8.2f}us/msg p50={timings[len(timings) // 2]:8.2f}us/msg")
+
+
+def main():
+    corpus = load_corpus()
+    print(f"messages={len(corpus)} rounds={ROUNDS}")
+    measure("legacy substring scans", corpus, legacy_signals)
+    measure("compiled matcher (cold)", corpus, matcher_signals, clear_cache=True)
+    measure("compiled matcher (warm)", corpus, matcher_signals)
+
+    changed = [text for text in corpus if legacy_signals(text)[:3] != matcher_signals(text)[:3]]
+    print(f"messages classified differently (word boundaries): {len(changed)}")
+    for text in changed[:10]:
+        print(f"  {text!r}: {legacy_signals(text)[:3]} -> {matcher_signals(text)[:3]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+DATA_DIR = Path(tempfile.mkdtemp(prefix="ticket-bench-"))
+os.environ["TICKET_DATA_DIR"] = str(DATA_DIR)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import ticket_manager as tm  # noqa: E402
+
+HISTORY = int(os.getenv("BENCH_HISTORY", "500"))
+APPENDS = int(os.getenv("BENCH_APPENDS", "200"))
+
+
+def sample_message(index: int) -> dict:
+    return {
+        "role": "user" if index % 2 else "assistant",
+        "author": "Tester",
+        "text": f"Here is my giveaway proof number {index}, username tester_{index}",
+        "attachments": [
+            {
+                "filename": f"proof_{index}.png",
+                "url": f"https://cdn.discordapp.com/attachments/1/{index}/proof.png",
+                "local_url": f"/attachments/1/proof_{index}.png",
+                "content_type": "image/png",
+            }
+        ],
+        "metadata": {"proof_signals": {"winner_detected": True, "confidence": 0.8}, "visible_text": "winner"},
+    }
+
+
+def legacy_append(path: Path, entry: dict):
+    # The pre-JSONL write path: parse and normalize everything, then rewrite the whole file.
+    data = json.loads(path.read_text(encoding="utf-8")) if path.exists() else []
+    conversation = [tm.normalize_message(item) for item in data]
+    conversation.append(tm.normalize_message(entry))
+    path.write_text(json.dumps(conversation, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def measure(label: str, append) -> None:
+    timings = []
+    for index in range(APPENDS):
+        started = time.perf_counter()
+        append(HISTORY + index)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    print(
+        f"{label:<26} mean={statistics.mean(timings):8.3f}ms "
+        f"p50={timings[len(timings) // 2]:8.3f}ms p99={timings[int(len(timings) * 0.99) - 1]:8.3f}ms"
+    )
+
+
+def main():
+    print(f"history={HISTORY} messages, appends={APPENDS}")
+    legacy_path = DATA_DIR / "legacy_conv.json"
+    legacy_path.write_text(
+        json.dumps([tm.normalize_message(sample_message(i)) for i in range(HISTORY)], indent=2),
+        encoding="utf-8",
+    )
+    measure("legacy rewrite", lambda i: legacy_append(legacy_path, sample_message(i)))
+
+    for mode in ("off", "batch", "always"):
+        ticket_id = f"bench-{mode}"
+        tm.save_conversation(ticket_id, [sample_message(i) for i in range(HISTORY)])
+        tm.FSYNC_MODE = mode
+        measure(
+            f"jsonl append fsync={mode}",
+            lambda i, ticket_id=ticket_id: tm.append_message(ticket_id, "user", **_append_kwargs(sample_message(i))),
+        )
+    tm.FSYNC_MODE = "off"
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+
+def _append_kwargs(entry: dict) -> dict:
+    return {
+        "text": entry["text"],
+        "author": entry["author"],
+        "attachments": entry["attachments"],
+        "metadata": entry["metadata"],
+    }
+
+
+if __name__ == "__main__":
+    main()
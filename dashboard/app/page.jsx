@@ -12,7 +12,7 @@ import {
   TriangleAlert,
   Zap,
 } from "lucide-react";
-import { useEffect, useMemo, useState } from "react";
+import { useEffect, useState } from "react";
 import { getOverview, getServers, getTickets } from "../lib/api";
 import { createRealtimeConnection } from "../lib/realtime";
 import MetricCard from "../components/MetricCard";
@@ -29,39 +29,16 @@ function upsertTicket(list, incoming) {
   return next;
 }
 
-function buildOverview(tickets) {
-  const statusBreakdown = {};
-  const intentBreakdown = {};
-  const priorityBreakdown = {};
-  const userMap = new Map();
-  let attachmentsTotal = 0;
-
-  for (const ticket of tickets) {
-    statusBreakdown[ticket.status] = (statusBreakdown[ticket.status] || 0) + 1;
-    intentBreakdown[ticket.intent || "query"] = (intentBreakdown[ticket.intent || "query"] || 0) + 1;
-    priorityBreakdown[ticket.priority || "LOW"] = (priorityBreakdown[ticket.priority || "LOW"] || 0) + 1;
-    attachmentsTotal += ticket.attachments_count || 0;
-    userMap.set(ticket.user_name, (userMap.get(ticket.user_name) || 0) + (ticket.count || 0));
-  }
-
-  return {
-    stats: {
-      tickets_total: tickets.length,
-      tickets_open: statusBreakdown.OPEN || 0,
-      tickets_escalated: statusBreakdown.ESCALATED || 0,
-      messages_total: tickets.reduce((sum, ticket) => sum + (ticket.count || 0), 0),
-      attachments_total: attachmentsTotal,
-      pending_tickets: tickets.filter((ticket) => ["OPEN", "ESCALATED", "PAUSED"].includes(ticket.status)).length,
-      high_priority: priorityBreakdown.HIGH || 0,
-    },
-    intent_breakdown: intentBreakdown,
-    priority_breakdown: priorityBreakdown,
-    top_users: [...userMap.entries()]
-      .sort((left, right) => right[1] - left[1])
-      .slice(0, 5)
-      .map(([label, value]) => ({ label, value })),
-  };
-}
+// Until /api/overview answers, show zeros rather than totals derived from the
+// first ticket page, which would undercount once there are more tickets.
+const EMPTY_OVERVIEW = {
+  stats: {},
+  intent_breakdown: {},
+  priority_breakdown: {},
+  category_breakdown: {},
+  top_users: [],
+  staff_metrics: [],
+};
 
 export default function Dashboard() {
   const [servers, setServers] = useState([]);
@@ -69,12 +46,17 @@ export default function Dashboard() {
   const [overviewData, setOverviewData] = useState(null);
   const [loading, setLoading] = useState(true);
   const [connected, setConnected] = useState(false);
+  const [resyncCount, setResyncCount] = useState(0);
 
   useEffect(() => {
     async function load() {
       try {
         setLoading(true);
-        const [serverData, ticketData, overview] = await Promise.all([getServers(), getTickets(), getOverview()]);
+        const [serverData, ticketData, overview] = await Promise.all([
+          getServers(),
+          getTickets({ limit: 200 }),
+          getOverview(),
+        ]);
         setServers(serverData.servers || []);
         setTickets(ticketData.tickets || []);
         setOverviewData(overview || null);
@@ -86,7 +68,7 @@ export default function Dashboard() {
     }
 
     load();
-  }, []);
+  }, [resyncCount]);
 
   useEffect(() => {
     const connection = createRealtimeConnection({
@@ -102,27 +84,31 @@ export default function Dashboard() {
         if (event.event === "stats_updated") {
           setOverviewData(event.payload);
         }
+        // The server shed queued events for this connection; reload everything.
+        if (event.event === "resync") {
+          setResyncCount((count) => count + 1);
+        }
       },
     });
     return () => connection.close();
   }, []);
 
-  const overview = useMemo(() => buildOverview(tickets), [tickets]);
-  const stats = overviewData?.stats || overview.stats;
-  const intentChart = Object.entries(overviewData?.intent_breakdown || overview.intent_breakdown || {}).map(([label, value]) => ({
+  const overview = overviewData || EMPTY_OVERVIEW;
+  const stats = overview.stats || {};
+  const intentChart = Object.entries(overview.intent_breakdown || {}).map(([label, value]) => ({
     label,
     value,
   }));
-  const priorityChart = Object.entries(overviewData?.priority_breakdown || overview.priority_breakdown || {}).map(([label, value]) => ({
+  const priorityChart = Object.entries(overview.priority_breakdown || {}).map(([label, value]) => ({
     label,
     value,
   }));
-  const categoryChart = Object.entries(overviewData?.category_breakdown || {}).map(([label, value]) => ({
+  const categoryChart = Object.entries(overview.category_breakdown || {}).map(([label, value]) => ({
     label,
     value,
   }));
-  const activeUsers = overviewData?.top_users || overview.top_users || [];
-  const staffMetrics = overviewData?.staff_metrics || [];
+  const activeUsers = overview.top_users || [];
+  const staffMetrics = overview.staff_metrics || [];
 
   return (
     <div>
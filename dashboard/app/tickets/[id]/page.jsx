@@ -49,6 +49,8 @@ export default function TicketDetail({ params }) {
 
   const [ticket, setTicket] = useState(null);
   const [messages, setMessages] = useState([]);
+  const [historyStart, setHistoryStart] = useState(0);
+  const [loadingOlder, setLoadingOlder] = useState(false);
   const [reply, setReply] = useState("");
   const [note, setNote] = useState("");
   const [handoffTarget, setHandoffTarget] = useState("");
@@ -67,6 +69,7 @@ export default function TicketDetail({ params }) {
       const data = await getConversation(id);
       setTicket(data);
       setMessages(data.messages || []);
+      setHistoryStart(data.start || 0);
     } catch (error) {
       console.error("Load error:", error);
     } finally {
@@ -84,6 +87,28 @@ export default function TicketDetail({ params }) {
     loadTicket();
   }, [id]);
 
+  async function loadOlderMessages() {
+    if (!historyStart || loadingOlder) {
+      return;
+    }
+    const previousHeight = chatRef.current?.scrollHeight || 0;
+    try {
+      setLoadingOlder(true);
+      const data = await getConversation(id, { before: historyStart });
+      setMessages((current) => [...(data.messages || []), ...current]);
+      setHistoryStart(data.start || 0);
+      requestAnimationFrame(() => {
+        if (chatRef.current) {
+          chatRef.current.scrollTop += chatRef.current.scrollHeight - previousHeight;
+        }
+      });
+    } catch (error) {
+      console.error("Load older messages error:", error);
+    } finally {
+      setLoadingOlder(false);
+    }
+  }
+
   const composerLocked = useMemo(() => {
     const assigned = ticket?.meta?.assigned_to;
     return assigned && assigned !== user?.name;
@@ -225,6 +250,10 @@ export default function TicketDetail({ params }) {
       onOpen: () => setLiveState("live"),
       onClose: () => setLiveState("reconnecting"),
       onEvent: (event) => {
+        // Updates were dropped for this connection; refetch the latest window.
+        if (event.event === "resync") {
+          loadTicket();
+        }
         if (event.event === "ticket_updated" && event.payload.ticket_id === id) {
           setTicket((current) => ({
             ...(current || {}),
@@ -294,13 +323,25 @@ export default function TicketDetail({ params }) {
           <span className="pill compact-pill">{ticket?.meta?.intent || "query"}</span>
           <span className="pill compact-pill">{ticket?.meta?.category || "general"}</span>
           <span className={`status-pill ${ticket?.meta?.priority || "LOW"}`}>{ticket?.meta?.priority || "LOW"}</span>
-          <span className="subtle-text">{messages.length} messages</span>
+          <span className="subtle-text">{historyStart + messages.length} messages</span>
           <span className={`pill compact-pill ${ticket?.waiting_minutes > 8 ? "sla-pill breach" : "sla-pill"}`}>
             Waiting {ticket?.waiting_minutes || 0} min
           </span>
         </div>
 
         <div ref={chatRef} style={{ flex: 1 }}>
+          {historyStart > 0 ? (
+            <button
+              type="button"
+              className="secondary-button"
+              style={{ margin: "0 auto 12px" }}
+              onClick={loadOlderMessages}
+              disabled={loadingOlder}
+            >
+              <ChevronDown size={16} style={{ transform: "rotate(180deg)" }} />
+              <span>{loadingOlder ? "Loading..." : `Load earlier messages (${historyStart})`}</span>
+            </button>
+          ) : null}
           <ConversationViewer messages={messages} baseUrl={getApiBase()} />
         </div>
 
@@ -1,12 +1,36 @@
 "use client";
 
 import Link from "next/link";
-import { useDeferredValue, useEffect, useMemo, useState } from "react";
+import { useDeferredValue, useEffect, useMemo, useRef, useState } from "react";
 import { BellRing, CheckCheck, Radio, TriangleAlert } from "lucide-react";
 import { bulkCloseTickets, getTickets } from "../../lib/api";
 import { createRealtimeConnection } from "../../lib/realtime";
 
-const PRIORITY_ORDER = { HIGH: 0, MEDIUM: 1, LOW: 2 };
+const PAGE_SIZE = 50;
+
+function ticketHaystack(ticket) {
+  return [ticket.ticket_id, ticket.user_name, ticket.last_message, ticket.intent, ticket.category, ...(ticket.tags || [])]
+    .filter(Boolean)
+    .join(" ")
+    .toLowerCase();
+}
+
+// The server applies these filters; realtime updates are checked locally so a
+// ticket that stops matching (e.g. gets closed) leaves the filtered list.
+function matchesFilters(ticket, filters) {
+  const search = filters.q.toLowerCase();
+  return (
+    (filters.status === "ALL" || ticket.status === filters.status) &&
+    (filters.priority === "ALL" || ticket.priority === filters.priority) &&
+    (filters.intent === "ALL" || ticket.intent === filters.intent) &&
+    (!search || ticketHaystack(ticket).includes(search))
+  );
+}
+
+function mergePage(list, page) {
+  const seen = new Set(list.map((item) => item.ticket_id));
+  return [...list, ...page.filter((item) => !seen.has(item.ticket_id))];
+}
 
 function upsertTicket(list, incoming) {
   const next = [...list];
@@ -31,7 +55,10 @@ function SkeletonCard() {
 
 export default function TicketsPage() {
   const [tickets, setTickets] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [total, setTotal] = useState(0);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [search, setSearch] = useState("");
   const [statusFilter, setStatusFilter] = useState("ALL");
   const [priorityFilter, setPriorityFilter] = useState("ALL");
@@ -40,34 +67,97 @@ export default function TicketsPage() {
   const [selected, setSelected] = useState([]);
   const [connected, setConnected] = useState(false);
   const [alerts, setAlerts] = useState([]);
+  const [resyncCount, setResyncCount] = useState(0);
   const deferredSearch = useDeferredValue(search);
+  const filters = useMemo(
+    () => ({
+      status: statusFilter,
+      priority: priorityFilter,
+      intent: intentFilter,
+      sort: sortBy,
+      q: deferredSearch.trim(),
+    }),
+    [deferredSearch, intentFilter, priorityFilter, sortBy, statusFilter]
+  );
+  const filtersRef = useRef(filters);
+  filtersRef.current = filters;
 
   useEffect(() => {
+    let cancelled = false;
+
     async function loadTickets() {
+      setLoading(true);
       try {
-        const data = await getTickets();
+        const data = await getTickets({ ...filters, limit: PAGE_SIZE });
+        if (cancelled) {
+          return;
+        }
         setTickets(data.tickets || []);
+        setNextCursor(data.next_cursor || null);
+        setTotal(data.total || 0);
       } catch (error) {
         console.error("Error loading tickets:", error);
       } finally {
-        setLoading(false);
+        if (!cancelled) {
+          setLoading(false);
+        }
       }
     }
 
     loadTickets();
-  }, []);
+    return () => {
+      cancelled = true;
+    };
+  }, [filters, resyncCount]);
+
+  async function loadMore() {
+    if (!nextCursor || loadingMore) {
+      return;
+    }
+    const requested = filters;
+    setLoadingMore(true);
+    try {
+      const data = await getTickets({ ...requested, limit: PAGE_SIZE, cursor: nextCursor });
+      if (filtersRef.current !== requested) {
+        return;
+      }
+      setTickets((current) => mergePage(current, data.tickets || []));
+      setNextCursor(data.next_cursor || null);
+      setTotal(data.total || 0);
+    } catch (error) {
+      console.error("Error loading more tickets:", error);
+    } finally {
+      setLoadingMore(false);
+    }
+  }
+
+  function applyTicketUpdate(incoming) {
+    if (!incoming?.ticket_id) {
+      return;
+    }
+    setTickets((current) =>
+      matchesFilters(incoming, filtersRef.current)
+        ? upsertTicket(current, incoming)
+        : current.filter((item) => item.ticket_id !== incoming.ticket_id)
+    );
+  }
 
   useEffect(() => {
     const connection = createRealtimeConnection({
       onOpen: () => setConnected(true),
       onClose: () => setConnected(false),
       onEvent: (event) => {
+        // Updates were dropped for this connection, so reload the first page.
+        if (event.event === "resync") {
+          setResyncCount((count) => count + 1);
+        }
+
         if (["new_ticket", "ticket_updated"].includes(event.event)) {
-          setTickets((current) => upsertTicket(current, event.payload));
+          applyTicketUpdate(event.payload);
         }
 
         if (event.event === "new_message") {
-          setTickets((current) => upsertTicket(current, event.payload.ticket));
+          applyTicketUpdate(event.payload.ticket);
         }
 
         if (["new_ticket", "new_message"].includes(event.event)) {
@@ -104,43 +194,6 @@ export default function TicketsPage() {
     return () => clearTimeout(timeout);
   }, [alerts]);
 
-  const filteredTickets = useMemo(() => {
-    const normalizedSearch = deferredSearch.trim().toLowerCase();
-    const result = tickets.filter((ticket) => {
-      const haystack = [
-        ticket.ticket_id,
-        ticket.user_name,
-        ticket.last_message,
-        ticket.intent,
-        ticket.category,
-        ...(ticket.tags || []),
-      ]
-        .filter(Boolean)
-        .join(" ")
-        .toLowerCase();
-
-      const searchMatch = !normalizedSearch || haystack.includes(normalizedSearch);
-      const statusMatch = statusFilter === "ALL" || ticket.status === statusFilter;
-      const priorityMatch = priorityFilter === "ALL" || ticket.priority === priorityFilter;
-      const intentMatch = intentFilter === "ALL" || ticket.intent === intentFilter;
-      return searchMatch && statusMatch && priorityMatch && intentMatch;
-    });
-
-    result.sort((left, right) => {
-      if (sortBy === "oldest") {
-        return String(left.last_message_at || "").localeCompare(String(right.last_message_at || ""));
-      }
-      if (sortBy === "messages") {
-        return (right.count || 0) - (left.count || 0);
-      }
-      if (sortBy === "priority") {
-        return (PRIORITY_ORDER[left.priority] ?? 99) - (PRIORITY_ORDER[right.priority] ?? 99);
-      }
-      return String(right.last_message_at || "").localeCompare(String(left.last_message_at || ""));
-    });
-    return result;
-  }, [deferredSearch, intentFilter, priorityFilter, sortBy, statusFilter, tickets]);
-
   async function handleBulkClose() {
     if (!selected.length) {
       return;
@@ -151,9 +204,9 @@ export default function TicketsPage() {
     try {
       await bulkCloseTickets(selected);
       setTickets((current) =>
-        current.map((ticket) =>
-          selected.includes(ticket.ticket_id) ? { ...ticket, status: "CLOSED" } : ticket
-        )
+        current
+          .map((ticket) => (selected.includes(ticket.ticket_id) ? { ...ticket, status: "CLOSED" } : ticket))
+          .filter((ticket) => matchesFilters(ticket, filtersRef.current))
       );
       setSelected([]);
     } catch (error) {
@@ -245,13 +298,13 @@ export default function TicketsPage() {
         </div>
       ) : null}
 
-      {!loading && !filteredTickets.length ? (
+      {!loading && !tickets.length ? (
         <p className="empty-state">No tickets matched that filter.</p>
       ) : null}
 
-      {!loading && filteredTickets.length ? (
+      {!loading && tickets.length ? (
         <div className="ticket-grid">
-          {filteredTickets.map((ticket) => (
+          {tickets.map((ticket) => (
             <div
               key={ticket.ticket_id}
               className={`ticket-card ops-ticket-card ${ticket.priority === "HIGH" || ticket.overdue ? "critical-ticket" : ""}`}
@@ -304,6 +357,19 @@ export default function TicketsPage() {
           ))}
         </div>
       ) : null}
+
+      {!loading && tickets.length ? (
+        <div className="inline-controls" style={{ marginTop: 18, justifyContent: "space-between" }}>
+          <span className="subtle-text">
+            Showing {tickets.length} of {Math.max(total, tickets.length)} tickets
+          </span>
+          {nextCursor ? (
+            <button type="button" className="secondary-button" onClick={loadMore} disabled={loadingMore}>
+              <span>{loadingMore ? "Loading..." : "Load more"}</span>
+            </button>
+          ) : null}
+        </div>
+      ) : null}
     </div>
   );
 }
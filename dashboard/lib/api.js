@@ -27,19 +27,30 @@ export function getStoredUser() {
   }
 }
 
+const etagCache = new Map();
+const ETAG_CACHE_LIMIT = 50;
+
 async function apiFetch(endpoint, options = {}) {
+  const { revalidate = false, ...fetchOptions } = options;
+  const cached = revalidate ? etagCache.get(endpoint) : null;
   const token = getToken();
   const headers = {
     ...(options.body ? { "Content-Type": "application/json" } : {}),
     ...(token ? { Authorization: `Bearer ${token}` } : {}),
+    ...(cached ? { "If-None-Match": cached.etag } : {}),
     ...(options.headers || {}),
   };
 
   const res = await fetch(`${API_BASE}${endpoint}`, {
-    ...options,
+    ...fetchOptions,
+    ...(revalidate ? { cache: "no-store" } : {}),
     headers,
   });
 
+  if (res.status === 304 && cached) {
+    return cached.data;
+  }
+
   if (res.status === 401) {
     if (typeof window !== "undefined") {
       localStorage.removeItem("token");
@@ -53,7 +64,27 @@ async function apiFetch(endpoint, options = {}) {
     throw new Error(text || "API error");
   }
 
-  return res.json();
+  const data = await res.json();
+  const etag = res.headers.get("ETag");
+  if (revalidate && etag) {
+    etagCache.delete(endpoint);
+    etagCache.set(endpoint, { etag, data });
+    if (etagCache.size > ETAG_CACHE_LIMIT) {
+      etagCache.delete(etagCache.keys().next().value);
+    }
+  }
+  return data;
+}
+
+function withQuery(endpoint, params = {}) {
+  const query = new URLSearchParams();
+  for (const [key, value] of Object.entries(params)) {
+    if (value !== undefined && value !== null && value !== "" && value !== "ALL") {
+      query.set(key, String(value));
+    }
+  }
+  const suffix = query.toString();
+  return suffix ? `${endpoint}?${suffix}` : endpoint;
 }
 
 export function getApiBase() {
@@ -64,16 +95,16 @@ export function getServers() {
   return apiFetch("/api/server_map");
 }
 
-export function getTickets() {
-  return apiFetch("/api/tickets");
+export function getTickets(params = {}) {
+  return apiFetch(withQuery("/api/tickets", params), { revalidate: true });
 }
 
 export function getOverview() {
   return apiFetch("/api/overview");
 }
 
-export function getConversation(ticketId) {
-  return apiFetch(`/api/conversation/${ticketId}`);
+export function getConversation(ticketId, params = {}) {
+  return apiFetch(withQuery(`/api/conversation/${ticketId}`, params));
 }
 
 export function claimTicket(ticketId) {
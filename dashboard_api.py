@@ -1,26 +1,31 @@
 import asyncio
+import hashlib
+import json
 import os
-from collections import Counter, defaultdict
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 import jwt
 import requests
+from overview_stats import OverviewAggregates
+from realtime_hub import RealtimeHub
+from ticket_query import SORTS, InvalidCursor, TicketFilters, TicketListIndex
+import text_signals
 import ticket_manager as tm
 from dotenv import load_dotenv
-from fastapi import Depends, FastAPI, Header, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 
 try:
-    from ai_helper import ask_ai
+    from ai_helper import ask_ai_async
 
     AI_AVAILABLE = True
 except Exception:
-    ask_ai = None
+    ask_ai_async = None
     AI_AVAILABLE = False
 
 load_dotenv()
@@ -31,6 +36,12 @@ JWT_ALGO = "HS256"
 ADMIN_USERNAME = os.getenv("ADMIN_USERNAME", "").strip()
 ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "").strip()
 SYNC_SECRET = os.getenv("SYNC_SECRET", "").strip()
+TICKET_PAGE_SIZE = 50
+TICKET_PAGE_MAX = 200
+CONVERSATION_WINDOW_MAX = 500
+REALTIME_QUEUE_SIZE = int(os.getenv("REALTIME_QUEUE_SIZE", "256"))
+REALTIME_SEND_TIMEOUT = float(os.getenv("REALTIME_SEND_TIMEOUT_SECONDS", "10"))
+OVERVIEW_RECONCILE_SECONDS = max(30, int(os.getenv("OVERVIEW_RECONCILE_SECONDS", "300")))
 ALLOWED_ORIGINS = [
     origin.strip()
     for origin in os.getenv("DASHBOARD_ALLOWED_ORIGINS", "*").split(",")
@@ -39,7 +50,6 @@ ALLOWED_ORIGINS = [
 
 ADMIN_LOG_FILE = Path("admin_logs.json")
 ALERTS_FILE = Path("alerts.json")
-CONVERSATIONS_DIR = Path("ticket_data/conversations")
 SERVER_MAP_PATH = Path("server_map.json")
 UTC = timezone.utc
 
@@ -67,9 +77,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
-app.mount("/attachments", StaticFiles(directory="ticket_data/attachments"), name="attachments")
+app.mount("/attachments", StaticFiles(directory=str(tm.ATTACHMENTS_DIR)), name="attachments")
 
 
 class LoginData(BaseModel):
@@ -93,6 +104,16 @@ class SyncTicketPayload(BaseModel):
     meta: Dict[str, Any]
 
 
+class SyncTicketDeltaPayload(BaseModel):
+    ticket_id: str
+    status: str
+    base_seq: int
+    base_etag: str = ""
+    messages: List[dict] = []
+    meta_patch: Dict[str, Any] = {}
+    meta_removed: List[str] = []
+
+
 class TicketMetaUpdate(BaseModel):
     assigned_to: Optional[str] = None
     priority: Optional[str] = None
@@ -117,35 +138,8 @@ class HandoffPayload(BaseModel):
     note: str = ""
 
 
-class RealtimeHub:
-    def __init__(self):
-        self.connections: list[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.connections.append(websocket)
-
-    def disconnect(self, websocket: WebSocket):
-        if websocket in self.connections:
-            self.connections.remove(websocket)
-
-    async def broadcast(self, event: str, payload: Dict[str, Any]):
-        stale: list[WebSocket] = []
-        message = {
-            "event": event,
-            "payload": payload,
-            "sent_at": datetime.now(UTC).isoformat(),
-        }
-        for socket in list(self.connections):
-            try:
-                await socket.send_json(message)
-            except Exception:
-                stale.append(socket)
-        for socket in stale:
-            self.disconnect(socket)
-
-
-hub = RealtimeHub()
+hub = RealtimeHub(max_queue=REALTIME_QUEUE_SIZE, send_timeout=REALTIME_SEND_TIMEOUT)
+overview = OverviewAggregates()
 
 
 def write_admin_log(action: str, ticket_id: str, message: str = "", admin: str = "admin"):
@@ -163,6 +157,7 @@ def write_admin_log(action: str, ticket_id: str, message: str = "", admin: str =
         },
     )
     tm._save_json(ADMIN_LOG_FILE, logs)
+    overview.record_staff_action(admin, action)
 
 
 def decode_token(token: str) -> Dict[str, Any]:
@@ -218,14 +213,7 @@ def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
 
 
 def infer_sentiment(text: str) -> str:
-    lowered = (text or "").lower()
-    if any(word in lowered for word in ["scam", "fraud", "angry", "worst", "refund", "useless", "idiot"]):
-        return "angry"
-    if any(word in lowered for word in ["urgent", "asap", "immediately", "fast", "now", "quick"]):
-        return "urgent"
-    if any(word in lowered for word in ["thanks", "thank you", "nice", "okay", "cool"]):
-        return "positive"
-    return "neutral"
+    return text_signals.detect_sentiment(text)
 
 
 def infer_priority(metadata: Dict[str, Any], last_message: Dict[str, Any]) -> str:
@@ -244,9 +232,8 @@ def infer_priority(metadata: Dict[str, Any], last_message: Dict[str, Any]) -> st
     return "LOW"
 
 
-def extract_tags(metadata: Dict[str, Any], conversation: List[dict]) -> List[str]:
+def derive_tags(metadata: Dict[str, Any], latest_text: str, recent_attachments: bool) -> List[str]:
     tags = list(metadata.get("tags") or [])
-    latest_text = (conversation[-1].get("text") if conversation else "") or ""
     lowered = latest_text.lower()
 
     derived = []
@@ -256,7 +243,7 @@ def extract_tags(metadata: Dict[str, Any], conversation: List[dict]) -> List[str
         derived.append(str(metadata["intent"]))
     if "transaction" in lowered or "txid" in lowered:
         derived.append("transaction")
-    if "screenshot" in lowered or any(item.get("attachments") for item in conversation[-3:]):
+    if "screenshot" in lowered or recent_attachments:
         derived.append("proof")
     if infer_sentiment(latest_text) in {"angry", "urgent"}:
         derived.append("priority-watch")
@@ -267,60 +254,53 @@ def extract_tags(metadata: Dict[str, Any], conversation: List[dict]) -> List[str
     return tags
 
 
-def response_minutes(conversation: List[dict]) -> Optional[float]:
-    first_user = next((msg for msg in conversation if msg.get("role") == "user"), None)
-    first_staff = next(
-        (msg for msg in conversation if (msg.get("role") == "assistant" or msg.get("author") == "ADMIN")),
-        None,
-    )
-    if not first_user or not first_staff:
-        return None
-    start = parse_timestamp(first_user.get("timestamp"))
-    end = parse_timestamp(first_staff.get("timestamp"))
+def extract_tags(metadata: Dict[str, Any], conversation: List[dict]) -> List[str]:
+    latest_text = (conversation[-1].get("text") if conversation else "") or ""
+    return derive_tags(metadata, latest_text, any(item.get("attachments") for item in conversation[-3:]))
+
+
+def minutes_between(started_at: Optional[str], ended_at: Optional[str]) -> Optional[float]:
+    start = parse_timestamp(started_at)
+    end = parse_timestamp(ended_at)
     if not start or not end:
         return None
     return round(max((end - start).total_seconds(), 0) / 60, 2)
 
 
-def summarize_ticket(ticket_id: str) -> Dict[str, Any]:
-    conversation = tm.load_conversation(ticket_id)
-    metadata = tm.load_ticket_meta(ticket_id)
-    status = tm.load_status_map().get(str(ticket_id), metadata.get("status", "OPEN"))
-    last_message = conversation[-1] if conversation else {}
-    attachment_count = sum(len(item.get("attachments") or []) for item in conversation)
-    first_user = next((item for item in conversation if item.get("role") == "user"), {})
-    last_user = next((item for item in reversed(conversation) if item.get("role") == "user"), {})
+def summary_from_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    # Turns a summary index row (see ticket_manager.build_summary_row) into the
+    # dashboard's ticket card; only the time-dependent fields are computed here.
+    ticket_id = row["ticket_id"]
+    metadata = row.get("meta") or {}
+    status = row.get("status") or "OPEN"
+    last_message = row.get("last_message") or {}
+    last_text = last_message.get("text") or ""
     fallback_user = (
         metadata.get("display_name")
         or metadata.get("user_name")
-        or last_user.get("author")
-        or first_user.get("author")
+        or row.get("last_user_author")
+        or row.get("first_user_author")
         or "Customer"
     )
-    fallback_category = metadata.get("category") or last_message.get("metadata", {}).get("category")
+    fallback_category = metadata.get("category") or (last_message.get("metadata") or {}).get("category")
     if not fallback_category:
         channel_name = metadata.get("channel_name") or ""
         if "-" in channel_name:
             fallback_category = channel_name.split("-", 1)[0]
     fallback_category = fallback_category or "general"
-    sentiment = metadata.get("sentiment") or infer_sentiment(last_message.get("text") or "")
+    sentiment = metadata.get("sentiment") or infer_sentiment(last_text)
     priority = infer_priority(metadata, last_message)
     last_message_at = last_message.get("timestamp")
-    last_seen = parse_timestamp(last_message_at)
-    overdue = bool(
-        status in {"OPEN", "ESCALATED", "PAUSED"}
-        and last_seen
-        and now_utc() - last_seen > timedelta(minutes=8)
-    )
-    waiting_minutes = round(max((now_utc() - last_seen).total_seconds(), 0) / 60, 1) if last_seen else 0
+    first_user_at = row.get("first_user_at")
+    first_staff_at = row.get("first_staff_at")
 
     return {
         "ticket_id": str(ticket_id),
         "status": status,
-        "count": len(conversation),
-        "last_message": (last_message.get("text") or "")[:160],
+        "count": row.get("count", 0),
+        "last_message": last_text[:160],
         "last_message_at": last_message_at,
-        "attachments_count": attachment_count,
+        "attachments_count": row.get("attachments_count", 0),
         "intent": metadata.get("intent") or last_message.get("intent") or "query",
         "category": fallback_category,
         "user_name": fallback_user,
@@ -329,119 +309,104 @@ def summarize_ticket(ticket_id: str) -> Dict[str, Any]:
         "channel_name": metadata.get("channel_name") or f"ticket-{ticket_id}",
         "priority": priority,
         "sentiment": sentiment,
-        "tags": extract_tags(metadata, conversation),
+        "tags": derive_tags(metadata, last_text, any(row.get("recent_attachments") or [])),
         "assigned_to": metadata.get("assigned_to"),
-        "note_count": len(metadata.get("internal_notes") or []),
+        "note_count": metadata.get("note_count", 0),
         "auto_reply_enabled": bool(metadata["auto_reply_enabled"]) if "auto_reply_enabled" in metadata else True,
-        "overdue": overdue,
-        "waiting_minutes": waiting_minutes,
-        "avg_response_minutes": response_minutes(conversation),
+        **wait_times(status, last_message_at),
+        "avg_response_minutes": (
+            minutes_between(first_user_at, first_staff_at) if first_user_at is not None and first_staff_at is not None else None
+        ),
     }
 
 
+def wait_times(status: str, last_message_at: Optional[str]) -> Dict[str, Any]:
+    last_seen = parse_timestamp(last_message_at)
+    overdue = bool(
+        status in {"OPEN", "ESCALATED", "PAUSED"}
+        and last_seen
+        and now_utc() - last_seen > timedelta(minutes=8)
+    )
+    waiting_minutes = round(max((now_utc() - last_seen).total_seconds(), 0) / 60, 1) if last_seen else 0
+    return {"overdue": overdue, "waiting_minutes": waiting_minutes}
+
+
+def with_wait_times(ticket: Dict[str, Any]) -> Dict[str, Any]:
+    # Cards cached by the ticket list index carry the wait times from when they were built.
+    return {**ticket, **wait_times(ticket["status"], ticket.get("last_message_at"))}
+
+
+def summarize_ticket(ticket_id: str) -> Dict[str, Any]:
+    row = tm.load_ticket_summary(ticket_id)
+    if row is None:
+        row = tm.build_summary_row(ticket_id, [], {}, tm.get_ticket_status(ticket_id))
+    return summary_from_row(row)
+
+
+ticket_list = TicketListIndex(summary_from_row)
+
+
+def refresh_ticket_list() -> TicketListIndex:
+    ticket_list.refresh(tm.load_ticket_summaries())
+    return ticket_list
+
+
+def ticket_summaries() -> List[Dict[str, Any]]:
+    return [with_wait_times(ticket) for ticket in refresh_ticket_list().cards()]
+
+
 def all_ticket_ids() -> List[str]:
-    ids = set()
-    if CONVERSATIONS_DIR.exists():
-        ids.update(
-            file.name.replace("conv_", "").replace(".json", "")
-            for file in CONVERSATIONS_DIR.iterdir()
-            if file.name.endswith(".json")
-        )
-    if tm.META_DIR.exists():
-        ids.update(
-            file.name.replace("meta_", "").replace(".json", "")
-            for file in tm.META_DIR.iterdir()
-            if file.name.endswith(".json")
-        )
-    return sorted(ids)
-
-
-def build_overview(tickets: List[Dict[str, Any]]) -> Dict[str, Any]:
-    status_counts: Dict[str, int] = {}
-    intent_counts: Dict[str, int] = {}
-    priority_counts: Dict[str, int] = {}
-    category_counts: Dict[str, int] = {}
-    users = Counter()
-    response_times: List[float] = []
-
-    for ticket in tickets:
-        status_counts[ticket["status"]] = status_counts.get(ticket["status"], 0) + 1
-        intent = ticket["intent"] or "query"
-        intent_counts[intent] = intent_counts.get(intent, 0) + 1
-        priority_counts[ticket["priority"]] = priority_counts.get(ticket["priority"], 0) + 1
-        category_counts[ticket["category"]] = category_counts.get(ticket["category"], 0) + 1
-        users[ticket["user_name"]] += ticket["count"]
-        if ticket.get("avg_response_minutes") is not None:
-            response_times.append(float(ticket["avg_response_minutes"]))
-
-    logs = tm._load_json(ADMIN_LOG_FILE, [])
-    staff_actions = defaultdict(lambda: {"replies": 0, "closes": 0, "claims": 0})
-    for log in logs:
-        admin = log.get("admin") or "admin"
-        action = (log.get("action") or "").upper()
-        if action == "REPLY":
-            staff_actions[admin]["replies"] += 1
-        elif action == "CLOSE":
-            staff_actions[admin]["closes"] += 1
-        elif action == "CLAIM":
-            staff_actions[admin]["claims"] += 1
-
-    activity = []
-    for ticket in sorted(tickets, key=lambda item: item.get("last_message_at") or "", reverse=True)[:7]:
-        activity.append(
-            {
-                "label": ticket["user_name"],
-                "value": ticket["count"],
-                "status": ticket["status"],
-                "ticket_id": ticket["ticket_id"],
-            }
-        )
+    return tm.list_ticket_ids()
+
+
+def reconcile_overview():
+    overview.reconcile(ticket_summaries(), tm._load_json(ADMIN_LOG_FILE, []))
+
+
+def current_overview() -> Dict[str, Any]:
+    if not overview.reconciled:
+        reconcile_overview()
+    return overview.snapshot()
+
+
+async def reconcile_overview_loop():
+    while True:
+        try:
+            await asyncio.to_thread(reconcile_overview)
+        except Exception as exc:
+            print(f"[WARN] Overview reconciliation failed: {exc}")
+        await asyncio.sleep(OVERVIEW_RECONCILE_SECONDS)
+
+
+@app.on_event("startup")
+async def start_overview_reconciler():
+    app.state.overview_task = asyncio.create_task(reconcile_overview_loop())
 
-    return {
-        "stats": {
-            "tickets_total": len(tickets),
-            "tickets_open": status_counts.get("OPEN", 0),
-            "tickets_escalated": status_counts.get("ESCALATED", 0),
-            "messages_total": sum(ticket["count"] for ticket in tickets),
-            "attachments_total": sum(ticket["attachments_count"] for ticket in tickets),
-            "avg_response_minutes": round(sum(response_times) / len(response_times), 2) if response_times else 0,
-            "pending_tickets": sum(1 for ticket in tickets if ticket["status"] in {"OPEN", "ESCALATED", "PAUSED"}),
-            "high_priority": priority_counts.get("HIGH", 0),
-        },
-        "status_breakdown": status_counts,
-        "intent_breakdown": intent_counts,
-        "priority_breakdown": priority_counts,
-        "category_breakdown": category_counts,
-        "activity": activity,
-        "top_users": [{"label": label, "value": value} for label, value in users.most_common(5)],
-        "staff_metrics": [
-            {
-                "label": admin,
-                "value": info["replies"] + info["closes"] + info["claims"],
-                "replies": info["replies"],
-                "closes": info["closes"],
-                "claims": info["claims"],
-            }
-            for admin, info in staff_actions.items()
-        ],
-    }
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    task = getattr(app.state, "overview_task", None)
+    if task is not None:
+        task.cancel()
+    await hub.close()
 
 
 async def emit_ticket_snapshot(ticket_id: str, event: str = "ticket_updated", include_message: bool = True):
     ticket = summarize_ticket(ticket_id)
+    overview.update(ticket)
     await hub.broadcast(event, ticket)
     if include_message:
-        conversation = tm.load_conversation(ticket_id)
-        if conversation:
+        latest = tm.load_conversation_window(ticket_id, limit=1)["messages"]
+        if latest:
             await hub.broadcast(
                 "new_message",
                 {
                     "ticket_id": ticket_id,
-                    "message": conversation[-1],
+                    "message": latest[-1],
                     "ticket": ticket,
                 },
             )
-    await hub.broadcast("stats_updated", build_overview([summarize_ticket(item) for item in all_ticket_ids()]))
+    await hub.broadcast("stats_updated", current_overview())
     await hub.broadcast("alerts_updated", {"alerts": load_alerts()[:20]})
 
 
@@ -493,16 +458,7 @@ async def websocket_endpoint(websocket: WebSocket, token: str = Query(default=""
         return
 
     await hub.connect(websocket)
-    await websocket.send_json(
-        {
-            "event": "ready",
-            "payload": {
-                "user": user.get("user"),
-                "role": user.get("role"),
-            },
-            "sent_at": datetime.now(UTC).isoformat(),
-        }
-    )
+    hub.send_to(websocket, "ready", {"user": user.get("user"), "role": user.get("role")})
 
     try:
         while True:
@@ -545,8 +501,12 @@ def get_server_map(user=Depends(verify_token)):
 
 @app.get("/api/overview")
 def get_overview(user=Depends(verify_token)):
-    tickets = [summarize_ticket(ticket_id) for ticket_id in all_ticket_ids()]
-    return build_overview(tickets)
+    return current_overview()
+
+
+@app.get("/api/metrics")
+def get_metrics(user=Depends(verify_token)):
+    return {"realtime": hub.stats(), "overview": overview.stats()}
 
 
 @app.get("/api/alerts")
@@ -554,35 +514,94 @@ def get_alerts(user=Depends(verify_token)):
     return {"alerts": load_alerts()[:20]}
 
 
+def ticket_filter_value(value: Optional[str], *, upper: bool = False) -> Optional[str]:
+    normalized = (value or "").strip()
+    if not normalized or normalized.upper() == "ALL":
+        return None
+    return normalized.upper() if upper else normalized
+
+
 @app.get("/api/tickets")
-def get_tickets(user=Depends(verify_token)):
-    tickets = [summarize_ticket(ticket_id) for ticket_id in all_ticket_ids()]
-    tickets.sort(key=lambda item: item.get("last_message_at") or "", reverse=True)
-    return {"tickets": tickets}
+def get_tickets(
+    status: Optional[str] = None,
+    category: Optional[str] = None,
+    priority: Optional[str] = None,
+    intent: Optional[str] = None,
+    assigned_to: Optional[str] = None,
+    overdue: Optional[bool] = None,
+    q: str = "",
+    sort: str = "newest",
+    limit: int = Query(default=TICKET_PAGE_SIZE, ge=1, le=TICKET_PAGE_MAX),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(default=None),
+    user=Depends(verify_token),
+):
+    if sort not in SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(SORTS)}")
+    filters = TicketFilters(
+        status=ticket_filter_value(status, upper=True),
+        category=ticket_filter_value(category),
+        priority=ticket_filter_value(priority, upper=True),
+        intent=ticket_filter_value(intent),
+        assigned_to=ticket_filter_value(assigned_to),
+        overdue=overdue,
+        q=q,
+        sort=sort,
+    )
+    try:
+        page = refresh_ticket_list().page(filters, limit=limit, cursor=cursor)
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    page["tickets"] = [with_wait_times(ticket) for ticket in page["tickets"]]
+    # waiting_minutes moves every few seconds, so the ETag only sees it in whole
+    # minutes; the overdue flags are hashed as they are so crossing the threshold
+    # always produces a new tag.
+    validator = {
+        **page,
+        "tickets": [{**ticket, "waiting_minutes": int(ticket["waiting_minutes"])} for ticket in page["tickets"]],
+    }
+    snapshot = json.dumps(validator, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    etag = f'"{hashlib.sha1(snapshot).hexdigest()[:20]}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if if_none_match and etag in {item.strip() for item in if_none_match.split(",")}:
+        return Response(status_code=304, headers=headers)
+    body = json.dumps(page, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @app.get("/api/conversation/{ticket_id}")
-def get_conversation(ticket_id: str, user=Depends(verify_token)):
-    conversation = tm.load_conversation(ticket_id)
-    if not conversation:
+def get_conversation(
+    ticket_id: str,
+    before: Optional[int] = Query(default=None, ge=0),
+    after: Optional[int] = Query(default=None, ge=0),
+    limit: int = Query(default=tm.CONVERSATION_WINDOW, ge=1, le=CONVERSATION_WINDOW_MAX),
+    user=Depends(verify_token),
+):
+    # Returns the newest `limit` messages, or the ones before/after a message
+    # position; `start` is the position of the first returned message.
+    row = tm.load_ticket_summary(ticket_id)
+    if row is None or not row.get("count"):
         raise HTTPException(status_code=404, detail=f"Ticket {ticket_id} not found")
+    window = tm.load_conversation_window(ticket_id, before=before, after=after, limit=limit)
+    ticket = summary_from_row(row)
 
     metadata = tm.load_ticket_meta(ticket_id)
-    status = tm.load_status_map().get(ticket_id, metadata.get("status", "OPEN"))
+    status = tm.get_ticket_status(ticket_id)
     metadata = {
         **metadata,
-        "priority": infer_priority(metadata, conversation[-1] if conversation else {}),
-        "sentiment": metadata.get("sentiment") or infer_sentiment((conversation[-1].get("text") if conversation else "")),
-        "tags": extract_tags(metadata, conversation),
+        "priority": ticket["priority"],
+        "sentiment": ticket["sentiment"],
+        "tags": ticket["tags"],
         "internal_notes": metadata.get("internal_notes") or [],
-        "auto_reply_enabled": bool(metadata["auto_reply_enabled"]) if "auto_reply_enabled" in metadata else True,
+        "auto_reply_enabled": ticket["auto_reply_enabled"],
     }
     return {
         "ticket_id": ticket_id,
         "status": status,
-        "messages": conversation,
+        **window,
         "meta": metadata,
-        "waiting_minutes": summarize_ticket(ticket_id).get("waiting_minutes", 0),
+        "waiting_minutes": ticket["waiting_minutes"],
     }
 
 
@@ -612,7 +631,6 @@ async def send_reply(data: SendReply, user=Depends(verify_token)):
             intent="support",
             metadata={"source": "dashboard"},
         )
-        tm.set_ticket_status(data.ticket_id, "OPEN")
         tm.save_ticket_meta(
             data.ticket_id,
             {
@@ -633,7 +651,6 @@ async def send_reply(data: SendReply, user=Depends(verify_token)):
 @app.post("/api/close_ticket")
 async def close_ticket(data: CloseTicket, user=Depends(verify_token)):
     tm.set_ticket_status(data.ticket_id, "CLOSED")
-    tm.save_ticket_meta(data.ticket_id, {"status": "CLOSED"})
     tm.append_message(
         data.ticket_id,
         "assistant",
@@ -660,9 +677,8 @@ async def close_ticket(data: CloseTicket, user=Depends(verify_token)):
 @app.post("/api/tickets/bulk_close")
 async def bulk_close(payload: BulkClosePayload, user=Depends(verify_token)):
     closed = []
-    for ticket_id in payload.ticket_ids:
+    for ticket_id in dict.fromkeys(payload.ticket_ids):
         tm.set_ticket_status(ticket_id, "CLOSED")
-        tm.save_ticket_meta(ticket_id, {"status": "CLOSED"})
         tm.append_message(
             ticket_id,
             "assistant",
@@ -727,9 +743,13 @@ async def handoff_ticket(ticket_id: str, payload: HandoffPayload, user=Depends(v
 async def update_ticket_meta(ticket_id: str, payload: TicketMetaUpdate, user=Depends(verify_token)):
     current = tm.load_ticket_meta(ticket_id)
     update = payload.dict(exclude_none=True)
-    tm.save_ticket_meta(ticket_id, update)
-    if payload.status:
-        tm.set_ticket_status(ticket_id, payload.status)
+    status = update.pop("status", None)
+    if update:
+        tm.save_ticket_meta(ticket_id, update)
+    if status is not None:
+        # set_ticket_status also handles close-time work such as releasing attachments.
+        tm.set_ticket_status(ticket_id, status)
+        update["status"] = status
     write_admin_log("UPDATE", ticket_id, str(update), admin=user.get("user", "admin"))
     await emit_ticket_snapshot(ticket_id, include_message=False)
     return {"meta": {**current, **update}}
@@ -761,9 +781,9 @@ async def ai_suggest(payload: AISuggestPayload, user=Depends(verify_token)):
 
     metadata = tm.load_ticket_meta(payload.ticket_id)
     base = fallback_ai_suggestion(payload.ticket_id, conversation, metadata)
-    if AI_AVAILABLE and ask_ai:
+    if AI_AVAILABLE and ask_ai_async:
         try:
-            decision = await asyncio.to_thread(ask_ai, ai_support_prompt(), conversation)
+            decision = await ask_ai_async(ai_support_prompt(), conversation)
             last_user = next((item for item in reversed(conversation) if item.get("role") == "user"), {})
             sentiment = infer_sentiment(last_user.get("text") or "")
             category = decision.get("category") or metadata.get("category") or base["category"]
@@ -819,35 +839,76 @@ def get_admin_logs(user=Depends(verify_token)):
     return {"logs": tm._load_json(ADMIN_LOG_FILE, [])}
 
 
-@app.post("/api/internal/sync_ticket")
-async def sync_ticket(payload: SyncTicketPayload, x_sync_secret: str | None = Header(default=None)):
-    verify_sync_secret(x_sync_secret)
-    existing_conversation = tm.load_conversation(payload.ticket_id)
-    existing_meta = tm.load_ticket_meta(payload.ticket_id)
-    is_new_ticket = not existing_conversation and not existing_meta
-
-    tm.save_conversation(payload.ticket_id, payload.messages)
-    current_meta = payload.meta or {}
-    last_user = next((item for item in reversed(payload.messages) if item.get("role") == "user"), {})
-    sentiment = current_meta.get("sentiment") or infer_sentiment(last_user.get("text") or "")
-    category = current_meta.get("category") or current_meta.get("channel_name", "general").split("-", 1)[0]
-    intent = current_meta.get("intent") or last_user.get("intent") or "query"
+def enrich_sync_meta(meta: Dict[str, Any], messages: List[dict]) -> Dict[str, Any]:
+    last_user = next((item for item in reversed(messages) if item.get("role") == "user"), {})
+    sentiment = meta.get("sentiment") or infer_sentiment(last_user.get("text") or "")
+    category = meta.get("category") or (meta.get("channel_name") or "general").split("-", 1)[0]
+    intent = meta.get("intent") or last_user.get("intent") or "query"
     enriched_meta = {
-        **current_meta,
+        **meta,
         "intent": intent,
         "category": category or "general",
         "sentiment": sentiment,
     }
     enriched_meta["priority"] = infer_priority(enriched_meta, last_user)
-    enriched_meta["tags"] = extract_tags(enriched_meta, payload.messages)
+    enriched_meta["tags"] = extract_tags(enriched_meta, messages)
+    return enriched_meta
+
 
-    tm.save_ticket_meta(payload.ticket_id, enriched_meta)
-    tm.set_ticket_status(payload.ticket_id, payload.status)
-    ticket = summarize_ticket(payload.ticket_id)
+async def finish_ticket_sync(ticket_id: str, is_new_ticket: bool):
+    ticket = summarize_ticket(ticket_id)
     if is_new_ticket:
-        write_alert("new_ticket", payload.ticket_id, "New ticket created", ticket.get("last_message") or f"#{payload.ticket_id}", priority=ticket["priority"])
+        write_alert("new_ticket", ticket_id, "New ticket created", ticket.get("last_message") or f"#{ticket_id}", priority=ticket["priority"])
     elif ticket["priority"] == "HIGH" or ticket["overdue"]:
-        write_alert("attention", payload.ticket_id, "Ticket needs attention", ticket.get("last_message") or f"#{payload.ticket_id}", priority=ticket["priority"])
+        write_alert("attention", ticket_id, "Ticket needs attention", ticket.get("last_message") or f"#{ticket_id}", priority=ticket["priority"])
+
+    await emit_ticket_snapshot(ticket_id, event="new_ticket" if is_new_ticket else "ticket_updated")
+
+
+def sync_cursor(conversation: List[dict]) -> Dict[str, Any]:
+    return {
+        "seq": len(conversation),
+        "etag": tm.message_etag(conversation[-1] if conversation else None),
+    }
+
 
-    await emit_ticket_snapshot(payload.ticket_id, event="new_ticket" if is_new_ticket else "ticket_updated")
-    return {"success": True, "ticket_id": payload.ticket_id}
+@app.post("/api/internal/sync_ticket")
+async def sync_ticket(payload: SyncTicketPayload, x_sync_secret: str | None = Header(default=None)):
+    verify_sync_secret(x_sync_secret)
+    existing_conversation = tm.load_conversation(payload.ticket_id)
+    existing_meta = tm.load_ticket_meta(payload.ticket_id)
+    is_new_ticket = not existing_conversation and not existing_meta
+
+    tm.save_conversation(payload.ticket_id, payload.messages)
+    enriched_meta = enrich_sync_meta(payload.meta or {}, payload.messages)
+    tm.save_ticket_meta(payload.ticket_id, {**enriched_meta, "status": payload.status})
+    await finish_ticket_sync(payload.ticket_id, is_new_ticket)
+    return {"success": True, "ticket_id": payload.ticket_id, **sync_cursor(tm.load_conversation(payload.ticket_id))}
+
+
+@app.post("/api/internal/sync_ticket_delta")
+async def sync_ticket_delta(payload: SyncTicketDeltaPayload, x_sync_secret: str | None = Header(default=None)):
+    verify_sync_secret(x_sync_secret)
+    conversation = tm.load_conversation(payload.ticket_id)
+    existing_meta = tm.load_ticket_meta(payload.ticket_id)
+    server_seq = len(conversation)
+    base_entry = conversation[payload.base_seq - 1] if 0 < payload.base_seq <= server_seq else None
+    incoming = [tm.normalize_message(item) for item in payload.messages]
+
+    if payload.base_seq > server_seq or tm.message_etag(base_entry) != payload.base_etag:
+        raise HTTPException(status_code=409, detail={"resync": True, **sync_cursor(conversation)})
+    # The server may already hold part of this delta (a retried push, or a shared data dir).
+    already_applied = conversation[payload.base_seq:]
+    if already_applied != incoming[: len(already_applied)]:
+        raise HTTPException(status_code=409, detail={"resync": True, **sync_cursor(conversation)})
+
+    is_new_ticket = payload.base_seq == 0 and not conversation and not existing_meta
+    appended = tm.append_entries(payload.ticket_id, incoming[len(already_applied):])
+    conversation = [*conversation, *appended]
+    kept_meta = {key: value for key, value in existing_meta.items() if key not in payload.meta_removed}
+    enriched_meta = enrich_sync_meta({**kept_meta, **payload.meta_patch}, conversation)
+    patch = {key: value for key, value in enriched_meta.items() if existing_meta.get(key) != value}
+    removed = [key for key in existing_meta if key not in enriched_meta]
+    tm.save_ticket_meta(payload.ticket_id, {**patch, "status": payload.status}, removed=removed)
+    await finish_ticket_sync(payload.ticket_id, is_new_ticket)
+    return {"success": True, "ticket_id": payload.ticket_id, "applied": len(appended), **sync_cursor(conversation)}
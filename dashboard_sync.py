@@ -0,0 +1,284 @@
+import asyncio
+import logging
+import random
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import aiohttp
+
+import ticket_manager as tm
+
+logger = logging.getLogger("dashboard_sync")
+
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class SyncHTTPError(Exception):
+    def __init__(self, status: int, body: str = ""):
+        super().__init__(f"dashboard responded with HTTP {status}")
+        self.status = status
+        self.body = body
+
+
+class SyncCursor:
+    __slots__ = ("seq", "etag", "meta", "status")
+
+    def __init__(self, seq: int, etag: str, meta: Dict[str, Any], status: str):
+        self.seq = seq
+        self.etag = etag
+        self.meta = meta
+        self.status = status
+
+
+class DashboardSyncQueue:
+    # Pushes ticket snapshots to the dashboard off the bot's hot path. Requests for
+    # the same ticket inside the coalescing window collapse into a single push.
+    def __init__(
+        self,
+        base_url: str,
+        build_payload: Callable[[str, Optional[int]], Dict[str, Any]],
+        *,
+        secret: str = "",
+        coalesce_window: float = 0.75,
+        workers: int = 2,
+        max_attempts: int = 5,
+        timeout: float = 8.0,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 15.0,
+        delta: bool = True,
+        max_cursors: int = 2048,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.build_payload = build_payload
+        self.secret = secret
+        self.coalesce_window = coalesce_window
+        self.worker_count = max(1, workers)
+        self.max_attempts = max(1, max_attempts)
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.delta = delta
+        self.max_cursors = max(1, max_cursors)
+
+        self._pending: Dict[str, float] = {}
+        self._inflight: Set[str] = set()
+        self._deferred: Set[str] = set()
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._cursors: "OrderedDict[str, SyncCursor]" = OrderedDict()
+        self._counters = {
+            "requested": 0,
+            "coalesced": 0,
+            "sent": 0,
+            "failed": 0,
+            "retries": 0,
+            "full_syncs": 0,
+            "delta_syncs": 0,
+            "resyncs": 0,
+        }
+        self._latencies: List[float] = []
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.base_url)
+
+    def request(self, ticket_id: int | str):
+        if not self.enabled:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            logger.debug("No running event loop; skipping dashboard sync for %s", ticket_id)
+            return
+        self._ensure_started(loop)
+        key = str(ticket_id)
+        self._counters["requested"] += 1
+        if key in self._pending:
+            self._counters["coalesced"] += 1
+            return
+        self._pending[key] = time.monotonic()
+        self._queue.put_nowait(key)
+
+    def _ensure_started(self, loop: asyncio.AbstractEventLoop):
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self._workers = [task for task in self._workers if not task.done()]
+        while len(self._workers) < self.worker_count:
+            self._workers.append(loop.create_task(self._worker(), name="dashboard-sync"))
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.worker_count * 2, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def _worker(self):
+        while True:
+            ticket_id = await self._queue.get()
+            try:
+                requested_at = self._pending.get(ticket_id, time.monotonic())
+                delay = requested_at + self.coalesce_window - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                if ticket_id in self._inflight:
+                    # Pushes for one ticket never overlap; the running push re-queues this one.
+                    self._deferred.add(ticket_id)
+                    continue
+                # Requests arriving after this point describe newer state and queue a fresh push.
+                self._pending.pop(ticket_id, None)
+                self._inflight.add(ticket_id)
+                try:
+                    delivered = await self._deliver(ticket_id)
+                finally:
+                    self._inflight.discard(ticket_id)
+                    if ticket_id in self._deferred:
+                        self._deferred.discard(ticket_id)
+                        self._queue.put_nowait(ticket_id)
+                if delivered:
+                    self._record_latency(time.monotonic() - requested_at)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.exception("Dashboard sync worker error for %s: %s", ticket_id, exc)
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, ticket_id: str) -> bool:
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                await self._push(ticket_id)
+                self._counters["sent"] += 1
+                return True
+            except SyncHTTPError as exc:
+                if exc.status not in RETRYABLE_STATUSES:
+                    logger.error("Ticket sync for %s rejected: %s %s", ticket_id, exc, exc.body[:200])
+                    break
+                error: Exception = exc
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                error = exc
+            if attempt < self.max_attempts:
+                self._counters["retries"] += 1
+                backoff = min(self.backoff_cap, self.backoff_base * (2 ** (attempt - 1)))
+                logger.warning("Ticket sync for %s failed (%s); retry %s in %.1fs", ticket_id, error, attempt, backoff)
+                await asyncio.sleep(backoff * (0.5 + random.random() / 2))
+            else:
+                logger.error("Ticket sync for %s failed after %s attempts: %s", ticket_id, attempt, error)
+        self._counters["failed"] += 1
+        return False
+
+    async def _post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        headers = {"Content-Type": "application/json"}
+        if self.secret:
+            headers["X-Sync-Secret"] = self.secret
+        session = await self._get_session()
+        async with session.post(f"{self.base_url}{path}", json=payload, headers=headers) as response:
+            if response.status >= 400:
+                raise SyncHTTPError(response.status, await response.text())
+            return await response.json(content_type=None)
+
+    async def _load(self, ticket_id: str, since: Optional[int]):
+        # build_payload reads the ticket from disk, so keep it off the event loop. With
+        # `since`, it may return only the messages from position since - 1 onwards,
+        # marking the window with "start" and "total".
+        payload = await asyncio.to_thread(self.build_payload, ticket_id, since)
+        messages = payload.get("messages") or []
+        start = payload.get("start", 0)
+        return payload, messages, start, payload.get("total", start + len(messages))
+
+    async def _push(self, ticket_id: str):
+        cursor = self._cursors.get(ticket_id)
+        since = cursor.seq if self.delta and cursor is not None else None
+        payload, messages, start, total = await self._load(ticket_id, since)
+        meta = payload.get("meta") or {}
+
+        if since is not None and cursor.seq <= total and start <= max(cursor.seq - 1, 0):
+            base_entry = messages[cursor.seq - 1 - start] if cursor.seq else None
+            if tm.message_etag(base_entry) == cursor.etag:
+                delta = {
+                    "ticket_id": payload["ticket_id"],
+                    "status": payload.get("status") or "OPEN",
+                    "base_seq": cursor.seq,
+                    "base_etag": cursor.etag,
+                    "messages": messages[cursor.seq - start:],
+                    "meta_patch": {key: value for key, value in meta.items() if cursor.meta.get(key) != value},
+                    "meta_removed": sorted(key for key in cursor.meta if key not in meta),
+                }
+                if (
+                    not delta["messages"]
+                    and not delta["meta_patch"]
+                    and not delta["meta_removed"]
+                    and delta["status"] == cursor.status
+                ):
+                    return
+                try:
+                    await self._post("/api/internal/sync_ticket_delta", delta)
+                    self._counters["delta_syncs"] += 1
+                    self._remember(ticket_id, total, messages, meta, delta["status"])
+                    return
+                except SyncHTTPError as exc:
+                    if exc.status not in {404, 409}:
+                        raise
+                    self._counters["resyncs"] += 1
+                    logger.info("Dashboard asked for a full resync of ticket %s", ticket_id)
+
+        if start or "total" in payload:
+            payload, messages, start, total = await self._load(ticket_id, None)
+            meta = payload.get("meta") or {}
+        await self._post("/api/internal/sync_ticket", payload)
+        self._counters["full_syncs"] += 1
+        self._remember(ticket_id, total, messages, meta, payload.get("status") or "OPEN")
+
+    def _remember(self, ticket_id: str, seq: int, messages: List[Dict[str, Any]], meta: Dict[str, Any], status: str):
+        # `messages` ends at position `seq`; only its last entry is needed for the etag.
+        self._cursors[ticket_id] = SyncCursor(
+            seq,
+            tm.message_etag(messages[-1] if messages else None),
+            dict(meta),
+            status,
+        )
+        self._cursors.move_to_end(ticket_id)
+        while len(self._cursors) > self.max_cursors:
+            self._cursors.popitem(last=False)
+
+    def forget(self, ticket_id: int | str):
+        self._cursors.pop(str(ticket_id), None)
+
+    def _record_latency(self, seconds: float):
+        self._latencies.append(seconds * 1000)
+        if len(self._latencies) > 500:
+            del self._latencies[:-500]
+
+    def metrics(self) -> Dict[str, Any]:
+        latencies = sorted(self._latencies)
+        return {
+            **self._counters,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "pending_tickets": len(self._pending),
+            "latency_ms_avg": round(sum(latencies) / len(latencies), 1) if latencies else 0.0,
+            "latency_ms_p95": round(latencies[int(len(latencies) * 0.95) - 1], 1) if latencies else 0.0,
+            "latency_ms_max": round(latencies[-1], 1) if latencies else 0.0,
+        }
+
+    async def drain(self):
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self, drain_timeout: float = 0.0):
+        # With a drain_timeout, queued pushes (including ones still inside their
+        # coalescing window) are delivered before the workers are stopped.
+        if drain_timeout > 0 and self._workers:
+            try:
+                await asyncio.wait_for(self.drain(), timeout=drain_timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Dropping %s queued dashboard syncs at shutdown", len(self._pending))
+        for task in self._workers:
+            task.cancel()
+        if self._workers:
+            await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
@@ -0,0 +1,139 @@
+import asyncio
+import io
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; without it images are sent as-is.
+    Image = None
+    ImageOps = None
+
+logger = logging.getLogger("image_preprocess")
+
+PREPROCESS_ENABLED = os.getenv("IMAGE_PREPROCESS", "on").strip().lower() not in {"0", "off", "false", "no"}
+MAX_EDGE = int(os.getenv("IMAGE_MAX_EDGE", "1600"))
+OUTPUT_FORMAT = os.getenv("IMAGE_FORMAT", "webp").strip().lower()
+QUALITY = int(os.getenv("IMAGE_QUALITY", "80"))
+WORKERS = int(os.getenv("IMAGE_PREPROCESS_WORKERS", "2"))
+
+_MIME_TYPES = {"jpeg": "image/jpeg", "webp": "image/webp"}
+# The bot already runs threads (fsync batching, aiohttp, discord.py) when the pool
+# starts, and a forked child can inherit one of their locks mid-acquire.
+_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def shrink_image(data: bytes, max_edge: int, output_format: str, quality: int) -> Tuple[bytes, str]:
+    # Runs in a worker process: decode, apply EXIF rotation, downscale and re-encode
+    # without any metadata. Returns the original bytes when that would not be smaller.
+    with Image.open(io.BytesIO(data)) as source:
+        original_mime = Image.MIME.get(source.format or "", "image/png")
+        image = ImageOps.exif_transpose(source)
+        image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+        if output_format == "jpeg" and image.mode not in {"RGB", "L"}:
+            image = image.convert("RGB")
+        elif image.mode not in {"RGB", "RGBA", "L"}:
+            image = image.convert("RGBA")
+        buffer = io.BytesIO()
+        image.save(buffer, format=output_format.upper(), quality=quality, optimize=True)
+    encoded = buffer.getvalue()
+    if len(encoded) >= len(data):
+        return data, original_mime
+    return encoded, _MIME_TYPES[output_format]
+
+
+class ImagePreprocessor:
+    # Shrinks screenshots before they are uploaded to Gemini. Decoding and
+    # re-encoding is CPU-bound, so it runs in a process pool off the bot loop.
+    def __init__(
+        self,
+        *,
+        enabled: bool = PREPROCESS_ENABLED,
+        max_edge: int = MAX_EDGE,
+        output_format: str = OUTPUT_FORMAT,
+        quality: int = QUALITY,
+        workers: int = WORKERS,
+    ):
+        if output_format not in _MIME_TYPES:
+            raise ValueError(f"Unsupported IMAGE_FORMAT `{output_format}`")
+        self.enabled = enabled and Image is not None
+        if enabled and Image is None:
+            logger.info("Pillow is not installed; attachment images are sent without preprocessing.")
+        self.max_edge = max_edge
+        self.output_format = output_format
+        self.quality = quality
+        self.workers = max(1, workers)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._counters = {"images": 0, "shrunk": 0, "failed": 0, "bytes_in": 0, "bytes_out": 0}
+        self._timings: Dict[str, List[float]] = {"preprocess_ms": [], "gemini_ms_raw": [], "gemini_ms_shrunk": []}
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context(_START_METHOD)
+            )
+        return self._pool
+
+    def _record(self, name: str, milliseconds: float):
+        values = self._timings[name]
+        values.append(milliseconds)
+        if len(values) > 500:
+            del values[:-500]
+
+    def _account(self, part: Dict[str, Any], result: Optional[Tuple[bytes, str]]) -> Dict[str, Any]:
+        self._counters["images"] += 1
+        self._counters["bytes_in"] += len(part["data"])
+        if result is None:
+            self._counters["failed"] += 1
+            self._counters["bytes_out"] += len(part["data"])
+            return part
+        data, mime_type = result
+        self._counters["bytes_out"] += len(data)
+        if len(data) < len(part["data"]):
+            self._counters["shrunk"] += 1
+        return {"mime_type": mime_type, "data": data}
+
+    async def prepare_async(self, parts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not self.enabled:
+            return parts
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        futures = [
+            loop.run_in_executor(
+                self._executor(), shrink_image, part["data"], self.max_edge, self.output_format, self.quality
+            )
+            for part in parts
+        ]
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        prepared = []
+        for part, result in zip(parts, results):
+            if isinstance(result, BaseException):
+                logger.warning("Image preprocessing failed, sending original: %s", result)
+                result = None
+            prepared.append(self._account(part, result))
+        self._record("preprocess_ms", (time.perf_counter() - started) * 1000)
+        return prepared
+
+    def record_call(self, milliseconds: float, shrunk: bool):
+        self._record("gemini_ms_shrunk" if shrunk else "gemini_ms_raw", milliseconds)
+
+    def stats(self) -> Dict[str, Any]:
+        averages = {
+            f"{name}_avg": round(sum(values) / len(values), 1) if values else 0.0
+            for name, values in self._timings.items()
+        }
+        return {
+            **self._counters,
+            "enabled": self.enabled,
+            "bytes_saved": self._counters["bytes_in"] - self._counters["bytes_out"],
+            **averages,
+        }
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
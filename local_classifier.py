@@ -0,0 +1,181 @@
+import argparse
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import ticket_manager as tm
+
+MODEL_PATH = Path(os.getenv("LOCAL_CLASSIFIER_PATH", str(tm.DATA_DIR / "local_classifier.json")))
+THRESHOLD = float(os.getenv("LOCAL_CLASSIFIER_THRESHOLD", "0.85"))
+MODEL_VERSION = 1
+ESCALATE_LABEL = "needs_admin"
+# metadata.source of replies answered locally; never used as training labels.
+LOCAL_SOURCE = "local"
+TEMPERATURE = 0.1
+MAX_TERMS_PER_LABEL = 400
+
+_TOKEN_RE = re.compile(r"[a-z0-9$]+")
+
+
+def features(text: str) -> Counter:
+    tokens = _TOKEN_RE.findall((text or "").lower())
+    counts = Counter(tokens)
+    counts.update(f"{left} {right}" for left, right in zip(tokens, tokens[1:]))
+    return counts
+
+
+def _normalize(vector: Dict[str, float]) -> Dict[str, float]:
+    norm = math.sqrt(sum(value * value for value in vector.values()))
+    if not norm:
+        return {}
+    return {term: value / norm for term, value in vector.items()}
+
+
+def training_examples(conversation: List[Dict[str, Any]]) -> Iterable[Tuple[str, str]]:
+    # Pairs the user text since the previous bot turn with the label Gemini gave it.
+    # Only AI replies carry a confidence, which keeps template replies out of the data,
+    # and the classifier's own answers are skipped so it never trains on itself.
+    pending: List[str] = []
+    for entry in conversation:
+        role = entry.get("role")
+        if role == "user":
+            if entry.get("text"):
+                pending.append(entry["text"])
+            continue
+        if role != "assistant" or not pending:
+            continue
+        metadata = entry.get("metadata") or {}
+        if metadata.get("source") == LOCAL_SOURCE:
+            pending = []
+            continue
+        if metadata.get("status") == "ESCALATED":
+            yield " ".join(pending), ESCALATE_LABEL
+        elif entry.get("confidence") is not None and entry.get("intent") and metadata.get("category"):
+            yield " ".join(pending), f"{entry['intent']}|{metadata['category']}"
+        pending = []
+
+
+def train(examples: Iterable[Tuple[str, str]], min_examples: int = 5) -> Dict[str, Any]:
+    documents = [(features(text), label) for text, label in examples]
+    label_counts = Counter(label for _, label in documents)
+    documents = [(vector, label) for vector, label in documents if vector and label_counts[label] >= min_examples]
+    document_frequency: Counter = Counter()
+    for vector, _ in documents:
+        document_frequency.update(vector.keys())
+    total = len(documents)
+    idf = {term: math.log((1 + total) / (1 + count)) + 1 for term, count in document_frequency.items()}
+
+    sums: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    for vector, label in documents:
+        weighted = _normalize({term: count * idf[term] for term, count in vector.items()})
+        for term, value in weighted.items():
+            sums[label][term] += value
+    centroids = {}
+    for label, vector in sums.items():
+        top = sorted(vector.items(), key=lambda item: item[1], reverse=True)[:MAX_TERMS_PER_LABEL]
+        centroids[label] = _normalize(dict(top))
+    kept_terms = {term for vector in centroids.values() for term in vector}
+    return {
+        "version": MODEL_VERSION,
+        "trained_at": tm.utc_timestamp(),
+        "examples": total,
+        "labels": {label: label_counts[label] for label in centroids},
+        "idf": {term: round(value, 4) for term, value in idf.items() if term in kept_terms},
+        "centroids": {label: {term: round(value, 5) for term, value in vector.items()} for label, vector in centroids.items()},
+    }
+
+
+class LocalClassifier:
+    # TF-IDF nearest-centroid classifier over intent|category labels. Small enough
+    # to run on every message in-process; low-confidence predictions go to Gemini.
+    def __init__(self, model: Optional[Dict[str, Any]] = None, threshold: float = THRESHOLD):
+        model = model or {}
+        self.threshold = threshold
+        self.idf: Dict[str, float] = model.get("idf") or {}
+        self.centroids: Dict[str, Dict[str, float]] = model.get("centroids") or {}
+        self.trained_at = model.get("trained_at")
+        self._counters = {"predictions": 0, "answered": 0, "low_confidence": 0, "deferred": 0}
+
+    @classmethod
+    def load(cls, path: Path = MODEL_PATH, threshold: float = THRESHOLD) -> "LocalClassifier":
+        model = tm._load_json(Path(path), {})
+        if model and model.get("version") != MODEL_VERSION:
+            model = {}
+        return cls(model, threshold)
+
+    @property
+    def ready(self) -> bool:
+        return len(self.centroids) >= 2
+
+    def predict(self, text: str) -> Tuple[Optional[str], float]:
+        vector = _normalize({term: count * self.idf[term] for term, count in features(text).items() if term in self.idf})
+        if not vector or not self.ready:
+            return None, 0.0
+        scores = {
+            label: sum(value * centroid.get(term, 0.0) for term, value in vector.items())
+            for label, centroid in self.centroids.items()
+        }
+        best_label = max(scores, key=scores.get)
+        peak = scores[best_label]
+        total = sum(math.exp((score - peak) / TEMPERATURE) for score in scores.values())
+        return best_label, 1.0 / total
+
+    def classify(self, text: str) -> Optional[Dict[str, Any]]:
+        # Returns {"intent", "category", "confidence"} when the local model is confident enough to skip Gemini.
+        if not self.ready:
+            return None
+        self._counters["predictions"] += 1
+        label, confidence = self.predict(text)
+        if label is None or confidence < self.threshold:
+            self._counters["low_confidence"] += 1
+            return None
+        if label == ESCALATE_LABEL:
+            self._counters["deferred"] += 1
+            return None
+        intent, _, category = label.partition("|")
+        return {"intent": intent, "category": category, "confidence": round(confidence, 3), "source": LOCAL_SOURCE}
+
+    def record_answered(self):
+        self._counters["answered"] += 1
+
+    def record_deferred(self):
+        self._counters["deferred"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._counters,
+            "gemini_calls_avoided": self._counters["answered"],
+            "labels": len(self.centroids),
+            "threshold": self.threshold,
+            "trained_at": self.trained_at or "never",
+        }
+
+
+def train_from_tickets(min_examples: int = 5) -> Dict[str, Any]:
+    examples: List[Tuple[str, str]] = []
+    for ticket_id in tm.list_ticket_ids():
+        examples.extend(training_examples(tm.load_conversation(ticket_id)))
+    return train(examples, min_examples=min_examples)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Local message classifier")
+    commands = parser.add_subparsers(dest="command", required=True)
+    train_parser = commands.add_parser("train", help="Train from stored conversations labelled by Gemini")
+    train_parser.add_argument("--output", type=Path, default=MODEL_PATH)
+    train_parser.add_argument("--min-examples", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.command == "train":
+        model = train_from_tickets(args.min_examples)
+        tm._save_json(args.output, model, compact=True)
+        print(json.dumps({"output": str(args.output), "examples": model["examples"], "labels": model["labels"]}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
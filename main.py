@@ -4,27 +4,34 @@ import json
 import logging
 import os
 import re
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 import discord
-import requests
 from discord import app_commands
 from discord.ext import commands
 from dotenv import load_dotenv
 
+import text_signals
 import ticket_manager as tm
+from attachment_downloader import AttachmentDownloader
+from dashboard_sync import DashboardSyncQueue
 from keep_alive import keep_alive
+from local_classifier import LocalClassifier
+from ticket_model import ProofSignals, TicketState
+from ticket_worker import TicketRegistry, TicketTurnQueue, Turn
 
 if os.getenv("DISABLE_KEEP_ALIVE") != "1":
     keep_alive()
 
 try:
-    from ai_helper import analyze_attachments, ask_ai
+    from ai_helper import ai_stats, analyze_attachments_async, ask_ai_async, close_ai
 
     AI_AVAILABLE = True
 except Exception:
-    ask_ai = None
-    analyze_attachments = None
+    ask_ai_async = None
+    close_ai = None
+    analyze_attachments_async = None
+    ai_stats = None
     AI_AVAILABLE = False
 
 load_dotenv()
@@ -91,6 +98,13 @@ DISCORD_TOKEN = os.getenv("DISCORD_BOT_TOKEN")
 ADMIN_ROLE_NAME = os.getenv("ADMIN_ROLE_NAME", "Admin - Ticket Support")
 DASHBOARD_SYNC_URL = os.getenv("DASHBOARD_SYNC_URL", "").rstrip("/")
 SYNC_SECRET = os.getenv("SYNC_SECRET", "")
+SYNC_COALESCE_SECONDS = float(os.getenv("DASHBOARD_SYNC_COALESCE_SECONDS", "0.75"))
+SYNC_DRAIN_SECONDS = float(os.getenv("DASHBOARD_SYNC_DRAIN_SECONDS", "10"))
+SYNC_DELTA_LIMIT = int(os.getenv("DASHBOARD_SYNC_DELTA_LIMIT", "200"))
+TICKET_DEBOUNCE_SECONDS = float(os.getenv("TICKET_DEBOUNCE_SECONDS", "1.5"))
+TICKET_DEBOUNCE_MAX_SECONDS = float(os.getenv("TICKET_DEBOUNCE_MAX_SECONDS", "6"))
+TICKET_STATE_CACHE_SIZE = int(os.getenv("TICKET_STATE_CACHE_SIZE", "1024"))
+TICKET_STATE_IDLE_SECONDS = float(os.getenv("TICKET_STATE_IDLE_SECONDS", "1800"))
 
 FLOW_REPLY_TEMPLATES = {
     "gw": {
@@ -129,26 +143,7 @@ If the user is unclear, ask one smart clarifying question instead of guessing.
 Escalate only when human verification, payout approval, or policy-sensitive review is required.
 """.strip()
 
-CATEGORY_MAP = {
-    "50bonus": ["50$", "50 usd", "50 bonus", "50 free", "50free", "50usd", "50 bonus claim"],
-    "deposit": ["deposit", "deposit bonus", "reload", "reload bonus", "claim deposit"],
-    "gw": [
-        "win gw",
-        "won gw",
-        "win giveaway",
-        "won giveaway",
-        "won the gw",
-        "win the gw",
-        "win giveaways",
-        "won giveaways",
-        "i won",
-        "i won gw",
-        "i won the giveaway",
-        "i won giveaway",
-    ],
-    "lb": ["leaderboard", "lb", "top wager", "leader board"],
-    "raffle": ["raffle", "raffles"],
-}
+CATEGORY_MAP = text_signals.CATEGORY_MAP
 
 USERNAME_PATTERNS = [
     r"username[:\s]*([A-Za-z0-9_\-\.]+)",
@@ -170,16 +165,30 @@ VALID_PREFIXES = (
     "gw-",
 )
 
+
+class TicketBot(commands.Bot):
+    async def close(self):
+        # Runs on the bot's loop before it stops: deliver queued dashboard pushes
+        # and release background resources once Discord stops sending events.
+        try:
+            await super().close()
+        finally:
+            await dashboard_sync.close(drain_timeout=SYNC_DRAIN_SECONDS)
+            await attachment_downloader.close()
+            if close_ai:
+                close_ai()
+
+
 intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
 
-bot = commands.Bot(command_prefix="!t ", intents=intents)
+bot = TicketBot(command_prefix="!t ", intents=intents)
 tree = bot.tree
 
 paused_channels = tm.load_paused_channels()
-conversation_locks: Dict[int, asyncio.Lock] = {}
-ticket_state: Dict[int, Dict[str, Any]] = {}
+local_classifier = LocalClassifier.load()
+attachment_downloader = AttachmentDownloader()
 
 
 def validate_rules_config(payload: Dict[str, Any]) -> Dict[str, Any]:
@@ -294,9 +303,7 @@ except Exception as exc:
 
 
 def get_lock(channel_id: int) -> asyncio.Lock:
-    if channel_id not in conversation_locks:
-        conversation_locks[channel_id] = asyncio.Lock()
-    return conversation_locks[channel_id]
+    return ticket_state.lock(channel_id)
 
 
 def admin_mention(guild: Optional[discord.Guild]) -> str:
@@ -307,22 +314,11 @@ def admin_mention(guild: Optional[discord.Guild]) -> str:
 
 
 def detect_category(text: str) -> Optional[str]:
-    lowered = (text or "").lower()
-    for category, keys in CATEGORY_MAP.items():
-        if any(key in lowered for key in keys):
-            return category
-    return None
+    return text_signals.detect_category(text)
 
 
 def detect_intent(text: str) -> str:
-    lowered = (text or "").lower()
-    if any(word in lowered for word in ["issue", "problem", "not working", "angry", "refund", "complaint"]):
-        return "complaint"
-    if any(word in lowered for word in ["hi", "hii", "hiii", "hello", "helloo", "hey", "yo", "bro"]):
-        return "casual"
-    if any(word in lowered for word in ["help", "claim", "payout", "bonus", "deposit", "won"]):
-        return "support"
-    return "query"
+    return text_signals.detect_intent(text)
 
 
 def is_acknowledgement(text: str) -> bool:
@@ -345,18 +341,7 @@ def is_acknowledgement(text: str) -> bool:
 
 
 def mentions_existing_proof(text: str) -> bool:
-    lowered = (text or "").lower()
-    return any(
-        phrase in lowered
-        for phrase in [
-            "already attached",
-            "i attached",
-            "sent screenshot",
-            "i sent proof",
-            "already sent",
-            "uploaded already",
-        ]
-    )
+    return text_signals.mentions_existing_proof(text)
 
 
 def strip_bot_mentions(message: discord.Message, text: str) -> str:
@@ -381,16 +366,7 @@ def extract_username_from_text(text: str) -> Optional[str]:
 
 
 def infer_text_proof_signals(text: str, flow: Optional[str]) -> Dict[str, Any]:
-    lowered = (text or "").lower()
-    return {
-        "winner_detected": flow == "gw" and any(word in lowered for word in ["winner", "won", "giveaway", "gw win"]),
-        "deposit_detected": flow == "deposit" and any(word in lowered for word in ["deposit", "payment"]),
-        "kyc_detected": flow == "50bonus" and "kyc" in lowered,
-        "code_proof_detected": any(word in lowered for word in ["donde code", "code proof", "used code donde", "code donde"]),
-        "youtube_proof_detected": any(word in lowered for word in ["youtube", "yt proof", "yt comment", "comment proof"]),
-        "supporting_proof_detected": any(word in lowered for word in ["supporting proof", "extra proof"]),
-        "platform_hint": detect_giveaway_platform(text) or "unknown",
-    }
+    return text_signals.text_proof_signals(text, flow)
 
 
 def flow_rule(flow: Optional[str]) -> Dict[str, Any]:
@@ -499,69 +475,25 @@ def already_tagged(name: str) -> bool:
     )
 
 
-def get_ticket_state(channel_id: int) -> Dict[str, Any]:
-    return ticket_state.setdefault(
-        channel_id,
-        {
-            "flow": None,
-            "guild_id": None,
-            "gw_platform": None,
-            "username": None,
-            "code": None,
-            "attachments_total": 0,
-            "escalated": False,
-            "asked_first_ever": False,
-            "last_assistant": None,
-            "intent": "query",
-            "summary": "",
-            "proof_ready": False,
-            "proof_notes": "",
-            "proof_type": None,
-            "analysis_confidence": 0.0,
-            "gw_required_attachments": 0,
-            "proof_signals": {},
-            "checklist": {},
-        },
-    )
+def new_ticket_state() -> TicketState:
+    return TicketState()
 
 
-def detect_giveaway_platform(text: str) -> Optional[str]:
-    lowered = (text or "").lower()
-    if any(word in lowered for word in ["twitter", "x.com", "x giveaway", "tweet", "retweet"]):
-        return "twitter"
-    if "discord" in lowered:
-        return "discord"
-    if "kick" in lowered:
-        return "kick"
-    return None
+def get_ticket_state(channel_id: int) -> TicketState:
+    return ticket_state.get(channel_id) or restore_ticket_state(channel_id)
 
 
-def merge_proof_signals(state: Dict[str, Any], incoming: Optional[Dict[str, Any]]) -> Dict[str, Any]:
-    signals = dict(state.get("proof_signals") or {})
-    if not incoming:
-        state["proof_signals"] = signals
-        return signals
-
-    truthy_keys = {
-        "winner_detected",
-        "deposit_detected",
-        "kyc_detected",
-        "code_proof_detected",
-        "youtube_proof_detected",
-        "supporting_proof_detected",
-        "has_relevant_proof",
-    }
-    numeric_keys = {"confidence"}
+def detect_giveaway_platform(text: str) -> Optional[str]:
+    return text_signals.detect_giveaway_platform(text)
 
-    for key, value in incoming.items():
-        if key in truthy_keys:
-            signals[key] = bool(signals.get(key)) or bool(value)
-        elif key in numeric_keys:
-            signals[key] = max(float(signals.get(key) or 0.0), float(value or 0.0))
-        elif value and not signals.get(key):
-            signals[key] = value
 
-    state["proof_signals"] = signals
+def merge_proof_signals(state: Dict[str, Any], incoming: Optional[Dict[str, Any]]) -> ProofSignals:
+    # Merges in place; plain dict states get their signals upgraded on first use.
+    signals = state.get("proof_signals")
+    if not isinstance(signals, ProofSignals):
+        signals = state["proof_signals"] = ProofSignals.from_dict(signals)
+    if incoming:
+        signals.merge(incoming)
     return signals
 
 
@@ -583,7 +515,7 @@ def requirement_complete(requirement_key: str, signals: Dict[str, Any]) -> bool:
 
 def build_flow_checklist(state: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
     flow = state.get("flow")
-    signals = merge_proof_signals(state, state.get("proof_signals") or {})
+    signals = merge_proof_signals(state, None)
     username = bool(state.get("username"))
     platform = state.get("gw_platform")
     guild_id = state.get("guild_id")
@@ -654,57 +586,112 @@ def checklist_status(state: Dict[str, Any]) -> Dict[str, Any]:
     return {"items": items, "missing": missing, "complete": complete, "blocked": blocked}
 
 
-def refresh_state_from_history(channel_id: int) -> Dict[str, Any]:
-    state = get_ticket_state(channel_id)
-    conversation = tm.load_conversation(channel_id)
-    attachments_total = 0
-
-    for entry in conversation[-20:]:
-        text = entry.get("text", "")
-        attachments_total += len(entry.get("attachments") or [])
-        category = detect_category(text)
-        if category:
-            state["flow"] = category
-        platform = detect_giveaway_platform(text)
-        if platform:
-            state["gw_platform"] = platform
-        username = extract_username_from_text(text)
-        if username:
-            state["username"] = username
-        metadata = entry.get("metadata") or {}
-        extracted_username = metadata.get("extracted_username")
-        if extracted_username:
-            state["username"] = extracted_username
-        if metadata.get("proof_ready"):
-            state["proof_ready"] = True
-        if metadata.get("proof_type"):
-            state["proof_type"] = metadata.get("proof_type")
-        if metadata.get("proof_notes"):
-            state["proof_notes"] = metadata.get("proof_notes")
-        if metadata.get("analysis_confidence"):
-            state["analysis_confidence"] = metadata.get("analysis_confidence")
-        if metadata.get("gw_platform"):
-            state["gw_platform"] = metadata.get("gw_platform")
-        if metadata.get("gw_required_attachments"):
-            state["gw_required_attachments"] = metadata.get("gw_required_attachments")
-        if metadata.get("proof_signals"):
-            merge_proof_signals(state, metadata.get("proof_signals"))
-        if metadata.get("checklist"):
-            state["checklist"] = metadata.get("checklist")
-        if "donde" in text.lower():
-            state["code"] = "Donde"
-        if "first-ever" in text.lower():
-            state["asked_first_ever"] = True
-        if text.strip().lower() in {"yes", "yep", "yeah"} and state.get("flow") == "50bonus" and state.get("asked_first_ever"):
-            state["first_ever_confirmed"] = "yes"
-        if text.strip().lower() in {"no", "nope"} and state.get("flow") == "50bonus" and state.get("asked_first_ever"):
-            state["first_ever_confirmed"] = "no"
+# Bump when apply_history_entry changes so persisted checkpoints are rebuilt by a full replay.
+STATE_SCHEMA_VERSION = 2
+# Ticket state is derived from the most recent messages only, as it always has been.
+HISTORY_WINDOW = 20
+
+
+def apply_history_entry(state: TicketState, entry: Dict[str, Any]) -> TicketState:
+    text = entry.get("text", "")
+    lowered = text.lower()
+    category = detect_category(text)
+    if category:
+        state["flow"] = category
+    platform = detect_giveaway_platform(text)
+    if platform:
+        state["gw_platform"] = platform
+    username = extract_username_from_text(text)
+    if username:
+        state["username"] = username
+    metadata = entry.get("metadata") or {}
+    extracted_username = metadata.get("extracted_username")
+    if extracted_username:
+        state["username"] = extracted_username
+    if metadata.get("proof_ready"):
+        state["proof_ready"] = True
+    if metadata.get("proof_type"):
+        state["proof_type"] = metadata.get("proof_type")
+    if metadata.get("proof_notes"):
+        state["proof_notes"] = metadata.get("proof_notes")
+    if metadata.get("analysis_confidence"):
+        state["analysis_confidence"] = metadata.get("analysis_confidence")
+    if metadata.get("gw_platform"):
+        state["gw_platform"] = metadata.get("gw_platform")
+    if metadata.get("gw_required_attachments"):
+        state["gw_required_attachments"] = metadata.get("gw_required_attachments")
+    if metadata.get("proof_signals"):
+        merge_proof_signals(state, metadata.get("proof_signals"))
+    if metadata.get("checklist"):
+        state["checklist"] = metadata.get("checklist")
+    if text_signals.mentions(text, "donde"):
+        state["code"] = "Donde"
+    if text_signals.mentions(text, "first_ever"):
+        state["asked_first_ever"] = True
+    if lowered.strip() in {"yes", "yep", "yeah"} and state.get("flow") == "50bonus" and state.get("asked_first_ever"):
+        state["first_ever_confirmed"] = "yes"
+    if lowered.strip() in {"no", "nope"} and state.get("flow") == "50bonus" and state.get("asked_first_ever"):
+        state["first_ever_confirmed"] = "no"
+    return state
+
 
-    state["attachments_total"] = attachments_total
+def state_checkpoint(state: TicketState) -> Dict[str, Any]:
+    data = state.to_dict()
+    return {"seq": int(data.pop("history_seq") or 0), "schema": STATE_SCHEMA_VERSION, "state": data}
+
+
+def persist_ticket_state(ticket_id: int | str, state: TicketState):
+    tm.save_ticket_meta(ticket_id, {"state_checkpoint": state_checkpoint(state)})
+
+
+# Bounded: idle or closed tickets are checkpointed into their metadata and dropped,
+# then restored by restore_ticket_state on their next message.
+ticket_state = TicketRegistry(
+    persist_ticket_state,
+    max_tickets=TICKET_STATE_CACHE_SIZE,
+    idle_ttl=TICKET_STATE_IDLE_SECONDS,
+    in_use=lambda ticket_id: ticket_turns.active(ticket_id),
+)
+
+
+def restore_ticket_state(channel_id: int) -> TicketState:
+    checkpoint = tm.load_ticket_meta(channel_id).get("state_checkpoint") or {}
+    state = new_ticket_state()
+    if checkpoint.get("schema") == STATE_SCHEMA_VERSION and isinstance(checkpoint.get("state"), dict):
+        state.update(checkpoint["state"])
+        state.history_seq = int(checkpoint.get("seq") or 0)
+    ticket_state[channel_id] = state
+    return state
+
+
+def refresh_state_from_history(channel_id: int) -> TicketState:
+    # Applies the messages appended since the last checkpoint that fall inside the
+    # last HISTORY_WINDOW; without a usable checkpoint (cold start, schema bump) the
+    # whole window is replayed. attachments_total counts the window's attachments.
+    state = ticket_state.get(channel_id) or restore_ticket_state(channel_id)
+    window = tm.load_conversation_window(channel_id, limit=HISTORY_WINDOW)
+    total = window["total"]
+    applied = state.history_seq
+    if total < applied:
+        # The log was cleared or rewritten underneath us; rebuild from scratch.
+        state = ticket_state[channel_id] = new_ticket_state()
+        applied = 0
+
+    for entry in window["messages"][max(0, applied - window["start"]):]:
+        apply_history_entry(state, entry)
+    state["attachments_total"] = sum(len(entry.get("attachments") or []) for entry in window["messages"])
+    state.history_seq = total
     build_flow_checklist(state)
     return state
 
 
+def mark_history_applied(channel_id: int, state: TicketState, count: int = 1):
+    # on_message updates the state from the user's message itself; skip it in the next refresh
+    # unless something else was appended concurrently.
+    if tm.message_count(channel_id) == state.history_seq + count:
+        state.history_seq += count
+
+
 async def human_reply(
     channel: discord.TextChannel,
     content: str,
@@ -777,35 +764,35 @@ def build_admin_summary(user: discord.User, reason: str, username_text: str, pro
     return "\n".join(lines)
 
 
-def build_ticket_metadata(channel: discord.TextChannel, state: Dict[str, Any], message: discord.Message):
-    current_status = tm.load_status_map().get(str(channel.id))
+def build_ticket_metadata(channel: discord.TextChannel, state: TicketState, message: discord.Message):
+    current_status = tm.get_ticket_status(channel.id, None)
     proof_snapshot = proof_summary_snapshot(state)
-    tm.save_ticket_meta(
-        channel.id,
-        {
-            "channel_name": channel.name,
-            "user_id": getattr(message.author, "id", None),
-            "user_name": str(message.author),
-            "display_name": getattr(message.author, "display_name", str(message.author)),
-            "category": state.get("flow"),
-            "intent": state.get("intent"),
-            "username": state.get("username"),
-            "attachments_total": state.get("attachments_total", 0),
-            "proof_ready": state.get("proof_ready", False),
-            "proof_type": state.get("proof_type"),
-            "proof_notes": state.get("proof_notes"),
-            "analysis_confidence": state.get("analysis_confidence", 0.0),
-            "gw_platform": state.get("gw_platform"),
-            "gw_required_attachments": state.get("gw_required_attachments", 0),
-            "proof_signals": state.get("proof_signals", {}),
-            "checklist": state.get("checklist", {}),
-            "proof_summary": proof_snapshot,
-            "proof_health": proof_snapshot.get("health"),
-            "next_step": proof_snapshot.get("next_step"),
-            "first_ever_confirmed": state.get("first_ever_confirmed"),
-            "status": current_status or ("PAUSED" if channel.id in paused_channels else "OPEN"),
-        },
-    )
+    metadata = {
+        "channel_name": channel.name,
+        "user_id": getattr(message.author, "id", None),
+        "user_name": str(message.author),
+        "display_name": getattr(message.author, "display_name", str(message.author)),
+        "category": state.get("flow"),
+        "intent": state.get("intent"),
+        "username": state.get("username"),
+        "attachments_total": state.get("attachments_total", 0),
+        "proof_ready": state.get("proof_ready", False),
+        "proof_type": state.get("proof_type"),
+        "proof_notes": state.get("proof_notes"),
+        "analysis_confidence": state.get("analysis_confidence", 0.0),
+        "gw_platform": state.get("gw_platform"),
+        "gw_required_attachments": state.get("gw_required_attachments", 0),
+        "proof_signals": merge_proof_signals(state, None).to_dict(),
+        "checklist": state.get("checklist", {}),
+        "proof_summary": proof_snapshot,
+        "proof_health": proof_snapshot.get("health"),
+        "next_step": proof_snapshot.get("next_step"),
+        "first_ever_confirmed": state.get("first_ever_confirmed"),
+        "state_checkpoint": state_checkpoint(state),
+    }
+    if current_status is None:
+        metadata["status"] = "PAUSED" if channel.id in paused_channels else "OPEN"
+    tm.save_ticket_meta(channel.id, metadata)
 
 
 def ticket_auto_reply_enabled(channel_id: int) -> bool:
@@ -821,29 +808,30 @@ def assigned_staff_name(channel_id: int) -> Optional[str]:
     return assigned_to or None
 
 
-def sync_ticket_to_dashboard(ticket_id: int):
-    if not DASHBOARD_SYNC_URL:
-        return
+def build_sync_payload(ticket_id: int | str, since: Optional[int] = None) -> Dict[str, Any]:
+    payload = {
+        "ticket_id": str(ticket_id),
+        "status": tm.get_ticket_status(ticket_id),
+        "meta": tm.load_ticket_meta(ticket_id),
+    }
+    if since is not None:
+        # Read from the last delivered message (its etag anchors the delta) onwards.
+        window = tm.load_conversation_window(ticket_id, after=max(since - 2, -1), limit=SYNC_DELTA_LIMIT)
+        if not window["has_more_after"]:
+            return {**payload, "messages": window["messages"], "start": window["start"], "total": window["total"]}
+    return {**payload, "messages": tm.load_conversation(ticket_id)}
+
+
+dashboard_sync = DashboardSyncQueue(
+    DASHBOARD_SYNC_URL,
+    build_sync_payload,
+    secret=SYNC_SECRET,
+    coalesce_window=SYNC_COALESCE_SECONDS,
+)
 
-    try:
-        payload = {
-            "ticket_id": str(ticket_id),
-            "status": tm.load_status_map().get(str(ticket_id), "OPEN"),
-            "messages": tm.load_conversation(ticket_id),
-            "meta": tm.load_ticket_meta(ticket_id),
-        }
-        headers = {"Content-Type": "application/json"}
-        if SYNC_SECRET:
-            headers["X-Sync-Secret"] = SYNC_SECRET
-        response = requests.post(
-            f"{DASHBOARD_SYNC_URL}/api/internal/sync_ticket",
-            headers=headers,
-            json=payload,
-            timeout=8,
-        )
-        response.raise_for_status()
-    except Exception as exc:
-        logger.exception("Ticket sync failed: %s", exc)
+
+def sync_ticket_to_dashboard(ticket_id: int):
+    dashboard_sync.request(ticket_id)
 
 
 async def escalate_ticket(
@@ -968,6 +956,56 @@ def reply_template(flow: Optional[str], key: str = "fallback") -> str:
     )
 
 
+def leaderboard_answer() -> str:
+    stake_lb = KNOWLEDGE.get("leaderboards", {}).get("stake_leaderboard", {})
+    dd_lb = KNOWLEDGE.get("leaderboards", {}).get("dd_leaderboard", {})
+    return (
+        "There are two active leaderboard tracks each month.\n\n"
+        f"Stake leaderboard: {stake_lb.get('description', 'Monthly leaderboard')}\n"
+        f"{stake_lb.get('link', 'https://dondebonuses.com/leaderboard')}\n\n"
+        f"Donde leaderboard: {dd_lb.get('description', 'Monthly Donde leaderboard')}\n"
+        f"{dd_lb.get('link', 'https://dondebonuses.com/donde-dollar-leaderboard')}"
+    )
+
+
+def raffle_answer() -> str:
+    raffle = KNOWLEDGE.get("raffles", {}).get("25k_monthly", {})
+    return f"The current raffle flow is: {raffle.get('description', 'monthly raffle')}\n{raffle.get('link', '')}".strip()
+
+
+# Classifier labels the bot can answer from the knowledge base without Gemini.
+# Every other label is deferred: an opening template only routes, it does not answer.
+LOCAL_ANSWERS: Dict[str, Callable[[], str]] = {
+    "query|lb": leaderboard_answer,
+    "query|raffle": raffle_answer,
+}
+
+
+def local_decision(text: str, state: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    prediction = local_classifier.classify(text)
+    if prediction is None:
+        return None
+    answer = LOCAL_ANSWERS.get(f"{prediction['intent']}|{prediction['category']}")
+    if answer is None:
+        local_classifier.record_deferred()
+        return None
+    reply = answer()
+    if normalized_reply_text(reply) == normalized_reply_text(state.get("last_assistant") or ""):
+        # human_reply would drop a repeated template; let Gemini write something new.
+        local_classifier.record_deferred()
+        return None
+    local_classifier.record_answered()
+    return {
+        **prediction,
+        "tone": "professional",
+        "needs_admin": False,
+        "ask_clarifying_question": False,
+        "clarifying_question": "",
+        "summary": "",
+        "reply": reply,
+    }
+
+
 def polished_acknowledgement(state: Dict[str, Any]) -> str:
     flow = state.get("flow")
     checklist = checklist_status(state)
@@ -1102,7 +1140,7 @@ def proof_summary_snapshot(state: Dict[str, Any]) -> Dict[str, Any]:
 async def handle_known_flow(
     channel: discord.TextChannel,
     message: discord.Message,
-    state: Dict[str, Any],
+    state: TicketState,
     raw: str,
     lowered: str,
 ) -> bool:
@@ -1264,29 +1302,15 @@ async def handle_known_flow(
 
 
 async def answer_knowledge(channel: discord.TextChannel, lowered: str) -> bool:
-    if any(key in lowered for key in ["leaderboard", "top wager", "lb"]):
-        stake_lb = KNOWLEDGE.get("leaderboards", {}).get("stake_leaderboard", {})
-        dd_lb = KNOWLEDGE.get("leaderboards", {}).get("dd_leaderboard", {})
-        reply = (
-            "There are two active leaderboard tracks each month.\n\n"
-            f"Stake leaderboard: {stake_lb.get('description', 'Monthly leaderboard')}\n"
-            f"{stake_lb.get('link', 'https://dondebonuses.com/leaderboard')}\n\n"
-            f"Donde leaderboard: {dd_lb.get('description', 'Monthly Donde leaderboard')}\n"
-            f"{dd_lb.get('link', 'https://dondebonuses.com/donde-dollar-leaderboard')}"
-        )
-        await human_reply(channel, reply, intent="query")
+    if text_signals.mentions(lowered, "leaderboard"):
+        await human_reply(channel, leaderboard_answer(), intent="query")
         return True
 
-    if "raffle" in lowered:
-        raffle = KNOWLEDGE.get("raffles", {}).get("25k_monthly", {})
-        await human_reply(
-            channel,
-            f"The current raffle flow is: {raffle.get('description', 'monthly raffle')}\n{raffle.get('link', '')}".strip(),
-            intent="query",
-        )
+    if text_signals.mentions(lowered, "raffle"):
+        await human_reply(channel, raffle_answer(), intent="query")
         return True
 
-    if "giveaway" in lowered and "won" not in lowered:
+    if text_signals.mentions(lowered, "giveaway") and not text_signals.mentions(lowered, "won"):
         giveaways = KNOWLEDGE.get("giveaways", {})
         await human_reply(
             channel,
@@ -1353,6 +1377,34 @@ async def slash_status(interaction: discord.Interaction):
     await interaction.response.send_message(summary, ephemeral=True)
 
 
+@tree.command(name="syncstatus", description="Show dashboard sync queue metrics (admin only)")
+@app_commands.checks.has_permissions(manage_guild=True)
+async def slash_syncstatus(interaction: discord.Interaction):
+    if not dashboard_sync.enabled:
+        await interaction.response.send_message("Dashboard sync is disabled (DASHBOARD_SYNC_URL not set).", ephemeral=True)
+        return
+    metrics = dashboard_sync.metrics()
+    summary = "\n".join(f"{key}: {value}" for key, value in metrics.items())
+    await interaction.response.send_message(f"Dashboard sync\n{summary}", ephemeral=True)
+
+
+@tree.command(name="aistatus", description="Show Gemini limiter and AI cache metrics (admin only)")
+@app_commands.checks.has_permissions(manage_guild=True)
+async def slash_aistatus(interaction: discord.Interaction):
+    stats = {
+        "ticket_turns": ticket_turns.stats(),
+        "ticket_state": ticket_state.stats(),
+        "local_classifier": local_classifier.stats(),
+        "attachment_downloads": attachment_downloader.stats(),
+    }
+    if AI_AVAILABLE and ai_stats is not None:
+        stats.update(ai_stats())
+    sections = []
+    for name, metrics in stats.items():
+        sections.append(f"{name}\n" + "\n".join(f"{key}: {value}" for key, value in metrics.items()))
+    await interaction.response.send_message("\n\n".join(sections), ephemeral=True)
+
+
 @tree.command(name="reloadrules", description="Reload bot rules config (admin only)")
 @app_commands.checks.has_permissions(manage_guild=True)
 async def slash_reloadrules(interaction: discord.Interaction):
@@ -1408,6 +1460,314 @@ async def on_ready():
     logger.info("Bot online as %s", bot.user)
 
 
+def message_flow(raw: str, current_flow: Optional[str]) -> Optional[str]:
+    category = detect_category(raw)
+    if category:
+        return category
+    if text_signals.mentions(raw, "gw_hint"):
+        return "gw"
+    if "deposit" in raw.lower():
+        return "deposit"
+    return current_flow
+
+
+async def prepare_message(message: discord.Message, raw: str) -> Dict[str, Any]:
+    # Network-bound work for one message: runs as soon as it arrives, outside the
+    # ticket lock and concurrently with anything else the ticket is doing.
+    channel_id = message.channel.id
+    attachments = []
+    attachment_inputs = []
+    downloads = await attachment_downloader.fetch_all(
+        message.attachments,
+        lambda filename, data, sha256, content_type: tm.store_attachment(channel_id, filename, data, sha256, content_type),
+    )
+    for attachment, download in zip(message.attachments, downloads):
+        if download is None:
+            continue
+        attachments.append(
+            {
+                "filename": download.filename,
+                "url": attachment.url,
+                "proxy_url": getattr(attachment, "proxy_url", "") or "",
+                "local_url": f"/attachments/{channel_id}/{download.filename}",
+                "content_type": download.content_type,
+                "sha256": download.sha256,
+                "size": download.size,
+            }
+        )
+        attachment_inputs.append(download.analyzer_input())
+
+    analysis = None
+    if attachment_inputs and AI_AVAILABLE and analyze_attachments_async:
+        flow = message_flow(raw, refresh_state_from_history(channel_id).get("flow"))
+        try:
+            analysis = await analyze_attachments_async(flow or "general", raw, attachment_inputs)
+        except Exception as exc:
+            logger.exception("Attachment analysis failed: %s", exc)
+    return {"message": message, "raw": raw, "attachments": attachments, "analysis": analysis}
+
+
+def apply_attachment_analysis(state: TicketState, analysis: Dict[str, Any]) -> Dict[str, Any]:
+    state["proof_ready"] = bool(analysis.get("has_relevant_proof"))
+    state["proof_type"] = analysis.get("proof_type")
+    state["proof_notes"] = analysis.get("notes") or ""
+    state["analysis_confidence"] = float(analysis.get("confidence") or 0.0)
+    if analysis.get("username") and not state.get("username"):
+        state["username"] = analysis.get("username")
+    merge_proof_signals(
+        state,
+        {
+            "has_relevant_proof": analysis.get("has_relevant_proof"),
+            "winner_detected": analysis.get("winner_detected"),
+            "deposit_detected": analysis.get("deposit_detected"),
+            "kyc_detected": analysis.get("kyc_detected"),
+            "code_proof_detected": analysis.get("code_proof_detected"),
+            "youtube_proof_detected": analysis.get("youtube_proof_detected"),
+            "supporting_proof_detected": analysis.get("supporting_proof_detected"),
+            "platform_hint": analysis.get("platform_hint"),
+            "confidence": analysis.get("confidence"),
+            "visible_text": analysis.get("visible_text"),
+        },
+    )
+    if analysis.get("platform_hint") in {"discord", "twitter", "kick"} and not state.get("gw_platform"):
+        state["gw_platform"] = analysis.get("platform_hint")
+    return {
+        "proof_ready": state.get("proof_ready"),
+        "proof_type": state.get("proof_type"),
+        "proof_notes": state.get("proof_notes"),
+        "analysis_confidence": state.get("analysis_confidence"),
+        "extracted_username": analysis.get("username") or "",
+        "gw_platform": state.get("gw_platform"),
+        "gw_required_attachments": state.get("gw_required_attachments", 0),
+        "proof_signals": merge_proof_signals(state, None).to_dict(),
+        "visible_text": analysis.get("visible_text") or "",
+    }
+
+
+def record_user_message(channel: discord.TextChannel, prepared: Dict[str, Any], state: TicketState):
+    message = prepared["message"]
+    raw = prepared["raw"]
+    lowered = raw.lower()
+    attachments = prepared["attachments"]
+
+    intent = detect_intent(raw)
+    state["flow"] = message_flow(raw, state.get("flow"))
+    state["intent"] = intent
+    platform = detect_giveaway_platform(raw)
+    if platform:
+        state["gw_platform"] = platform
+        state["gw_required_attachments"] = 2 if platform == "kick" else 3
+
+    username = extract_username_from_text(raw)
+    if username:
+        state["username"] = username
+
+    if text_signals.mentions(raw, "donde"):
+        state["code"] = "Donde"
+    if state.get("flow") == "50bonus" and state.get("asked_first_ever"):
+        if lowered in {"yes", "yep", "yeah"}:
+            state["first_ever_confirmed"] = "yes"
+        elif lowered in {"no", "nope"}:
+            state["first_ever_confirmed"] = "no"
+
+    merge_proof_signals(state, infer_text_proof_signals(raw, state.get("flow")))
+
+    if attachments:
+        state["attachments_total"] = state.get("attachments_total", 0) + len(attachments)
+
+    attachment_metadata = {}
+    if prepared["analysis"]:
+        try:
+            attachment_metadata = apply_attachment_analysis(state, prepared["analysis"])
+        except Exception as exc:
+            logger.exception("Attachment analysis failed: %s", exc)
+
+    build_flow_checklist(state)
+
+    tm.append_message(
+        channel.id,
+        "user",
+        raw,
+        author=str(message.author),
+        attachments=attachments,
+        intent=intent,
+        metadata={"channel_name": channel.name, **attachment_metadata},
+    )
+    mark_history_applied(channel.id, state)
+
+
+async def reply_locally(
+    channel: discord.TextChannel,
+    message: discord.Message,
+    state: TicketState,
+    raw: str,
+    intent: str,
+    has_attachments: bool,
+) -> bool:
+    lowered = raw.lower()
+    if intent == "casual" and len(raw.split()) <= 4 and not has_attachments and not state.get("flow"):
+        await human_reply(
+            channel,
+            "Hey. Tell me what you need help with and I’ll guide you.",
+            intent=intent,
+        )
+        return True
+
+    if await answer_knowledge(channel, lowered):
+        return True
+
+    return await handle_known_flow(channel, message, state, raw, lowered)
+
+
+async def apply_ai_decision(
+    channel: discord.TextChannel,
+    message: discord.Message,
+    state: TicketState,
+    decision: Dict[str, Any],
+) -> bool:
+    state["intent"] = decision.get("intent") or state.get("intent")
+    state["flow"] = decision.get("category") or state.get("flow")
+    state["summary"] = decision.get("summary") or state.get("summary")
+    build_ticket_metadata(channel, state, message)
+    sync_ticket_to_dashboard(channel.id)
+
+    confidence = float(decision.get("confidence") or 0.0)
+
+    if confidence < 0.58 and not decision.get("needs_admin"):
+        await human_reply(
+            channel,
+            decision.get("clarifying_question")
+            or "I want to route this correctly. Is this about a giveaway payout, a deposit issue, a leaderboard question, or something else?",
+            intent="support",
+            append_closing=False,
+        )
+        return True
+
+    if decision.get("needs_admin"):
+        await escalate_ticket(
+            channel,
+            message.author,
+            reason=decision.get("summary") or "manual review required",
+            username_text=state.get("username") or "",
+            proof=bool(state.get("attachments_total", 0)),
+        )
+        return True
+
+    reply = decision.get("reply") or decision.get("clarifying_question")
+    if reply:
+        metadata = {
+            "summary": decision.get("summary"),
+            "category": decision.get("category"),
+        }
+        if decision.get("source"):
+            metadata["source"] = decision["source"]
+        await human_reply(
+            channel,
+            reply,
+            intent=decision.get("intent"),
+            confidence=decision.get("confidence"),
+            metadata=metadata,
+        )
+        return True
+    return False
+
+
+async def handle_ticket_turn(ticket_id: str, items: List["asyncio.Task"], turn: Turn):
+    # One reply per burst: every message in the batch is logged in arrival order,
+    # then the bot answers their combined text once. The ticket lock is held only
+    # while state is mutated and replies are sent, never across the Gemini call.
+    batch = []
+    for item in items:
+        try:
+            batch.append(await item)
+        except Exception as exc:
+            logger.exception("Preparing a message for ticket %s failed: %s", ticket_id, exc)
+    if not batch:
+        return
+
+    message = batch[-1]["message"]
+    channel = message.channel
+    channel_id = channel.id
+    channel_name = (channel.name or "").lower()
+    current_status = tm.get_ticket_status(channel_id)
+    ticket_is_locked = current_status in {"ESCALATED", "PAUSED", "CLOSED"} or channel_id in paused_channels
+
+    async with get_lock(channel_id):
+        state = refresh_state_from_history(channel_id)
+        state["guild_id"] = getattr(channel.guild, "id", None)
+        for prepared in batch:
+            record_user_message(channel, prepared, state)
+        if current_status not in {"ESCALATED", "PAUSED", "CLOSED"}:
+            tm.set_ticket_status(channel_id, "OPEN")
+        build_ticket_metadata(channel, state, message)
+    sync_ticket_to_dashboard(channel_id)
+
+    if not already_tagged(channel_name) and state.get("flow"):
+        try:
+            first_name = message.author.display_name.split()[0].lower()
+            await channel.edit(name=f"{state['flow']}-{first_name}"[:90])
+        except Exception:
+            logger.debug("Unable to rename channel %s", channel.id)
+
+    if ticket_is_locked:
+        logger.info(
+            "Ticket %s is %s; synced latest user activity without auto-reply",
+            channel_id,
+            current_status,
+        )
+        if current_status == "CLOSED":
+            ticket_state.evict(channel_id)
+        return
+
+    raw = "\n".join(prepared["raw"] for prepared in batch)
+    intent = detect_intent(raw)
+    state["intent"] = intent
+    has_attachments = any(prepared["attachments"] for prepared in batch)
+
+    async with get_lock(channel_id):
+        if await reply_locally(channel, message, state, raw, intent, has_attachments):
+            sync_ticket_to_dashboard(channel_id)
+            return
+
+    if not ticket_auto_reply_enabled(channel_id) and intent in {"casual", "query"} and not state.get("flow"):
+        logger.info("Auto reply disabled for ticket %s; skipping general AI response", channel_id)
+        return
+
+    if AI_AVAILABLE and ask_ai_async:
+        try:
+            decision = local_decision(raw, state)
+            if decision is None:
+                conversation = tm.load_conversation(channel_id)
+                # A newer message cancels the call, including any wait for a limiter slot.
+                decision = await turn.interruptible(ask_ai_async(SYSTEM_PROMPT, conversation))
+                if decision is None or turn.superseded:
+                    # A newer message is queued; its turn sees the whole conversation.
+                    turn.drop()
+                    logger.info("Dropping superseded AI reply for ticket %s", channel_id)
+                    return
+            async with get_lock(channel_id):
+                if await apply_ai_decision(channel, message, state, decision):
+                    sync_ticket_to_dashboard(channel_id)
+                    return
+        except Exception as exc:
+            logger.exception("Structured AI failed: %s", exc)
+
+    async with get_lock(channel_id):
+        fallback_flow = state.get("flow") if state.get("flow") in {"gw", "lb", "raffle"} else "general"
+        await human_reply(channel, reply_template(fallback_flow, "opening"), intent="support", append_closing=False)
+    sync_ticket_to_dashboard(channel_id)
+
+
+ticket_turns = TicketTurnQueue(handle_ticket_turn, debounce=TICKET_DEBOUNCE_SECONDS, max_wait=TICKET_DEBOUNCE_MAX_SECONDS)
+
+
+@bot.event
+async def on_guild_channel_delete(channel: discord.abc.GuildChannel):
+    # The ticket is gone: drop its state rather than checkpoint it back to disk.
+    ticket_state.pop(channel.id)
+    dashboard_sync.forget(channel.id)
+
+
 @bot.event
 async def on_message(message: discord.Message):
     try:
@@ -1419,223 +1779,10 @@ async def on_message(message: discord.Message):
         if not channel_name.startswith(VALID_PREFIXES):
             return
 
-        channel_id = channel.id
-        current_status = tm.load_status_map().get(str(channel_id), "OPEN")
-        ticket_is_locked = current_status in {"ESCALATED", "PAUSED", "CLOSED"} or channel_id in paused_channels
-
-        async with get_lock(channel_id):
-            state = refresh_state_from_history(channel_id)
-            state["guild_id"] = getattr(channel.guild, "id", None)
-            auto_reply_enabled = ticket_auto_reply_enabled(channel_id)
-            raw = strip_bot_mentions(message, (message.content or "").strip())
-            if not raw and not message.attachments:
-                raw = "hello"
-
-            lowered = raw.lower()
-            attachments = []
-            attachment_inputs = []
-
-            for attachment in message.attachments:
-                destination = tm.attachment_dir(channel_id) / attachment.filename
-                await attachment.save(destination)
-                attachments.append(
-                    {
-                        "filename": attachment.filename,
-                        "url": attachment.url,
-                        "proxy_url": getattr(attachment, "proxy_url", "") or "",
-                        "local_url": f"/attachments/{channel_id}/{attachment.filename}",
-                        "content_type": getattr(attachment, "content_type", "") or "",
-                    }
-                )
-                attachment_inputs.append(
-                    {
-                        "filename": attachment.filename,
-                        "path": str(destination),
-                    }
-                )
-
-            intent = detect_intent(raw)
-            category = detect_category(raw)
-            if category:
-                state["flow"] = category
-            elif any(key in lowered for key in ["payout", "winner", "won", "giveaway", "gw"]):
-                state["flow"] = "gw"
-            elif "deposit" in lowered:
-                state["flow"] = "deposit"
-            state["intent"] = intent
-            platform = detect_giveaway_platform(raw)
-            if platform:
-                state["gw_platform"] = platform
-                state["gw_required_attachments"] = 2 if platform == "kick" else 3
-
-            username = extract_username_from_text(raw)
-            if username:
-                state["username"] = username
-
-            if "donde" in lowered:
-                state["code"] = "Donde"
-            if state.get("flow") == "50bonus" and state.get("asked_first_ever"):
-                if lowered in {"yes", "yep", "yeah"}:
-                    state["first_ever_confirmed"] = "yes"
-                elif lowered in {"no", "nope"}:
-                    state["first_ever_confirmed"] = "no"
-
-            merge_proof_signals(state, infer_text_proof_signals(raw, state.get("flow")))
-
-            if attachments:
-                state["attachments_total"] = state.get("attachments_total", 0) + len(attachments)
-
-            attachment_metadata = {}
-            if attachment_inputs and AI_AVAILABLE and analyze_attachments:
-                try:
-                    analysis = await bot.loop.run_in_executor(
-                        None,
-                        lambda: analyze_attachments(state.get("flow") or category or "general", raw, attachment_inputs),
-                    )
-                    state["proof_ready"] = bool(analysis.get("has_relevant_proof"))
-                    state["proof_type"] = analysis.get("proof_type")
-                    state["proof_notes"] = analysis.get("notes") or ""
-                    state["analysis_confidence"] = float(analysis.get("confidence") or 0.0)
-                    if analysis.get("username") and not state.get("username"):
-                        state["username"] = analysis.get("username")
-                    merge_proof_signals(
-                        state,
-                        {
-                            "has_relevant_proof": analysis.get("has_relevant_proof"),
-                            "winner_detected": analysis.get("winner_detected"),
-                            "deposit_detected": analysis.get("deposit_detected"),
-                            "kyc_detected": analysis.get("kyc_detected"),
-                            "code_proof_detected": analysis.get("code_proof_detected"),
-                            "youtube_proof_detected": analysis.get("youtube_proof_detected"),
-                            "supporting_proof_detected": analysis.get("supporting_proof_detected"),
-                            "platform_hint": analysis.get("platform_hint"),
-                            "confidence": analysis.get("confidence"),
-                            "visible_text": analysis.get("visible_text"),
-                        },
-                    )
-                    if analysis.get("platform_hint") in {"discord", "twitter", "kick"} and not state.get("gw_platform"):
-                        state["gw_platform"] = analysis.get("platform_hint")
-                    attachment_metadata = {
-                        "proof_ready": state.get("proof_ready"),
-                        "proof_type": state.get("proof_type"),
-                        "proof_notes": state.get("proof_notes"),
-                        "analysis_confidence": state.get("analysis_confidence"),
-                        "extracted_username": analysis.get("username") or "",
-                        "gw_platform": state.get("gw_platform"),
-                        "gw_required_attachments": state.get("gw_required_attachments", 0),
-                        "proof_signals": state.get("proof_signals", {}),
-                        "visible_text": analysis.get("visible_text") or "",
-                    }
-                except Exception as exc:
-                    logger.exception("Attachment analysis failed: %s", exc)
-
-            build_flow_checklist(state)
-
-            tm.append_message(
-                channel_id,
-                "user",
-                raw,
-                author=str(message.author),
-                attachments=attachments,
-                intent=intent,
-                metadata={"channel_name": channel.name, **attachment_metadata},
-            )
-            if current_status not in {"ESCALATED", "PAUSED", "CLOSED"}:
-                tm.set_ticket_status(channel_id, "OPEN")
-            build_ticket_metadata(channel, state, message)
-            sync_ticket_to_dashboard(channel_id)
-
-            if not already_tagged(channel_name) and state.get("flow"):
-                try:
-                    first_name = message.author.display_name.split()[0].lower()
-                    await channel.edit(name=f"{state['flow']}-{first_name}"[:90])
-                except Exception:
-                    logger.debug("Unable to rename channel %s", channel.id)
-
-            if ticket_is_locked:
-                logger.info(
-                    "Ticket %s is %s; synced latest user activity without auto-reply",
-                    channel_id,
-                    current_status,
-                )
-                sync_ticket_to_dashboard(channel_id)
-                return
-
-            if intent == "casual" and len(raw.split()) <= 4 and not attachments and not state.get("flow"):
-                await human_reply(
-                    channel,
-                    "Hey. Tell me what you need help with and I’ll guide you.",
-                    intent=intent,
-                )
-                sync_ticket_to_dashboard(channel_id)
-                return
-
-            if await answer_knowledge(channel, lowered):
-                sync_ticket_to_dashboard(channel_id)
-                return
-
-            if await handle_known_flow(channel, message, state, raw, lowered):
-                sync_ticket_to_dashboard(channel_id)
-                return
-
-            if not auto_reply_enabled and intent in {"casual", "query"} and not state.get("flow"):
-                logger.info("Auto reply disabled for ticket %s; skipping general AI response", channel_id)
-                sync_ticket_to_dashboard(channel_id)
-                return
-
-            if AI_AVAILABLE and ask_ai:
-                try:
-                    conversation = tm.load_conversation(channel_id)
-                    decision = await bot.loop.run_in_executor(None, lambda: ask_ai(SYSTEM_PROMPT, conversation))
-                    state["intent"] = decision.get("intent") or state.get("intent")
-                    state["flow"] = decision.get("category") or state.get("flow")
-                    state["summary"] = decision.get("summary") or state.get("summary")
-                    build_ticket_metadata(channel, state, message)
-                    sync_ticket_to_dashboard(channel_id)
-
-                    confidence = float(decision.get("confidence") or 0.0)
-
-                    if confidence < 0.58 and not decision.get("needs_admin"):
-                        await human_reply(
-                            channel,
-                            decision.get("clarifying_question")
-                            or "I want to route this correctly. Is this about a giveaway payout, a deposit issue, a leaderboard question, or something else?",
-                            intent="support",
-                            append_closing=False,
-                        )
-                        sync_ticket_to_dashboard(channel_id)
-                        return
-
-                    if decision.get("needs_admin"):
-                        await escalate_ticket(
-                            channel,
-                            message.author,
-                            reason=decision.get("summary") or "manual review required",
-                            username_text=state.get("username") or "",
-                            proof=bool(state.get("attachments_total", 0)),
-                        )
-                        return
-
-                    reply = decision.get("reply") or decision.get("clarifying_question")
-                    if reply:
-                        await human_reply(
-                            channel,
-                            reply,
-                            intent=decision.get("intent"),
-                            confidence=decision.get("confidence"),
-                            metadata={
-                                "summary": decision.get("summary"),
-                                "category": decision.get("category"),
-                            },
-                        )
-                        sync_ticket_to_dashboard(channel_id)
-                        return
-                except Exception as exc:
-                    logger.exception("Structured AI failed: %s", exc)
-
-            fallback_flow = state.get("flow") if state.get("flow") in {"gw", "lb", "raffle"} else "general"
-            await human_reply(channel, reply_template(fallback_flow, "opening"), intent="support", append_closing=False)
-            sync_ticket_to_dashboard(channel_id)
+        raw = strip_bot_mentions(message, (message.content or "").strip())
+        if not raw and not message.attachments:
+            raw = "hello"
+        ticket_turns.submit(channel.id, asyncio.create_task(prepare_message(message, raw)))
     except Exception as exc:
         logger.exception("on_message failed: %s", exc)
 
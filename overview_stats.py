@@ -0,0 +1,271 @@
+import heapq
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+PENDING_STATUSES = ("OPEN", "ESCALATED", "PAUSED")
+STAFF_ACTIONS = {"REPLY": "replies", "CLOSE": "closes", "CLAIM": "claims"}
+
+
+class _Descending:
+    # Inverts ordering so heapq (a min-heap) yields the highest score first.
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def __lt__(self, other: "_Descending") -> bool:
+        return self.value > other.value
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _Descending) and self.value == other.value
+
+
+class RankedSet:
+    # Keys ranked by score, highest first. A score change pushes a new heap entry
+    # and leaves the old one behind; top() skips entries that no longer match and
+    # the heap is rebuilt once stale entries outnumber live ones.
+    def __init__(self):
+        self._scores: Dict[str, Any] = {}
+        self._heap: List[Tuple[_Descending, str]] = []
+
+    def set(self, key: str, score: Any):
+        if key in self._scores and self._scores[key] == score:
+            return
+        self._scores[key] = score
+        heapq.heappush(self._heap, (_Descending(score), key))
+        if len(self._heap) > 2 * len(self._scores) + 64:
+            self._heap = [(_Descending(value), item) for item, value in self._scores.items()]
+            heapq.heapify(self._heap)
+
+    def discard(self, key: str):
+        self._scores.pop(key, None)
+
+    def top(self, limit: int) -> List[Tuple[str, Any]]:
+        found: List[Tuple[str, Any]] = []
+        kept: List[Tuple[_Descending, str]] = []
+        while self._heap and len(found) < limit:
+            entry = heapq.heappop(self._heap)
+            score, key = entry[0].value, entry[1]
+            if key not in self._scores or self._scores[key] != score or any(key == item for item, _ in found):
+                continue
+            found.append((key, score))
+            kept.append(entry)
+        for entry in kept:
+            heapq.heappush(self._heap, entry)
+        return found
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+
+class _Contribution(NamedTuple):
+    status: str
+    intent: str
+    priority: str
+    category: str
+    user_name: str
+    count: int
+    attachments: int
+    response_minutes: Optional[float]
+    last_message_at: str
+
+    @classmethod
+    def from_ticket(cls, ticket: Dict[str, Any]) -> "_Contribution":
+        response = ticket.get("avg_response_minutes")
+        return cls(
+            ticket["status"],
+            ticket["intent"] or "query",
+            ticket["priority"],
+            ticket["category"],
+            ticket["user_name"],
+            int(ticket["count"]),
+            int(ticket["attachments_count"]),
+            None if response is None else float(response),
+            ticket.get("last_message_at") or "",
+        )
+
+
+def _bump(counter: Counter, key: Any, delta: int):
+    counter[key] += delta
+    if not counter[key]:
+        del counter[key]
+
+
+class _Totals:
+    # Running sums over every ticket's last known contribution.
+    def __init__(self, activity_size: int, top_users: int):
+        self.activity_size = activity_size
+        self.top_users = top_users
+        self.tickets: Dict[str, _Contribution] = {}
+        self.status: Counter = Counter()
+        self.intent: Counter = Counter()
+        self.priority: Counter = Counter()
+        self.category: Counter = Counter()
+        self.user_messages: Counter = Counter()
+        self.user_tickets: Counter = Counter()
+        self.messages = 0
+        self.attachments = 0
+        self.response_sum = 0.0
+        self.response_count = 0
+        self.staff: Dict[str, Dict[str, int]] = {}
+        self.recent = RankedSet()
+        self.users = RankedSet()
+
+    def _apply(self, entry: _Contribution, sign: int):
+        _bump(self.status, entry.status, sign)
+        _bump(self.intent, entry.intent, sign)
+        _bump(self.priority, entry.priority, sign)
+        _bump(self.category, entry.category, sign)
+        self.messages += sign * entry.count
+        self.attachments += sign * entry.attachments
+        if entry.response_minutes is not None:
+            self.response_sum += sign * entry.response_minutes
+            self.response_count += sign
+        user = entry.user_name
+        self.user_messages[user] += sign * entry.count
+        _bump(self.user_tickets, user, sign)
+        if self.user_tickets[user]:
+            self.users.set(user, self.user_messages[user])
+        else:
+            self.user_messages.pop(user, None)
+            self.users.discard(user)
+
+    def replace(self, ticket_id: str, entry: Optional[_Contribution]) -> bool:
+        previous = self.tickets.get(ticket_id)
+        if previous == entry:
+            return False
+        if previous is not None:
+            self._apply(previous, -1)
+        if entry is None:
+            self.tickets.pop(ticket_id, None)
+            self.recent.discard(ticket_id)
+        else:
+            self.tickets[ticket_id] = entry
+            self._apply(entry, 1)
+            self.recent.set(ticket_id, entry.last_message_at)
+        return True
+
+    def record(self, admin: str, action: str) -> bool:
+        field = STAFF_ACTIONS.get((action or "").upper())
+        if field is None:
+            return False
+        counts = self.staff.setdefault(admin or "admin", {"replies": 0, "closes": 0, "claims": 0})
+        counts[field] += 1
+        return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "stats": {
+                "tickets_total": len(self.tickets),
+                "tickets_open": self.status.get("OPEN", 0),
+                "tickets_escalated": self.status.get("ESCALATED", 0),
+                "messages_total": self.messages,
+                "attachments_total": self.attachments,
+                "avg_response_minutes": round(self.response_sum / self.response_count, 2) if self.response_count else 0,
+                "pending_tickets": sum(self.status.get(status, 0) for status in PENDING_STATUSES),
+                "high_priority": self.priority.get("HIGH", 0),
+            },
+            "status_breakdown": dict(self.status),
+            "intent_breakdown": dict(self.intent),
+            "priority_breakdown": dict(self.priority),
+            "category_breakdown": dict(self.category),
+            "activity": [
+                {
+                    "label": self.tickets[ticket_id].user_name,
+                    "value": self.tickets[ticket_id].count,
+                    "status": self.tickets[ticket_id].status,
+                    "ticket_id": ticket_id,
+                }
+                for ticket_id, _ in self.recent.top(self.activity_size)
+            ],
+            "top_users": [{"label": label, "value": value} for label, value in self.users.top(self.top_users)],
+            "staff_metrics": [
+                {
+                    "label": admin,
+                    "value": info["replies"] + info["closes"] + info["claims"],
+                    "replies": info["replies"],
+                    "closes": info["closes"],
+                    "claims": info["claims"],
+                }
+                for admin, info in self.staff.items()
+            ],
+        }
+
+
+class OverviewAggregates:
+    # The dashboard overview kept as running totals. Each ticket's last known
+    # contribution is remembered, so update() swaps old for new in constant time
+    # and applying the same card twice is harmless. reconcile() recounts from
+    # scratch to correct whatever the deltas missed (writes that bypassed the API,
+    # staff actions logged while a reconcile was reading the log).
+    def __init__(self, activity_size: int = 7, top_users: int = 5):
+        self.activity_size = activity_size
+        self.top_users = top_users
+        self.reconciled = False
+        self._lock = threading.Lock()
+        self._totals = _Totals(activity_size, top_users)
+        self._pending: Optional[Dict[str, Optional[_Contribution]]] = None
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._counters = {"updates": 0, "staff_actions": 0, "reconciles": 0, "reconcile_corrections": 0}
+
+    def _replace(self, ticket_id: str, entry: Optional[_Contribution]):
+        if self._pending is not None:
+            self._pending[ticket_id] = entry
+        if self._totals.replace(ticket_id, entry):
+            self._snapshot = None
+
+    def update(self, ticket: Dict[str, Any]):
+        # `ticket` is a dashboard ticket card (dashboard_api.summary_from_row).
+        entry = _Contribution.from_ticket(ticket)
+        with self._lock:
+            self._counters["updates"] += 1
+            self._replace(str(ticket["ticket_id"]), entry)
+
+    def remove(self, ticket_id: int | str):
+        with self._lock:
+            self._replace(str(ticket_id), None)
+
+    def record_staff_action(self, admin: str, action: str):
+        with self._lock:
+            if self._totals.record(admin, action):
+                self._counters["staff_actions"] += 1
+                self._snapshot = None
+
+    def reconcile(self, tickets: Iterable[Dict[str, Any]], staff_log: Iterable[Dict[str, Any]]):
+        # Builds the totals off to the side, then swaps them in and replays the
+        # ticket updates that arrived meanwhile, since `tickets` may predate them.
+        with self._lock:
+            self._pending = {}
+        try:
+            fresh = _Totals(self.activity_size, self.top_users)
+            for ticket in tickets:
+                fresh.replace(str(ticket["ticket_id"]), _Contribution.from_ticket(ticket))
+            for log in staff_log:
+                fresh.record(log.get("admin") or "admin", log.get("action") or "")
+            rebuilt = fresh.snapshot()
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+        with self._lock:
+            pending, self._pending = self._pending or {}, None
+            if self.reconciled and self._totals.snapshot() != rebuilt:
+                self._counters["reconcile_corrections"] += 1
+            self._totals = fresh
+            self._snapshot = rebuilt
+            for ticket_id, entry in pending.items():
+                self._replace(ticket_id, entry)
+            self.reconciled = True
+            self._counters["reconciles"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        # Cached until the next change; callers must treat it as read-only.
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = self._totals.snapshot()
+            return self._snapshot
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._counters, "tickets": len(self._totals.tickets), "reconciled": self.reconciled}
@@ -0,0 +1,182 @@
+import asyncio
+import json
+import logging
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, Hashable, List, Optional
+
+logger = logging.getLogger("realtime_hub")
+
+# Events carrying a full snapshot: a queued frame is replaced by the newer one.
+COALESCED_EVENTS = {"stats_updated", "alerts_updated", "ticket_updated", "typing"}
+# Ephemeral events shed first once a connection's queue is half full.
+DROPPABLE_EVENTS = {"typing"}
+
+
+def _coalesce_key(event: str, payload: Dict[str, Any]) -> Optional[Hashable]:
+    if event not in COALESCED_EVENTS:
+        return None
+    if event == "ticket_updated":
+        return event, str(payload.get("ticket_id") or "")
+    if event == "typing":
+        return event, str(payload.get("ticket_id") or ""), str(payload.get("user") or "")
+    return event
+
+
+def encode_frame(event: str, payload: Dict[str, Any]) -> str:
+    message = {"event": event, "payload": payload, "sent_at": datetime.now(timezone.utc).isoformat()}
+    return json.dumps(message, ensure_ascii=False, separators=(",", ":"))
+
+
+class Frame:
+    __slots__ = ("event", "key", "text")
+
+    def __init__(self, event: str, key: Optional[Hashable], text: str):
+        self.event = event
+        self.key = key
+        self.text = text
+
+
+class Connection:
+    __slots__ = ("socket", "queue", "queued_keys", "wakeup", "writer", "dropped", "lagged", "sent")
+
+    def __init__(self, socket: Any):
+        self.socket = socket
+        self.queue: Deque[Frame] = deque()
+        self.queued_keys: Dict[Hashable, Frame] = {}
+        self.wakeup = asyncio.Event()
+        self.writer: Optional[asyncio.Task] = None
+        self.dropped = 0
+        self.lagged = False
+        self.sent = 0
+
+
+class RealtimeHub:
+    # Fan-out to dashboard websockets. A broadcast is serialized once and queued
+    # on every connection; each connection has its own writer task, so a slow
+    # browser only backs up its own queue. A full queue sheds its oldest frames
+    # and the client is sent one "resync" event to reload state, and a send that
+    # stalls past `send_timeout` closes that connection.
+    def __init__(self, *, max_queue: int = 256, send_timeout: float = 10.0):
+        self.max_queue = max(2, max_queue)
+        self.send_timeout = send_timeout
+        self._connections: Dict[Any, Connection] = {}
+        self._counters = {
+            "broadcasts": 0,
+            "frames_sent": 0,
+            "frames_coalesced": 0,
+            "frames_dropped": 0,
+            "resyncs": 0,
+            "slow_disconnects": 0,
+            "send_errors": 0,
+        }
+
+    @property
+    def connections(self) -> List[Any]:
+        return list(self._connections)
+
+    async def connect(self, websocket: Any):
+        await websocket.accept()
+        connection = Connection(websocket)
+        self._connections[websocket] = connection
+        connection.writer = asyncio.get_running_loop().create_task(self._write(connection), name="realtime-writer")
+
+    def disconnect(self, websocket: Any):
+        connection = self._connections.pop(websocket, None)
+        if connection is not None and connection.writer is not None and connection.writer is not asyncio.current_task():
+            connection.writer.cancel()
+
+    def _offer(self, connection: Connection, frame: Frame):
+        if frame.key is not None:
+            queued = connection.queued_keys.get(frame.key)
+            if queued is not None:
+                queued.text = frame.text
+                self._counters["frames_coalesced"] += 1
+                return
+        if frame.event in DROPPABLE_EVENTS and len(connection.queue) >= self.max_queue // 2:
+            self._counters["frames_dropped"] += 1
+            connection.dropped += 1
+            return
+        while len(connection.queue) >= self.max_queue:
+            oldest = connection.queue.popleft()
+            if oldest.key is not None:
+                connection.queued_keys.pop(oldest.key, None)
+            self._counters["frames_dropped"] += 1
+            connection.dropped += 1
+            connection.lagged = True
+        connection.queue.append(frame)
+        if frame.key is not None:
+            connection.queued_keys[frame.key] = frame
+        connection.wakeup.set()
+
+    def publish(self, event: str, payload: Dict[str, Any]):
+        self._counters["broadcasts"] += 1
+        if not self._connections:
+            return
+        text = encode_frame(event, payload)
+        key = _coalesce_key(event, payload)
+        for connection in list(self._connections.values()):
+            # Each connection gets its own Frame since coalescing rewrites it in place.
+            self._offer(connection, Frame(event, key, text))
+
+    async def broadcast(self, event: str, payload: Dict[str, Any]):
+        self.publish(event, payload)
+
+    def send_to(self, websocket: Any, event: str, payload: Dict[str, Any]):
+        connection = self._connections.get(websocket)
+        if connection is not None:
+            self._offer(connection, Frame(event, None, encode_frame(event, payload)))
+
+    async def _send(self, connection: Connection, text: str):
+        await asyncio.wait_for(connection.socket.send_text(text), timeout=self.send_timeout)
+        connection.sent += 1
+        self._counters["frames_sent"] += 1
+
+    async def _write(self, connection: Connection):
+        try:
+            while True:
+                while not connection.queue:
+                    connection.wakeup.clear()
+                    await connection.wakeup.wait()
+                if connection.lagged:
+                    connection.lagged = False
+                    self._counters["resyncs"] += 1
+                    await self._send(connection, encode_frame("resync", {"dropped": connection.dropped}))
+                frame = connection.queue.popleft()
+                if frame.key is not None and connection.queued_keys.get(frame.key) is frame:
+                    del connection.queued_keys[frame.key]
+                await self._send(connection, frame.text)
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            self._counters["slow_disconnects"] += 1
+            logger.warning("Closing realtime connection that stalled for %.1fs", self.send_timeout)
+            await self._close(connection)
+        except Exception as exc:
+            self._counters["send_errors"] += 1
+            logger.info("Realtime connection dropped: %s", exc)
+            await self._close(connection)
+
+    async def _close(self, connection: Connection):
+        self.disconnect(connection.socket)
+        try:
+            await asyncio.wait_for(connection.socket.close(code=1011), timeout=1.0)
+        except Exception:
+            pass
+
+    async def close(self):
+        writers = [connection.writer for connection in self._connections.values() if connection.writer is not None]
+        self._connections.clear()
+        for writer in writers:
+            writer.cancel()
+        await asyncio.gather(*writers, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        depths = [len(connection.queue) for connection in self._connections.values()]
+        return {
+            **self._counters,
+            "connections": len(self._connections),
+            "queued_frames": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            "queue_limit": self.max_queue,
+        }
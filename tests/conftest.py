@@ -0,0 +1,12 @@
+import os
+import shutil
+import tempfile
+
+# Every module that touches ticket_manager binds its paths at import time, so the
+# data directory is pointed at a throwaway location before any test imports it.
+TEST_DATA_DIR = tempfile.mkdtemp(prefix="ticket_data_")
+os.environ["TICKET_DATA_DIR"] = TEST_DATA_DIR
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(TEST_DATA_DIR, ignore_errors=True)
@@ -0,0 +1,64 @@
+import time
+import unittest
+
+from ai_cache import AnalysisCache, TTLCache, sha256_bytes
+import ticket_manager as tm
+
+
+class AnalysisCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.cache = AnalysisCache(tm.DATA_DIR / f"cache_{self._testMethodName}", ttl_seconds=60, max_entries=10)
+        self.cache.clear()
+
+    def test_key_depends_on_bytes_flow_and_version(self):
+        digest = sha256_bytes(b"png-bytes")
+        key = AnalysisCache.key([digest], "gw", 1, "model")
+        self.assertEqual(key, AnalysisCache.key([digest], "gw", 1, "model"))
+        self.assertNotEqual(key, AnalysisCache.key([digest], "deposit", 1, "model"))
+        self.assertNotEqual(key, AnalysisCache.key([digest], "gw", 2, "model"))
+        self.assertNotEqual(key, AnalysisCache.key([sha256_bytes(b"other")], "gw", 1, "model"))
+
+    def test_hit_miss_and_ttl(self):
+        key = AnalysisCache.key([sha256_bytes(b"a")], "gw", 1, "model")
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, {"has_relevant_proof": True})
+        self.assertEqual(self.cache.get(key), {"has_relevant_proof": True})
+        self.cache.ttl_seconds = 0.001
+        time.sleep(0.01)
+        self.assertIsNone(self.cache.get(key))
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["expired"]), (1, 2, 1))
+
+    def test_size_eviction_and_bypass(self):
+        for index in range(15):
+            self.cache.put(AnalysisCache.key([str(index)], "gw", 1, "model"), {"index": index})
+        self.assertLessEqual(self.cache.stats()["entries"], 10)
+        self.assertGreater(self.cache.stats()["evictions"], 0)
+
+        bypass = AnalysisCache(self.cache.root, ttl_seconds=60, max_entries=10, enabled=False)
+        self.assertIsNone(bypass.get(AnalysisCache.key(["14"], "gw", 1, "model")))
+        self.assertEqual(bypass.stats()["bypassed"], 1)
+
+
+class TTLCacheTests(unittest.TestCase):
+    def test_lru_eviction_and_expiry(self):
+        cache = TTLCache(max_entries=2, ttl_seconds=60)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.put("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        cache.ttl_seconds = 0.001
+        cache.put("d", 4)
+        time.sleep(0.01)
+        self.assertIsNone(cache.get("d"))
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["evictions"], stats["expired"]), (2, 2, 1))
+
+    def test_key_separates_parts(self):
+        self.assertNotEqual(TTLCache.key("ab", "c"), TTLCache.key("a", "bc"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import asyncio
+import time
+import unittest
+
+from ai_helper import GeminiLimiter
+
+
+class GeminiLimiterTests(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrency_is_capped(self):
+        limiter = GeminiLimiter(max_concurrency=2, qps=0)
+        peak = 0
+
+        async def call():
+            nonlocal peak
+            async with limiter:
+                peak = max(peak, limiter.in_flight)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(call() for _ in range(6)))
+        self.assertEqual(peak, 2)
+        self.assertEqual(limiter.in_flight, 0)
+
+    async def test_token_bucket_spaces_out_bursts(self):
+        limiter = GeminiLimiter(max_concurrency=10, qps=50, burst=1)
+        started = time.monotonic()
+        for _ in range(4):
+            async with limiter:
+                pass
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+
+    async def test_cancelled_waiter_releases_its_slot(self):
+        limiter = GeminiLimiter(max_concurrency=1, qps=0)
+        async with limiter:
+            waiter = asyncio.create_task(limiter.__aenter__())
+            await asyncio.sleep(0)
+            waiter.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+        async with limiter:
+            self.assertEqual(limiter.in_flight, 1)
+        self.assertEqual(limiter.waiting, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import asyncio
+import hashlib
+from pathlib import Path
+import shutil
+import tempfile
+import unittest
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from attachment_downloader import AttachmentDownloader
+
+
+class FakeAttachment:
+    def __init__(self, filename, url, size=0):
+        self.filename = filename
+        self.url = url
+        self.proxy_url = ""
+        self.size = size
+        self.content_type = "image/png"
+
+
+class AttachmentDownloaderTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.active = 0
+        self.peak = 0
+        self.directory = Path(tempfile.mkdtemp(prefix="downloads-"))
+
+        async def serve(request):
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            await asyncio.sleep(0.02)
+            self.active -= 1
+            return web.Response(body=request.match_info["name"].encode() * 100)
+
+        app = web.Application()
+        app.router.add_get("/{name}", serve)
+        self.server = TestServer(app)
+        await self.server.start_server()
+
+    def save(self, filename, data, sha256, content_type):
+        path = self.directory / filename
+        path.write_bytes(data)
+        return path
+
+    async def asyncTearDown(self):
+        await self.server.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    async def test_parallel_download_is_bounded_and_hashed(self):
+        downloader = AttachmentDownloader(concurrency=2)
+        attachments = [FakeAttachment(f"p{index}.png", str(self.server.make_url(f"/p{index}"))) for index in range(5)]
+        results = await downloader.fetch_all(attachments, self.save)
+        await downloader.close()
+
+        self.assertEqual(self.peak, 2)
+        body = b"p3" * 100
+        self.assertEqual(results[3].data, body)
+        self.assertEqual(results[3].sha256, hashlib.sha256(body).hexdigest())
+        self.assertEqual((self.directory / "p3.png").read_bytes(), body)
+        self.assertEqual(results[3].analyzer_input()["data"], body)
+
+    async def test_oversized_attachments_are_skipped(self):
+        downloader = AttachmentDownloader(max_bytes=50)
+        declared = FakeAttachment("big.png", str(self.server.make_url("/big")), size=10_000)
+        streamed = FakeAttachment("sneaky.png", str(self.server.make_url("/sneaky")))
+        results = await downloader.fetch_all([declared, streamed], self.save)
+        await downloader.close()
+        self.assertEqual(results, [None, None])
+        self.assertEqual(downloader.stats()["too_large"], 2)
+        self.assertFalse((self.directory / "sneaky.png").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
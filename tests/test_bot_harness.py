@@ -1,17 +1,12 @@
+import asyncio
 import copy
 import os
-from pathlib import Path
-import shutil
+from types import SimpleNamespace
 import unittest
-import atexit
+from unittest import mock
 
 os.environ.setdefault("DISABLE_KEEP_ALIVE", "1")
 os.environ.setdefault("DISCORD_BOT_TOKEN", "test-token")
-TEST_DATA_DIR = Path(__file__).resolve().parent / "_runtime_data"
-shutil.rmtree(TEST_DATA_DIR, ignore_errors=True)
-TEST_DATA_DIR.mkdir(parents=True, exist_ok=True)
-os.environ.setdefault("TICKET_DATA_DIR", str(TEST_DATA_DIR))
-atexit.register(lambda: shutil.rmtree(TEST_DATA_DIR, ignore_errors=True))
 
 import main  # noqa: E402
 
@@ -137,6 +132,85 @@ class BotHarnessTests(unittest.TestCase):
         self.assertIn("[valid proof]", summary)
         self.assertIn("support summary: Giveaway winner review", summary)
 
+    def local_prediction(self, intent, category):
+        return {"intent": intent, "category": category, "confidence": 0.95, "source": "local"}
+
+    def test_local_decision_defers_labels_without_a_canned_answer(self):
+        for category in ("deposit", "50bonus", "general"):
+            prediction = self.local_prediction("support", category)
+            with mock.patch.object(main.local_classifier, "classify", return_value=prediction):
+                self.assertIsNone(main.local_decision("where is my deposit", {}))
+
+    def test_local_decision_answers_from_knowledge(self):
+        prediction = self.local_prediction("query", "lb")
+        with mock.patch.object(main.local_classifier, "classify", return_value=prediction):
+            decision = main.local_decision("how does the leaderboard work", {})
+        self.assertEqual(decision["reply"], main.leaderboard_answer())
+        self.assertFalse(decision["needs_admin"])
+
+
+class TicketStateReducerTests(unittest.TestCase):
+    def setUp(self):
+        self.channel_id = 9100 + len(self._testMethodName)
+        main.tm.clear_conversation(self.channel_id)
+        main.tm.save_ticket_meta(self.channel_id, {"state_checkpoint": None})
+        main.ticket_state.pop(self.channel_id, None)
+
+    def test_only_new_messages_are_applied(self):
+        main.tm.append_message(self.channel_id, "user", "I won the giveaway on twitter", attachments=[{"filename": "a.png"}])
+        state = main.refresh_state_from_history(self.channel_id)
+        self.assertEqual((state["flow"], state["gw_platform"], state["history_seq"]), ("gw", "twitter", 1))
+
+        main.refresh_state_from_history(self.channel_id)
+        self.assertEqual(state["attachments_total"], 1)
+
+        main.tm.append_message(self.channel_id, "user", "here", attachments=[{"filename": "b.png"}])
+        main.refresh_state_from_history(self.channel_id)
+        self.assertEqual((state["attachments_total"], state["history_seq"]), (2, 2))
+
+    def test_state_reflects_only_the_recent_window(self):
+        main.tm.append_message(self.channel_id, "user", "I won the giveaway", attachments=[{"filename": "old.png"}])
+        for index in range(main.HISTORY_WINDOW - 1):
+            main.tm.append_message(self.channel_id, "user", f"still waiting {index}")
+        state = main.refresh_state_from_history(self.channel_id)
+        self.assertEqual((state["flow"], state["attachments_total"]), ("gw", 1))
+
+        main.tm.append_message(self.channel_id, "user", "any update", attachments=[{"filename": "new.png"}])
+        main.refresh_state_from_history(self.channel_id)
+        self.assertEqual((state["attachments_total"], state["history_seq"]), (1, main.HISTORY_WINDOW + 1))
+
+        # A cold start only folds the window, so the giveaway message no longer sets the flow.
+        main.tm.save_ticket_meta(self.channel_id, {"state_checkpoint": None})
+        main.ticket_state.pop(self.channel_id)
+        replayed = main.refresh_state_from_history(self.channel_id)
+        self.assertIsNone(replayed["flow"])
+        self.assertEqual(replayed["attachments_total"], 1)
+
+    def test_deleted_channel_state_is_not_checkpointed(self):
+        channel_id = 9199
+        main.ticket_state[channel_id] = main.new_ticket_state()
+
+        asyncio.run(main.on_guild_channel_delete(SimpleNamespace(id=channel_id)))
+        self.assertNotIn(channel_id, main.ticket_state)
+        self.assertFalse(main.tm.metadata_path(channel_id).exists())
+
+    def test_checkpoint_survives_restart_and_schema_bump_replays(self):
+        main.tm.append_message(self.channel_id, "user", "deposit bonus please")
+        state = main.refresh_state_from_history(self.channel_id)
+        state["summary"] = "kept from checkpoint"
+        main.tm.save_ticket_meta(self.channel_id, {"state_checkpoint": main.state_checkpoint(state)})
+
+        main.ticket_state.pop(self.channel_id)
+        restored = main.refresh_state_from_history(self.channel_id)
+        self.assertEqual((restored["flow"], restored["summary"], restored["history_seq"]), ("deposit", "kept from checkpoint", 1))
+
+        checkpoint = main.state_checkpoint(restored)
+        checkpoint["schema"] = main.STATE_SCHEMA_VERSION - 1
+        main.tm.save_ticket_meta(self.channel_id, {"state_checkpoint": checkpoint})
+        main.ticket_state.pop(self.channel_id)
+        replayed = main.refresh_state_from_history(self.channel_id)
+        self.assertEqual((replayed["flow"], replayed["summary"]), ("deposit", ""))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,107 @@
+from datetime import timedelta
+import os
+import unittest
+from unittest import mock
+
+for name, value in {
+    "JWT_SECRET": "test-jwt-secret",
+    "ADMIN_USERNAME": "test-admin",
+    "ADMIN_PASSWORD": "test-password",
+    "SYNC_SECRET": "test-sync-secret",
+    "GOOGLE_API_KEY": "test-key",
+}.items():
+    os.environ.setdefault(name, value)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import dashboard_api  # noqa: E402
+
+# The admin log and alert feed live in the working directory; keep test writes in the data dir.
+dashboard_api.ADMIN_LOG_FILE = dashboard_api.tm.DATA_DIR / "admin_logs.json"
+dashboard_api.ALERTS_FILE = dashboard_api.tm.DATA_DIR / "alerts.json"
+
+
+class TicketListEtagTests(unittest.TestCase):
+    def setUp(self):
+        self.ticket_id = "etag-overdue"
+        dashboard_api.tm.clear_conversation(self.ticket_id)
+        dashboard_api.tm.append_message(self.ticket_id, "user", "still waiting on my payout")
+        dashboard_api.app.dependency_overrides[dashboard_api.verify_token] = lambda: {"user": "test-admin"}
+        self.now_utc = dashboard_api.now_utc
+        self.client = TestClient(dashboard_api.app)
+
+    def tearDown(self):
+        dashboard_api.now_utc = self.now_utc
+        dashboard_api.app.dependency_overrides.clear()
+
+    def fetch(self, etag=None):
+        headers = {"If-None-Match": etag} if etag else {}
+        return self.client.get("/api/tickets", params={"q": self.ticket_id}, headers=headers)
+
+    def shift_clock(self, minutes):
+        dashboard_api.now_utc = lambda: self.now_utc() + timedelta(minutes=minutes)
+
+    def test_etag_survives_clock_ticks_but_not_crossing_overdue(self):
+        first = self.fetch()
+        self.assertFalse(first.json()["tickets"][0]["overdue"])
+
+        self.shift_clock(0.2)
+        self.assertEqual(self.fetch(first.headers["ETag"]).status_code, 304)
+
+        self.shift_clock(9)
+        overdue = self.fetch(first.headers["ETag"])
+        self.assertEqual(overdue.status_code, 200)
+        self.assertTrue(overdue.json()["tickets"][0]["overdue"])
+
+
+
+class SyncDeltaTests(unittest.TestCase):
+    def setUp(self):
+        self.ticket_id = "delta-removed"
+        dashboard_api.tm.clear_conversation(self.ticket_id)
+        dashboard_api.tm.append_message(self.ticket_id, "user", "please check my deposit")
+        dashboard_api.tm.save_ticket_meta(self.ticket_id, {"assigned_to": "mod", "category": "deposit"})
+        self.client = TestClient(dashboard_api.app)
+
+    def test_removed_meta_keys_are_deleted(self):
+        conversation = dashboard_api.tm.load_conversation(self.ticket_id)
+        response = self.client.post(
+            "/api/internal/sync_ticket_delta",
+            json={
+                "ticket_id": self.ticket_id,
+                "status": "OPEN",
+                "base_seq": len(conversation),
+                "base_etag": dashboard_api.tm.message_etag(conversation[-1]),
+                "meta_removed": ["assigned_to"],
+            },
+            headers={"X-Sync-Secret": os.environ["SYNC_SECRET"]},
+        )
+        self.assertEqual(response.status_code, 200)
+        meta = dashboard_api.tm.load_ticket_meta(self.ticket_id)
+        self.assertNotIn("assigned_to", meta)
+        self.assertEqual(meta["category"], "deposit")
+
+
+
+class TicketMetaUpdateTests(unittest.TestCase):
+    def setUp(self):
+        self.ticket_id = "meta-close"
+        dashboard_api.tm.clear_conversation(self.ticket_id)
+        dashboard_api.tm.append_message(self.ticket_id, "user", "thanks, all sorted")
+        dashboard_api.app.dependency_overrides[dashboard_api.verify_token] = lambda: {"user": "test-admin"}
+        self.client = TestClient(dashboard_api.app)
+
+    def tearDown(self):
+        dashboard_api.app.dependency_overrides.clear()
+
+    def test_status_changes_go_through_set_ticket_status(self):
+        with mock.patch.object(dashboard_api.tm, "set_ticket_status", wraps=dashboard_api.tm.set_ticket_status) as set_status:
+            response = self.client.post(f"/api/tickets/{self.ticket_id}/meta", json={"status": "CLOSED", "priority": "LOW"})
+        self.assertEqual(response.status_code, 200)
+        set_status.assert_called_once_with(self.ticket_id, "CLOSED")
+        meta = dashboard_api.tm.load_ticket_meta(self.ticket_id)
+        self.assertEqual((meta["status"], meta["priority"]), ("CLOSED", "LOW"))
+
+
+if __name__ == "__main__":
+    unittest.main()
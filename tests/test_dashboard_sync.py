@@ -0,0 +1,146 @@
+import asyncio
+import unittest
+
+from dashboard_sync import DashboardSyncQueue, SyncHTTPError
+import ticket_manager as tm
+
+
+class RecordingQueue(DashboardSyncQueue):
+    def __init__(self, failures=0, **kwargs):
+        super().__init__("http://dashboard.test", lambda ticket_id: {"ticket_id": ticket_id}, **kwargs)
+        self.pushed = []
+        self.failures = failures
+
+    async def _push(self, ticket_id: str):
+        if self.failures:
+            self.failures -= 1
+            raise SyncHTTPError(503)
+        self.pushed.append(ticket_id)
+
+
+class DeltaQueue(DashboardSyncQueue):
+    def __init__(self, reject_delta=False):
+        self.messages = []
+        self.meta = {}
+        super().__init__(
+            "http://dashboard.test",
+            self.payload,
+        )
+        self.posts = []
+        self.reject_delta = reject_delta
+        self.windowed = False
+        self.loads = []
+
+    def payload(self, ticket_id, since=None):
+        self.loads.append(since)
+        payload = {"ticket_id": ticket_id, "status": "OPEN", "meta": dict(self.meta)}
+        if self.windowed and since is not None:
+            start = max(since - 1, 0)
+            return {**payload, "messages": self.messages[start:], "start": start, "total": len(self.messages)}
+        return {**payload, "messages": list(self.messages)}
+
+    async def _post(self, path, payload):
+        self.posts.append((path, payload))
+        if self.reject_delta and path.endswith("_delta"):
+            raise SyncHTTPError(409)
+        return {"success": True}
+
+
+class DashboardSyncQueueTests(unittest.IsolatedAsyncioTestCase):
+    async def test_bursts_for_one_ticket_are_coalesced(self):
+        queue = RecordingQueue(coalesce_window=0.05)
+        for _ in range(5):
+            queue.request(42)
+        queue.request(7)
+        await asyncio.sleep(0)
+        await queue.drain()
+        await queue.close()
+        self.assertEqual(sorted(queue.pushed), ["42", "7"])
+        metrics = queue.metrics()
+        self.assertEqual(metrics["coalesced"], 4)
+        self.assertEqual(metrics["queue_depth"], 0)
+
+    async def test_retryable_errors_are_retried_with_backoff(self):
+        queue = RecordingQueue(failures=2, coalesce_window=0, backoff_base=0.001)
+        queue.request(1)
+        await queue.drain()
+        await queue.close()
+        self.assertEqual(queue.pushed, ["1"])
+        self.assertEqual(queue.metrics()["retries"], 2)
+
+    async def test_close_delivers_queued_pushes_first(self):
+        queue = RecordingQueue(coalesce_window=0.05)
+        queue.request(9)
+        await queue.close(drain_timeout=1)
+        self.assertEqual(queue.pushed, ["9"])
+
+    async def test_second_push_sends_only_new_messages(self):
+        queue = DeltaQueue()
+        queue.messages = [{"text": "one"}]
+        await queue._push("5")
+        queue.messages.append({"text": "two"})
+        await queue._push("5")
+        path, payload = queue.posts[-1]
+        self.assertEqual(path, "/api/internal/sync_ticket_delta")
+        self.assertEqual(payload["base_seq"], 1)
+        self.assertEqual(payload["base_etag"], tm.message_etag({"text": "one"}))
+        self.assertEqual(payload["messages"], [{"text": "two"}])
+
+        await queue._push("5")
+        self.assertEqual(len(queue.posts), 2)
+
+    async def test_delta_reads_only_the_window_after_the_cursor(self):
+        queue = DeltaQueue()
+        queue.windowed = True
+        queue.messages = [{"text": "one"}, {"text": "two"}]
+        await queue._push("5")
+        queue.messages.append({"text": "three"})
+        await queue._push("5")
+        path, payload = queue.posts[-1]
+        self.assertEqual(queue.loads, [None, 2])
+        self.assertEqual(path, "/api/internal/sync_ticket_delta")
+        self.assertEqual(payload["base_seq"], 2)
+        self.assertEqual(payload["base_etag"], tm.message_etag({"text": "two"}))
+        self.assertEqual(payload["messages"], [{"text": "three"}])
+
+    async def test_rejected_windowed_delta_resyncs_the_full_ticket(self):
+        queue = DeltaQueue(reject_delta=True)
+        queue.windowed = True
+        queue.messages = [{"text": "one"}, {"text": "two"}]
+        await queue._push("5")
+        queue.messages.append({"text": "three"})
+        await queue._push("5")
+        path, payload = queue.posts[-1]
+        self.assertEqual(queue.loads, [None, 2, None])
+        self.assertEqual(path, "/api/internal/sync_ticket")
+        self.assertEqual(len(payload["messages"]), 3)
+        self.assertNotIn("total", payload)
+
+    async def test_deleted_meta_keys_are_sent_as_removals(self):
+        queue = DeltaQueue()
+        queue.meta = {"assigned_to": "mod", "priority": "HIGH"}
+        await queue._push("5")
+        queue.meta = {"priority": "HIGH"}
+        await queue._push("5")
+        path, payload = queue.posts[-1]
+        self.assertEqual(path, "/api/internal/sync_ticket_delta")
+        self.assertEqual(payload["meta_patch"], {})
+        self.assertEqual(payload["meta_removed"], ["assigned_to"])
+
+    async def test_rejected_delta_falls_back_to_full_sync(self):
+        queue = DeltaQueue(reject_delta=True)
+        queue.messages = [{"text": "one"}]
+        await queue._push("5")
+        queue.messages.append({"text": "two"})
+        await queue._push("5")
+        self.assertEqual([path for path, _ in queue.posts][-2:], ["/api/internal/sync_ticket_delta", "/api/internal/sync_ticket"])
+        self.assertEqual(queue.metrics()["resyncs"], 1)
+
+    def test_disabled_without_url(self):
+        queue = DashboardSyncQueue("", lambda ticket_id: {})
+        queue.request(1)
+        self.assertEqual(queue.metrics()["requested"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
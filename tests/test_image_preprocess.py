@@ -0,0 +1,49 @@
+import io
+import unittest
+
+from image_preprocess import Image, ImagePreprocessor, shrink_image
+
+
+def png_bytes(size=(2400, 1200)):
+    image = Image.new("RGB", size)
+    for x in range(0, size[0], 7):
+        for y in range(0, size[1], 5):
+            image.putpixel((x, y), ((x * 3) % 255, (y * 5) % 255, (x + y) % 255))
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@unittest.skipIf(Image is None, "Pillow is not installed")
+class ImagePreprocessTests(unittest.IsolatedAsyncioTestCase):
+    def test_large_screenshot_is_downscaled_and_reencoded(self):
+        original = png_bytes()
+        data, mime_type = shrink_image(original, 800, "webp", 80)
+        self.assertEqual(mime_type, "image/webp")
+        self.assertLess(len(data), len(original))
+        with Image.open(io.BytesIO(data)) as result:
+            self.assertEqual(max(result.size), 800)
+            self.assertNotIn("exif", result.info)
+
+    def test_original_kept_when_reencoding_does_not_help(self):
+        buffer = io.BytesIO()
+        Image.new("RGB", (4, 4)).save(buffer, format="PNG")
+        data, mime_type = shrink_image(buffer.getvalue(), 800, "jpeg", 80)
+        self.assertEqual((data, mime_type), (buffer.getvalue(), "image/png"))
+
+    async def test_process_pool_prepare_records_savings(self):
+        preprocessor = ImagePreprocessor(enabled=True, max_edge=640, output_format="jpeg", workers=1)
+        try:
+            parts = [{"mime_type": "image/png", "data": png_bytes()}, {"mime_type": "image/png", "data": b"not an image"}]
+            prepared = await preprocessor.prepare_async(parts)
+        finally:
+            preprocessor.close()
+        self.assertEqual(prepared[0]["mime_type"], "image/jpeg")
+        self.assertIs(prepared[1], parts[1])
+        stats = preprocessor.stats()
+        self.assertEqual((stats["images"], stats["shrunk"], stats["failed"]), (2, 1, 1))
+        self.assertGreater(stats["bytes_saved"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+
+from local_classifier import ESCALATE_LABEL, LOCAL_SOURCE, LocalClassifier, train, training_examples
+
+
+def labelled(text, intent, category):
+    return [
+        {"role": "user", "text": text},
+        {"role": "assistant", "text": "reply", "intent": intent, "confidence": 0.9, "metadata": {"category": category}},
+    ]
+
+
+class LocalClassifierTests(unittest.TestCase):
+    def setUp(self):
+        conversation = []
+        for index in range(6):
+            conversation += labelled(f"how does the leaderboard work for month {index}", "query", "lb")
+            conversation += labelled(f"when is the next raffle draw {index}", "query", "raffle")
+        conversation += [
+            {"role": "user", "text": "pay me now"},
+            {"role": "assistant", "text": "sent to team", "metadata": {"status": "ESCALATED"}},
+            {"role": "user", "text": "untracked"},
+            {"role": "assistant", "text": "template reply without confidence", "intent": "support"},
+        ]
+        self.examples = list(training_examples(conversation))
+        self.classifier = LocalClassifier(train(self.examples, min_examples=1), threshold=0.6)
+
+    def test_training_pairs_only_ai_labelled_replies(self):
+        labels = {label for _, label in self.examples}
+        self.assertEqual(labels, {"query|lb", "query|raffle", ESCALATE_LABEL})
+
+    def test_local_answers_are_never_training_examples(self):
+        prediction = self.classifier.classify("leaderboard question")
+        conversation = [
+            {"role": "user", "text": "leaderboard question"},
+            {
+                "role": "assistant",
+                "text": "local reply",
+                "intent": prediction["intent"],
+                "confidence": prediction["confidence"],
+                "metadata": {"category": prediction["category"], "source": prediction["source"]},
+            },
+            {"role": "user", "text": "when is the raffle"},
+            {"role": "assistant", "text": "ai reply", "intent": "query", "confidence": 0.9, "metadata": {"category": "raffle"}},
+        ]
+        self.assertEqual(prediction["source"], LOCAL_SOURCE)
+        self.assertEqual(list(training_examples(conversation)), [("when is the raffle", "query|raffle")])
+
+    def test_confident_prediction_and_counters(self):
+        prediction = self.classifier.classify("leaderboard question")
+        self.assertEqual((prediction["intent"], prediction["category"]), ("query", "lb"))
+        self.assertGreaterEqual(prediction["confidence"], 0.6)
+        self.assertIsNone(self.classifier.classify("completely unrelated words"))
+        stats = self.classifier.stats()
+        self.assertEqual((stats["predictions"], stats["low_confidence"]), (2, 1))
+
+    def test_escalation_label_defers_to_gemini(self):
+        self.assertIsNone(self.classifier.classify("pay me now"))
+        self.assertEqual(self.classifier.stats()["deferred"], 1)
+
+    def test_untrained_classifier_is_inert(self):
+        self.assertIsNone(LocalClassifier().classify("leaderboard"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+
+from overview_stats import OverviewAggregates, RankedSet
+
+
+def ticket(ticket_id, status="OPEN", *, user="alice", count=1, at="2024-01-01T00:00:00+00:00", response=None, **extra):
+    return {
+        "ticket_id": str(ticket_id),
+        "status": status,
+        "intent": extra.get("intent", "query"),
+        "priority": extra.get("priority", "LOW"),
+        "category": extra.get("category", "general"),
+        "user_name": user,
+        "count": count,
+        "attachments_count": extra.get("attachments", 0),
+        "avg_response_minutes": response,
+        "last_message_at": at,
+    }
+
+
+class RankedSetTests(unittest.TestCase):
+    def test_top_reflects_latest_scores_only(self):
+        ranked = RankedSet()
+        for key, score in (("a", 5), ("b", 3), ("c", 9), ("a", 1), ("b", 7), ("a", 5)):
+            ranked.set(key, score)
+        ranked.discard("c")
+
+        self.assertEqual(ranked.top(2), [("b", 7), ("a", 5)])
+        self.assertEqual(ranked.top(5), [("b", 7), ("a", 5)])
+
+
+class OverviewAggregatesTests(unittest.TestCase):
+    def test_deltas_match_a_full_recount(self):
+        live = OverviewAggregates(activity_size=2, top_users=2)
+        live.reconcile([], [])
+        live.update(ticket(1, user="alice", count=2, response=4.0, category="gw", priority="HIGH"))
+        live.update(ticket(2, user="bob", count=5, at="2024-01-02T00:00:00+00:00"))
+        live.update(ticket(3, "ESCALATED", user="alice", count=1, at="2024-01-03T00:00:00+00:00", response=1.0))
+        live.update(ticket(1, "CLOSED", user="alice", count=3, response=4.0, category="gw", priority="HIGH"))
+        live.update(ticket(2, user="bob", count=5, at="2024-01-02T00:00:00+00:00"))
+        live.remove(3)
+        live.record_staff_action("mod", "reply")
+        live.record_staff_action("mod", "CLOSE")
+        live.record_staff_action("mod", "NOTE")
+
+        recount = OverviewAggregates(activity_size=2, top_users=2)
+        recount.reconcile(
+            [ticket(1, "CLOSED", user="alice", count=3, response=4.0, category="gw", priority="HIGH"),
+             ticket(2, user="bob", count=5, at="2024-01-02T00:00:00+00:00")],
+            [{"admin": "mod", "action": "REPLY"}, {"admin": "mod", "action": "CLOSE"}, {"admin": "mod", "action": "NOTE"}],
+        )
+
+        snapshot = live.snapshot()
+        self.assertEqual(snapshot, recount.snapshot())
+        self.assertEqual(snapshot["stats"]["tickets_total"], 2)
+        self.assertEqual(snapshot["stats"]["pending_tickets"], 1)
+        self.assertEqual(snapshot["stats"]["avg_response_minutes"], 4.0)
+        self.assertEqual(snapshot["status_breakdown"], {"CLOSED": 1, "OPEN": 1})
+        self.assertEqual([item["ticket_id"] for item in snapshot["activity"]], ["2", "1"])
+        self.assertEqual(snapshot["top_users"], [{"label": "bob", "value": 5}, {"label": "alice", "value": 3}])
+        self.assertEqual(snapshot["staff_metrics"][0]["value"], 2)
+
+    def test_snapshot_is_cached_until_something_changes(self):
+        aggregates = OverviewAggregates()
+        aggregates.reconcile([ticket(1)], [])
+        first = aggregates.snapshot()
+        aggregates.update(ticket(1))
+        self.assertIs(aggregates.snapshot(), first)
+        aggregates.update(ticket(1, count=2))
+        self.assertEqual(aggregates.snapshot()["stats"]["messages_total"], 2)
+
+    def test_reconcile_corrects_missed_changes(self):
+        aggregates = OverviewAggregates()
+        aggregates.reconcile([ticket(1)], [])
+        aggregates.reconcile([ticket(1), ticket(2, user="bob")], [])
+        self.assertEqual(aggregates.snapshot()["stats"]["tickets_total"], 2)
+        self.assertEqual(aggregates.stats()["reconcile_corrections"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import asyncio
+import json
+import unittest
+
+from realtime_hub import RealtimeHub
+
+
+class FakeSocket:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.gate = asyncio.Event()
+        self.gate.set()
+        self.frames = []
+        self.closed = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        await self.gate.wait()
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.frames.append(json.loads(text))
+
+    async def close(self, code=1000):
+        self.closed = code
+
+    def events(self):
+        return [frame["event"] for frame in self.frames]
+
+
+class RealtimeHubTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncTearDown(self):
+        await self.hub.close()
+
+    async def test_slow_socket_does_not_delay_others_and_snapshots_coalesce(self):
+        self.hub = RealtimeHub(max_queue=16)
+        fast, slow = FakeSocket(), FakeSocket()
+        slow.gate.clear()
+        await self.hub.connect(fast)
+        await self.hub.connect(slow)
+
+        for index in range(5):
+            await self.hub.broadcast("new_message", {"ticket_id": "1", "n": index})
+            await self.hub.broadcast("stats_updated", {"n": index})
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.01)
+
+        # The stalled socket holds one frame in flight plus four messages and a
+        # single coalesced stats frame; the fast one has everything already.
+        self.assertEqual(fast.events().count("new_message"), 5)
+        self.assertEqual(fast.frames[-1]["payload"], {"n": 4})
+        self.assertEqual(self.hub.stats()["max_queue_depth"], 5)
+        slow.gate.set()
+        await asyncio.sleep(0.01)
+        self.assertEqual(slow.events().count("new_message"), 5)
+        self.assertEqual([frame["payload"] for frame in slow.frames if frame["event"] == "stats_updated"], [{"n": 4}])
+
+    async def test_overflow_drops_oldest_and_requests_resync(self):
+        self.hub = RealtimeHub(max_queue=4)
+        socket = FakeSocket()
+        socket.gate.clear()
+        await self.hub.connect(socket)
+        for index in range(10):
+            await self.hub.broadcast("new_message", {"ticket_id": str(index)})
+        await self.hub.broadcast("typing", {"ticket_id": "1", "user": "mod"})
+        socket.gate.set()
+        await asyncio.sleep(0.01)
+
+        self.assertEqual(socket.events(), ["resync"] + ["new_message"] * 4)
+        self.assertEqual([frame["payload"]["ticket_id"] for frame in socket.frames[1:]], ["6", "7", "8", "9"])
+        stats = self.hub.stats()
+        self.assertEqual((stats["frames_dropped"], stats["resyncs"]), (7, 1))
+        self.assertEqual(socket.frames[0]["payload"], {"dropped": 7})
+
+    async def test_stalled_socket_is_closed(self):
+        self.hub = RealtimeHub(send_timeout=0.02)
+        socket = FakeSocket()
+        socket.gate.clear()
+        await self.hub.connect(socket)
+        self.hub.send_to(socket, "ready", {})
+        await asyncio.sleep(0.05)
+
+        self.assertEqual(socket.closed, 1011)
+        self.assertEqual(self.hub.stats()["connections"], 0)
+        self.assertEqual(self.hub.stats()["slow_disconnects"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+
+import text_signals
+from text_signals import KeywordMatcher
+
+
+class KeywordMatcherTests(unittest.TestCase):
+    def test_keywords_match_on_word_boundaries(self):
+        self.assertIsNone(text_signals.detect_category("my album is great"))
+        self.assertEqual(text_signals.detect_category("leaderboard question"), "lb")
+        self.assertEqual(text_signals.detect_intent("is this a raffle"), "query")
+        self.assertEqual(text_signals.detect_sentiment("I know the rules"), "neutral")
+        self.assertEqual(text_signals.detect_sentiment("need it now"), "urgent")
+
+    def test_inflections_and_nested_phrases(self):
+        self.assertEqual(text_signals.detect_category("my deposits are missing"), "deposit")
+        self.assertEqual(text_signals.detect_giveaway_platform("I retweeted it"), "twitter")
+        # "i won the giveaway" wins at its offset but still reports the shorter "won".
+        signals = text_signals.scan("I won the giveaway")
+        self.assertIn("category:gw", signals)
+        self.assertIn("intent:support", signals)
+        self.assertIn("mention:won", signals)
+
+    def test_overlapping_phrases_at_different_offsets(self):
+        matcher = KeywordMatcher({"a": ["code donde"], "b": ["donde code"]})
+        self.assertEqual(matcher.scan("donde code donde"), frozenset({"a", "b"}))
+
+    def test_proof_signals_respect_flow(self):
+        signals = text_signals.text_proof_signals("kyc done, code proof attached", "50bonus")
+        self.assertTrue(signals["kyc_detected"])
+        self.assertTrue(signals["code_proof_detected"])
+        self.assertFalse(text_signals.text_proof_signals("kyc done", "gw")["kyc_detected"])
+
+
+if __name__ == "__main__":
+    unittest.main()
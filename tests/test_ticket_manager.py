@@ -0,0 +1,319 @@
+import json
+import os
+import unittest
+
+import ticket_manager as tm
+from ticket_sqlite import SqliteTicketStore
+
+
+class ConversationLogTests(unittest.TestCase):
+    def setUp(self):
+        self.ticket_id = f"{self._testMethodName}"
+        tm.clear_conversation(self.ticket_id)
+
+    def test_append_and_load_round_trip(self):
+        tm.append_message(self.ticket_id, "user", "hello", author="Tester")
+        tm.append_message(self.ticket_id, "assistant", "hi there", attachments=[{"filename": "a.png"}])
+        conversation = tm.load_conversation(self.ticket_id)
+        self.assertEqual([item["text"] for item in conversation], ["hello", "hi there"])
+        self.assertEqual(conversation[1]["attachments"][0]["filename"], "a.png")
+        lines = tm.conversation_path(self.ticket_id).read_text(encoding="utf-8").splitlines()
+        self.assertEqual(len(lines), 3)
+
+    def test_legacy_json_is_migrated_on_first_access(self):
+        legacy = tm.legacy_conversation_path(self.ticket_id)
+        legacy.write_text(json.dumps([{"role": "user", "text": "old", "timestamp": "2024-01-01T00:00:00+00:00"}]), encoding="utf-8")
+        tm.append_message(self.ticket_id, "user", "new")
+        conversation = tm.load_conversation(self.ticket_id)
+        self.assertEqual([item["text"] for item in conversation], ["old", "new"])
+        self.assertFalse(legacy.exists())
+        self.assertIn(self.ticket_id, tm.list_ticket_ids())
+
+    def test_reads_are_pure_until_migrate(self):
+        legacy = tm.legacy_conversation_path(self.ticket_id)
+        legacy.write_text(json.dumps([{"role": "user", "text": "no timestamp"}]), encoding="utf-8")
+        before = legacy.stat().st_mtime_ns
+        first = tm.load_conversation(self.ticket_id)
+        second = tm.load_conversation(self.ticket_id)
+        self.assertEqual(first[0]["timestamp"], second[0]["timestamp"])
+        self.assertEqual(legacy.stat().st_mtime_ns, before)
+        self.assertFalse(tm.conversation_path(self.ticket_id).exists())
+
+        report = tm.migrate(force=True)
+        self.assertGreaterEqual(report["conversations_converted"], 1)
+        self.assertEqual(tm.schema_version(), tm.SCHEMA_VERSION)
+        self.assertFalse(legacy.exists())
+        self.assertEqual(tm.load_conversation(self.ticket_id)[0]["timestamp"], first[0]["timestamp"])
+
+    def test_torn_trailing_line_is_skipped(self):
+        tm.append_message(self.ticket_id, "user", "first")
+        with tm.conversation_path(self.ticket_id).open("a", encoding="utf-8") as handle:
+            handle.write('{"role": "user", "te')
+        tm.append_message(self.ticket_id, "user", "second")
+        conversation = tm.load_conversation(self.ticket_id)
+        self.assertEqual([item["text"] for item in conversation], ["first", "second"])
+
+
+class StatusTests(unittest.TestCase):
+    def test_status_lives_in_ticket_metadata(self):
+        tm.set_ticket_status("status-single", "ESCALATED")
+        self.assertEqual(tm.get_ticket_status("status-single"), "ESCALATED")
+        self.assertEqual(tm.load_ticket_meta("status-single")["status"], "ESCALATED")
+        self.assertEqual(tm.get_ticket_status("status-missing"), "OPEN")
+        self.assertIsNone(tm.get_ticket_status("status-missing", None))
+
+    def test_bulk_update_and_legacy_map_fallback(self):
+        tm.STATUS_FILE.write_text(json.dumps({"status-legacy": "PAUSED", "status-bulk": "PAUSED"}), encoding="utf-8")
+        self.assertEqual(tm.get_ticket_status("status-legacy"), "PAUSED")
+        tm.set_ticket_status("status-bulk", "CLOSED")
+        self.assertEqual(tm.get_ticket_status("status-bulk"), "CLOSED")
+
+        tm.migrate(force=True)
+        self.assertFalse(tm.STATUS_FILE.exists())
+        self.assertEqual(tm.get_ticket_status("status-legacy"), "PAUSED")
+        self.assertEqual(tm.get_ticket_status("status-bulk"), "CLOSED")
+
+    def test_status_map_is_served_from_the_summary_index(self):
+        tm.set_ticket_status("status-map-a", "ESCALATED")
+        tm.set_ticket_status("status-map-b", "CLOSED")
+        get_ticket_status = tm.get_ticket_status
+
+        def guarded(ticket_id, *args, **kwargs):
+            if str(ticket_id).startswith("status-map"):
+                self.fail("status read from the metadata file")
+            return get_ticket_status(ticket_id, *args, **kwargs)
+
+        tm.get_ticket_status = guarded
+        try:
+            statuses = tm.load_status_map()
+        finally:
+            tm.get_ticket_status = get_ticket_status
+        self.assertEqual((statuses["status-map-a"], statuses["status-map-b"]), ("ESCALATED", "CLOSED"))
+
+
+class DurableWriteTests(unittest.TestCase):
+    def test_metadata_is_replaced_atomically_and_compact(self):
+        tm.save_ticket_meta("atomic-meta", {"category": "gw"})
+        tm.save_ticket_meta("atomic-meta", {"assigned_to": "alice"})
+        text = tm.metadata_path("atomic-meta").read_text(encoding="utf-8")
+        self.assertNotIn("\n", text)
+        self.assertEqual(json.loads(text)["category"], "gw")
+        self.assertEqual(list(tm.META_DIR.glob(".*.tmp")), [])
+
+
+class CacheTests(unittest.TestCase):
+    def test_cached_reads_see_writes_from_other_processes(self):
+        ticket_id = "cache-external"
+        tm.save_ticket_meta(ticket_id, {"assigned_to": "alice"})
+        self.assertEqual(tm.load_ticket_meta(ticket_id)["assigned_to"], "alice")
+        path = tm.metadata_path(ticket_id)
+        path.write_text(json.dumps({"assigned_to": "bob-from-dashboard"}), encoding="utf-8")
+        self.assertEqual(tm.load_ticket_meta(ticket_id)["assigned_to"], "bob-from-dashboard")
+
+    def test_append_updates_cached_conversation_without_reparse(self):
+        ticket_id = "cache-append"
+        tm.clear_conversation(ticket_id)
+        tm.append_message(ticket_id, "user", "one")
+        tm.load_conversation(ticket_id)
+        hits = tm.cache_stats()["hits"]
+        tm.append_message(ticket_id, "user", "two")
+        conversation = tm.load_conversation(ticket_id)
+        self.assertEqual([item["text"] for item in conversation], ["one", "two"])
+        self.assertEqual(tm.cache_stats()["hits"], hits + 1)
+
+    def test_append_racing_another_writer_drops_cached_conversation(self):
+        ticket_id = "cache-append-race"
+        tm.clear_conversation(ticket_id)
+        tm.append_message(ticket_id, "user", "one")
+        tm.load_conversation(ticket_id)
+        path = tm.conversation_path(ticket_id)
+        foreign = json.dumps(tm.normalize_message({"role": "admin", "text": "from dashboard"})) + "\n"
+        sync_after_write = tm._sync_after_write
+
+        def other_process_appends(target, fileno):
+            with path.open("a", encoding="utf-8") as handle:
+                handle.write(foreign)
+
+        tm._sync_after_write = other_process_appends
+        try:
+            tm.append_message(ticket_id, "user", "two")
+        finally:
+            tm._sync_after_write = sync_after_write
+        conversation = tm.load_conversation(ticket_id)
+        self.assertEqual([item["text"] for item in conversation], ["one", "two", "from dashboard"])
+
+
+class AttachmentStoreTests(unittest.TestCase):
+    def test_same_bytes_share_one_blob_and_names_do_not_collide(self):
+        first = tm.store_attachment("blob-a", "image.png", b"winner proof")
+        second = tm.store_attachment("blob-b", "proof.png", b"winner proof")
+        renamed = tm.store_attachment("blob-a", "image.png", b"different screenshot")
+        sha256 = tm.load_attachment_manifest("blob-a")["image.png"]["sha256"]
+
+        self.assertEqual(first.read_bytes(), b"winner proof")
+        self.assertEqual(os.stat(first).st_ino, os.stat(tm.blob_path(sha256)).st_ino)
+        self.assertEqual(os.stat(second).st_ino, os.stat(first).st_ino)
+        self.assertNotEqual(renamed.name, "image.png")
+        self.assertEqual(first.read_bytes(), b"winner proof")
+
+    def test_release_collects_only_unreferenced_blobs(self):
+        shared = tm.store_attachment("release-a", "a.png", b"shared bytes")
+        tm.store_attachment("release-b", "b.png", b"shared bytes")
+        tm.store_attachment("release-a", "own.png", b"only in a")
+        own_blob = tm.blob_path(tm.load_attachment_manifest("release-a")["own.png"]["sha256"])
+
+        report = tm.release_ticket_attachments("release-a")
+        self.assertEqual(report, {"files_released": 2, "blobs_removed": 1})
+        self.assertFalse(shared.exists())
+        self.assertFalse(own_blob.exists())
+        self.assertEqual((tm.attachment_dir("release-b") / "b.png").read_bytes(), b"shared bytes")
+
+    def test_migration_links_existing_folders(self):
+        folder = tm.attachment_dir("legacy-attachments")
+        (folder / "old.png").write_bytes(b"legacy bytes")
+        (tm.attachment_dir("legacy-attachments-2") / "copy.png").write_bytes(b"legacy bytes")
+        report = tm._migrate_attachment_blobs()
+        self.assertGreaterEqual(report["attachments_linked"], 2)
+        sha256 = tm.load_attachment_manifest("legacy-attachments")["old.png"]["sha256"]
+        copy = tm.attachment_dir("legacy-attachments-2") / "copy.png"
+        self.assertEqual(os.stat(folder / "old.png").st_ino, os.stat(tm.blob_path(sha256)).st_ino)
+        self.assertEqual(os.stat(copy).st_ino, os.stat(tm.blob_path(sha256)).st_ino)
+
+    def test_blob_store_moves_out_of_served_attachments(self):
+        for path in (tm.BLOB_DIR, tm.MANIFEST_DIR):
+            self.assertNotIn(tm.ATTACHMENTS_DIR.resolve(), path.resolve().parents)
+        ticket_file = tm.attachment_dir("moved-store") / "proof.png"
+        ticket_file.write_bytes(b"pre-move blob")
+        legacy_blob = tm.LEGACY_BLOB_DIR / "ab" / "cd" / "abcd-moved"
+        legacy_blob.parent.mkdir(parents=True, exist_ok=True)
+        os.link(ticket_file, legacy_blob)
+        tm.LEGACY_MANIFEST_DIR.mkdir(parents=True, exist_ok=True)
+        (tm.LEGACY_MANIFEST_DIR / "moved-store.json").write_text(json.dumps({"proof.png": {"sha256": "abcd-moved"}}))
+        tm.store_attachment("moved-store", "new.png", b"post-upgrade upload")
+
+        report = tm._move_attachment_store()
+        self.assertGreaterEqual(report["attachment_store_paths_moved"], 2)
+        self.assertFalse(tm.LEGACY_BLOB_DIR.exists())
+        self.assertFalse(tm.LEGACY_MANIFEST_DIR.exists())
+        self.assertEqual(os.stat(tm.blob_path("abcd-moved")).st_ino, os.stat(ticket_file).st_ino)
+        self.assertEqual(set(tm.load_attachment_manifest("moved-store")), {"proof.png", "new.png"})
+
+
+class ConversationWindowTests(unittest.TestCase):
+    def setUp(self):
+        self.ticket_id = f"{self._testMethodName}"
+        tm.clear_conversation(self.ticket_id)
+
+    def window(self, **kwargs):
+        tm._cache.clear()  # force the offset index path rather than the cached conversation
+        tm._offsets.clear()
+        return tm.load_conversation_window(self.ticket_id, **kwargs)
+
+    def test_windows_match_slices_of_the_full_log(self):
+        tm.append_entries(self.ticket_id, [{"role": "user", "text": f"m{index}"} for index in range(120)])
+        with tm.conversation_path(self.ticket_id).open("a", encoding="utf-8") as handle:
+            handle.write('{"role": "user", "te')
+        tm.append_entries(self.ticket_id, [{"role": "user", "text": f"m{index}"} for index in range(120, 130)])
+        conversation = tm.load_conversation(self.ticket_id)
+
+        newest = self.window()
+        self.assertEqual(newest["messages"], conversation[-tm.CONVERSATION_WINDOW:])
+        self.assertEqual((newest["total"], newest["start"], newest["has_more_before"]), (130, 80, True))
+        self.assertEqual(self.window(before=80, limit=10)["messages"], conversation[70:80])
+        after = self.window(after=124, limit=10)
+        self.assertEqual(after["messages"], conversation[125:])
+        self.assertFalse(after["has_more_after"])
+        self.assertEqual(self.window(after=200)["messages"], [])
+        self.assertTrue(tm.offset_index_path(self.ticket_id).exists())
+
+    def test_index_follows_appends_and_rewrites(self):
+        tm.append_message(self.ticket_id, "user", "one")
+        self.assertEqual([item["text"] for item in self.window()["messages"]], ["one"])
+        tm.append_message(self.ticket_id, "user", "two")
+        self.assertEqual([item["text"] for item in tm.load_conversation_window(self.ticket_id)["messages"]], ["one", "two"])
+
+        tm.save_conversation(self.ticket_id, [{"role": "user", "text": "rewritten"}])
+        self.assertEqual([item["text"] for item in self.window()["messages"]], ["rewritten"])
+        tm.clear_conversation(self.ticket_id)
+        self.assertFalse(tm.offset_index_path(self.ticket_id).exists())
+        self.assertEqual(self.window()["total"], 0)
+
+
+class SummaryIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.ticket_id = f"{self._testMethodName}"
+        tm.clear_conversation(self.ticket_id)
+
+    def test_incremental_row_matches_full_rebuild(self):
+        tm.append_message(self.ticket_id, "user", "i won the gw", author="Tester")
+        tm.append_entries(
+            self.ticket_id,
+            [
+                {"role": "user", "text": "screenshot", "attachments": [{"filename": "a.png"}]},
+                {"role": "assistant", "text": "checking", "intent": "gw"},
+            ],
+        )
+        tm.save_ticket_meta(self.ticket_id, {"category": "gw", "internal_notes": [{"text": "vip"}]})
+        tm.set_ticket_status(self.ticket_id, "ESCALATED")
+
+        row = tm.load_ticket_summary(self.ticket_id)
+        self.assertEqual(row, tm._rebuild_summary_row(self.ticket_id))
+        self.assertEqual((row["count"], row["attachments_count"], row["status"]), (3, 1, "ESCALATED"))
+        self.assertEqual((row["meta"]["category"], row["meta"]["note_count"]), ("gw", 1))
+        self.assertEqual(row["first_user_author"], "Tester")
+        self.assertIsNotNone(row["first_staff_at"])
+        self.assertIn(self.ticket_id, tm.load_ticket_summaries())
+
+    def test_other_instances_tail_appended_rows_and_compaction_keeps_latest(self):
+        path = tm.DATA_DIR / f"{self._testMethodName}.jsonl"
+        writer = tm.SummaryIndex(path, compact_min_lines=4)
+        reader = tm.SummaryIndex(path)
+        writer.put({"ticket_id": "1", "count": 1})
+        self.assertEqual(reader.get("1")["count"], 1)
+
+        for count in range(2, 6):
+            writer.put({"ticket_id": "1", "count": count})
+        writer.put({"ticket_id": "2", "count": 1})
+        self.assertLess(len(path.read_text(encoding="utf-8").splitlines()), 6)
+        self.assertEqual({key: row["count"] for key, row in reader.all().items()}, {"1": 5, "2": 1})
+
+
+class SqliteStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.db_path = tm.DATA_DIR / f"{self._testMethodName}.db"
+        self.store = SqliteTicketStore(self.db_path)
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_messages_meta_and_indexed_filters(self):
+        self.store.append_message("1", tm.normalize_message({"text": "a", "timestamp": "2024-01-01T00:00:00+00:00"}))
+        self.store.append_message("2", tm.normalize_message({"text": "b", "timestamp": "2024-01-02T00:00:00+00:00"}))
+        self.store.save_meta("1", {"status": "OPEN", "category": "gw"}, "2024-01-01T00:00:00+00:00")
+        self.store.save_meta("2", {"status": "CLOSED", "category": "gw"}, "2024-01-02T00:00:00+00:00")
+        self.store.save_meta("2", {"assigned_to": "alice"}, "2024-01-02T00:00:01+00:00")
+
+        self.assertEqual([item["text"] for item in self.store.load_conversation("1")], ["a"])
+        self.assertEqual(self.store.message_count("2"), 1)
+        self.assertEqual(self.store.load_meta("2")["category"], "gw")
+        self.assertEqual(self.store.query_ticket_ids(category="gw"), ["2", "1"])
+        self.assertEqual(self.store.query_ticket_ids(status="OPEN"), ["1"])
+        self.assertEqual(self.store.query_ticket_ids(assigned_to="alice"), ["2"])
+
+    def test_load_messages_by_position(self):
+        for index in range(5):
+            self.store.append_message("w", tm.normalize_message({"text": str(index)}))
+        self.assertEqual([item["text"] for item in self.store.load_messages("w", 1, 3)], ["1", "2"])
+
+    def test_import_from_json_files(self):
+        tm.clear_conversation("import-me")
+        tm.append_message("import-me", "user", "hello")
+        tm.set_ticket_status("import-me", "ESCALATED")
+        report = tm.import_json_to_sqlite(self.db_path)
+        self.assertGreaterEqual(report["tickets_imported"], 1)
+        self.assertEqual(self.store.get_status("import-me"), "ESCALATED")
+        self.assertEqual(self.store.load_conversation("import-me")[0]["text"], "hello")
+
+
+if __name__ == "__main__":
+    unittest.main()
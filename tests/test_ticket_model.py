@@ -0,0 +1,49 @@
+import json
+import unittest
+
+from ticket_model import ProofSignals, TicketState
+
+
+class ProofSignalsTests(unittest.TestCase):
+    def test_merge_keeps_detections_max_confidence_and_first_values(self):
+        signals = ProofSignals.from_dict({"winner_detected": True, "platform_hint": "unknown", "confidence": 0.4})
+        signals.merge({"winner_detected": False, "kyc_detected": True, "confidence": 0.9, "platform_hint": "twitter"})
+        signals.merge({"confidence": 0.2, "visible_text": "Winner: tester", "source": "gemini"})
+
+        self.assertTrue(signals.get("winner_detected"))
+        self.assertTrue(signals["kyc_detected"])
+        self.assertFalse(signals.get("deposit_detected"))
+        self.assertEqual(signals.get("confidence"), 0.9)
+        self.assertEqual(signals.get("platform_hint"), "unknown")
+        self.assertEqual(signals.get("source"), "gemini")
+        self.assertIsNone(signals.get("missing"))
+
+    def test_to_dict_round_trips(self):
+        signals = ProofSignals.from_dict({"code_proof_detected": True, "visible_text": "code donde", "confidence": 0.7})
+        data = signals.to_dict()
+        self.assertEqual(ProofSignals.from_dict(data).to_dict(), data)
+        self.assertEqual(data["code_proof_detected"], True)
+        self.assertEqual(data["youtube_proof_detected"], False)
+
+
+class TicketStateTests(unittest.TestCase):
+    def test_mapping_access_and_json_round_trip(self):
+        state = TicketState()
+        state["flow"] = "gw"
+        state["proof_signals"] = {"winner_detected": True}
+        state.attachments_total += 2
+
+        self.assertEqual((state.get("flow"), state["attachments_total"]), ("gw", 2))
+        self.assertEqual(state.get("username", "none"), "none")
+        self.assertTrue(state.get("proof_signals", {}).get("winner_detected"))
+        with self.assertRaises(KeyError):
+            state["not_a_field"] = 1
+
+        encoded = json.loads(json.dumps(state.to_dict()))
+        restored = TicketState.from_dict({**encoded, "retired_key": "ignored"})
+        self.assertEqual(restored, TicketState.from_dict(encoded))
+        self.assertEqual(restored.to_dict(), state.to_dict())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+
+from ticket_query import InvalidCursor, TicketFilters, TicketListIndex
+
+NOW = 1_704_067_200.0  # 2024-01-01T00:00:00+00:00
+
+
+def row(ticket_id, status="OPEN", *, minute=0, count=1, category="general", priority="LOW", text="hello"):
+    return {
+        "ticket_id": str(ticket_id),
+        "status": status,
+        "count": count,
+        "category": category,
+        "priority": priority,
+        "last_message": text,
+        "last_message_at": f"2023-12-31T23:{minute:02d}:00+00:00",
+    }
+
+
+class TicketListIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.built = []
+
+        def build_card(item):
+            self.built.append(item["ticket_id"])
+            return {**item, "intent": "query", "user_name": f"user-{item['ticket_id']}", "tags": []}
+
+        self.index = TicketListIndex(build_card)
+
+    def test_pages_follow_cursor_through_all_matches(self):
+        self.index.refresh({str(index): row(index, minute=index) for index in range(7)})
+        seen = []
+        cursor = None
+        while True:
+            page = self.index.page(TicketFilters(), limit=3, cursor=cursor, now=NOW)
+            seen.extend(ticket["ticket_id"] for ticket in page["tickets"])
+            self.assertEqual(page["total"], 7)
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        self.assertEqual(seen, ["6", "5", "4", "3", "2", "1", "0"])
+
+    def test_cursor_stays_valid_when_tickets_change(self):
+        rows = {str(index): row(index, minute=index) for index in range(4)}
+        self.index.refresh(rows)
+        first = self.index.page(TicketFilters(), limit=2, now=NOW)
+        self.index.refresh({**rows, "9": row(9, minute=30)})
+        second = self.index.page(TicketFilters(), limit=2, cursor=first["next_cursor"], now=NOW)
+        self.assertEqual([ticket["ticket_id"] for ticket in second["tickets"]], ["1", "0"])
+        with self.assertRaises(InvalidCursor):
+            self.index.page(TicketFilters(sort="oldest"), limit=2, cursor=first["next_cursor"], now=NOW)
+
+    def test_filters_combine_posting_sets_text_and_overdue(self):
+        self.index.refresh(
+            {
+                "1": row(1, minute=59, category="gw", priority="HIGH", text="Raffle winner"),
+                "2": row(2, minute=10, category="gw", priority="HIGH"),
+                "3": row(3, "CLOSED", minute=5, category="gw", priority="HIGH"),
+                "4": row(4, minute=20, category="deposit"),
+            }
+        )
+
+        def ids(**filters):
+            return [ticket["ticket_id"] for ticket in self.index.page(TicketFilters(**filters), limit=10, now=NOW)["tickets"]]
+
+        self.assertEqual(ids(category="gw", priority="HIGH"), ["1", "2", "3"])
+        self.assertEqual(ids(category="gw", overdue=True), ["2"])
+        self.assertEqual(ids(overdue=False, status="OPEN"), ["1"])
+        self.assertEqual(ids(q="WINNER"), ["1"])
+        self.assertEqual(ids(status="PAUSED"), [])
+        self.assertEqual(ids(sort="oldest", category="gw"), ["3", "2", "1"])
+
+    def test_refresh_rebuilds_only_changed_rows(self):
+        rows = {"1": row(1), "2": row(2)}
+        self.index.refresh(rows)
+        self.index.refresh({"1": rows["1"], "2": row(2, "CLOSED")})
+        self.index.refresh({"2": row(2, "CLOSED")})
+
+        self.assertEqual(self.built, ["1", "2", "2"])
+        self.assertEqual(self.index.page(TicketFilters(status="OPEN"), limit=5, now=NOW)["total"], 0)
+        self.assertEqual(len(self.index), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
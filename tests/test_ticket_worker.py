@@ -0,0 +1,155 @@
+import asyncio
+import time
+import unittest
+
+from ticket_worker import TicketRegistry, TicketTurnQueue
+
+
+class TicketTurnQueueTests(unittest.IsolatedAsyncioTestCase):
+    async def test_burst_is_merged_into_one_turn(self):
+        turns = []
+
+        async def handle(ticket_id, items, turn):
+            turns.append((ticket_id, items))
+
+        queue = TicketTurnQueue(handle, debounce=0.05)
+        for text in ("hi", "i won the gw", "on twitter"):
+            queue.submit(7, text)
+            await asyncio.sleep(0.01)
+        queue.submit(8, "raffle?")
+        await queue.drain()
+
+        self.assertEqual(sorted(turns), [("7", ["hi", "i won the gw", "on twitter"]), ("8", ["raffle?"])])
+        stats = queue.stats()
+        self.assertEqual((stats["turns"], stats["merged"], stats["active_tickets"]), (2, 2, 0))
+
+    async def test_turns_for_one_ticket_never_overlap(self):
+        running = 0
+        peak = 0
+        seen = []
+
+        async def handle(ticket_id, items, turn):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.03)
+            seen.extend(items)
+            running -= 1
+
+        queue = TicketTurnQueue(handle, debounce=0)
+        queue.submit(1, "a")
+        await asyncio.sleep(0.01)
+        queue.submit(1, "b")
+        queue.submit(1, "c")
+        await queue.drain()
+
+        self.assertEqual(peak, 1)
+        self.assertEqual(seen, ["a", "b", "c"])
+        self.assertEqual(queue.stats()["turns"], 2)
+
+    async def test_newer_message_supersedes_in_flight_turn(self):
+        replies = []
+
+        async def handle(ticket_id, items, turn):
+            await asyncio.sleep(0.03)  # stands in for the Gemini call
+            if turn.superseded:
+                turn.drop()
+                return
+            replies.append(items)
+
+        queue = TicketTurnQueue(handle, debounce=0)
+        queue.submit(5, "first")
+        await asyncio.sleep(0.01)
+        queue.submit(5, "second")
+        await queue.drain()
+
+        self.assertEqual(replies, [["second"]])
+        self.assertEqual(queue.stats()["dropped"], 1)
+
+    async def test_newer_message_cancels_the_interruptible_call(self):
+        cancelled = asyncio.Event()
+        replies = []
+
+        async def slow_ai():
+            try:
+                await asyncio.sleep(5)  # stands in for a limiter wait plus the Gemini call
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return "late"
+
+        async def handle(ticket_id, items, turn):
+            if items == ["first"]:
+                replies.append(await turn.interruptible(slow_ai()))
+            else:
+                replies.append(await turn.interruptible(asyncio.sleep(0, result="fresh")))
+
+        queue = TicketTurnQueue(handle, debounce=0)
+        queue.submit(5, "first")
+        await asyncio.sleep(0.01)
+        queue.submit(5, "second")
+        await asyncio.wait_for(queue.drain(), timeout=1)
+
+        self.assertTrue(cancelled.is_set())
+        self.assertEqual(replies, [None, "fresh"])
+        self.assertEqual(queue.stats()["interrupted"], 1)
+
+    async def test_max_wait_caps_a_continuous_burst(self):
+        turns = []
+
+        async def handle(ticket_id, items, turn):
+            turns.append(list(items))
+
+        queue = TicketTurnQueue(handle, debounce=0.04, max_wait=0.06)
+        for index in range(6):
+            queue.submit(3, index)
+            await asyncio.sleep(0.02)
+        await queue.drain()
+
+        self.assertGreater(len(turns), 1)
+        self.assertEqual([item for turn in turns for item in turn], list(range(6)))
+
+
+class TicketRegistryTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.persisted = {}
+        self.busy = set()
+        self.registry = TicketRegistry(
+            lambda ticket_id, state: self.persisted.__setitem__(ticket_id, dict(state)),
+            max_tickets=2,
+            idle_ttl=60,
+            in_use=self.busy.__contains__,
+        )
+
+    async def test_least_recently_used_ticket_is_persisted_and_evicted(self):
+        self.registry[1] = {"flow": "gw"}
+        self.registry[2] = {"flow": "deposit"}
+        self.registry.get(1)
+        self.registry[3] = {"flow": "lb"}
+
+        self.assertNotIn(2, self.registry)
+        self.assertEqual(self.persisted, {"2": {"flow": "deposit"}})
+        self.assertEqual((self.registry[1]["flow"], self.registry[3]["flow"]), ("gw", "lb"))
+        self.assertEqual(self.registry.stats()["evicted"], 1)
+
+    async def test_idle_tickets_expire_unless_busy(self):
+        self.registry[1] = {"flow": "gw"}
+        self.registry[2] = {"flow": "raffle"}
+        self.busy.add("2")
+
+        self.assertEqual(self.registry.sweep(now=time.monotonic() + 120), 1)
+        self.assertEqual(list(self.persisted), ["1"])
+        self.assertIn(2, self.registry)
+
+    async def test_evict_waits_for_held_lock(self):
+        self.registry[4] = {"flow": "gw"}
+        lock = self.registry.lock(4)
+        async with lock:
+            self.assertFalse(self.registry.evict(4))
+        self.assertTrue(self.registry.evict(4))
+        self.assertEqual(self.persisted["4"], {"flow": "gw"})
+        self.assertEqual(len(self.registry), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
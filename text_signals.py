@@ -0,0 +1,197 @@
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence, Set
+
+CATEGORY_MAP = {
+    "50bonus": ["50$", "50 usd", "50 bonus", "50 free", "50free", "50usd", "50 bonus claim"],
+    "deposit": ["deposit", "deposit bonus", "reload", "reload bonus", "claim deposit"],
+    "gw": [
+        "win gw",
+        "won gw",
+        "win giveaway",
+        "won giveaway",
+        "won the gw",
+        "win the gw",
+        "win giveaways",
+        "won giveaways",
+        "i won",
+        "i won gw",
+        "i won the giveaway",
+        "i won giveaway",
+    ],
+    "lb": ["leaderboard", "lb", "top wager", "leader board"],
+    "raffle": ["raffle", "raffles"],
+}
+
+INTENT_KEYWORDS = {
+    "complaint": ["issue", "problem", "not working", "angry", "refund", "complaint"],
+    "casual": ["hi", "hii", "hiii", "hello", "helloo", "hey", "yo", "bro"],
+    "support": ["help", "claim", "payout", "bonus", "deposit", "won"],
+}
+
+PLATFORM_KEYWORDS = {
+    "twitter": ["twitter", "x.com", "x giveaway", "tweet", "retweet"],
+    "discord": ["discord"],
+    "kick": ["kick"],
+}
+
+PROOF_KEYWORDS = {
+    "winner": ["winner", "won", "giveaway", "gw win"],
+    "deposit": ["deposit", "payment"],
+    "kyc": ["kyc"],
+    "code": ["donde code", "code proof", "used code donde", "code donde"],
+    "youtube": ["youtube", "yt proof", "yt comment", "comment proof"],
+    "supporting": ["supporting proof", "extra proof"],
+}
+
+EXISTING_PROOF_PHRASES = [
+    "already attached",
+    "i attached",
+    "sent screenshot",
+    "i sent proof",
+    "already sent",
+    "uploaded already",
+]
+
+SENTIMENT_KEYWORDS = {
+    "angry": ["scam", "fraud", "angry", "worst", "refund", "useless", "idiot"],
+    "urgent": ["urgent", "asap", "immediately", "fast", "now", "quick"],
+    "positive": ["thanks", "thank you", "nice", "okay", "cool"],
+}
+
+MENTION_KEYWORDS = {
+    "donde": ["donde"],
+    "first_ever": ["first-ever"],
+    "won": ["won"],
+    "giveaway": ["giveaway"],
+    "leaderboard": ["leaderboard", "top wager", "lb"],
+    "raffle": ["raffle"],
+    "gw_hint": ["payout", "winner", "won", "giveaway", "gw"],
+}
+
+_BOUNDARY_CHARS = "a-z0-9"
+_INFLECTIONS = "(?:s|es|ed|ing)?"
+
+
+def _phrase_pattern(phrase: str) -> str:
+    pattern = re.escape(phrase)
+    # Longer words also match their plural/past forms ("deposits", "retweeted"); short
+    # tokens such as "hi" or "yo" must stay exact or they match "his"/"you".
+    if len(phrase) >= 4 and phrase[-1].isalpha():
+        pattern += _INFLECTIONS
+    return pattern
+
+
+class KeywordMatcher:
+    # Matches every keyword table in a single regex pass. Phrases only match on
+    # alphanumeric boundaries, so "lb" no longer fires inside "album" nor "now"
+    # inside "know". The scan is a zero-width lookahead at each position so
+    # overlapping phrases starting at different offsets are all reported.
+    def __init__(self, groups: Mapping[str, Iterable[str]], cache_size: int = 4096):
+        self._phrase_groups: Dict[str, Set[str]] = {}
+        for group, phrases in groups.items():
+            for phrase in phrases:
+                self._phrase_groups.setdefault(phrase.lower(), set()).add(group)
+
+        phrases = sorted(self._phrase_groups, key=len, reverse=True)
+        alternation = "|".join(_phrase_pattern(phrase) for phrase in phrases)
+        self._regex = re.compile(
+            rf"(?<![{_BOUNDARY_CHARS}])(?=({alternation})(?![{_BOUNDARY_CHARS}]))"
+        )
+        self._phrase_patterns = [(phrase, re.compile(rf"^{_phrase_pattern(phrase)}$")) for phrase in phrases]
+        # The alternation reports the longest phrase at a given offset; fold in the groups
+        # of shorter phrases that it contains so those are not lost.
+        nested: Dict[str, Set[str]] = {}
+        for phrase in phrases:
+            combined = set(self._phrase_groups[phrase])
+            for other in phrases:
+                if other != phrase and re.search(
+                    rf"(?<![{_BOUNDARY_CHARS}]){_phrase_pattern(other)}(?![{_BOUNDARY_CHARS}])", phrase
+                ):
+                    combined |= self._phrase_groups[other]
+            nested[phrase] = combined
+        self._nested = nested
+        self.scan = lru_cache(maxsize=cache_size)(self._scan)
+
+    def _groups_for(self, matched: str) -> Set[str]:
+        groups = self._nested.get(matched)
+        if groups is not None:
+            return groups
+        for phrase, pattern in self._phrase_patterns:
+            if pattern.match(matched):
+                return self._nested[phrase]
+        return set()
+
+    def _scan(self, text: str) -> FrozenSet[str]:
+        found: Set[str] = set()
+        for match in self._regex.finditer((text or "").lower()):
+            found |= self._groups_for(match.group(1))
+        return frozenset(found)
+
+    def first(self, text: str, prefix: str, order: Sequence[str]) -> Optional[str]:
+        signals = self.scan(text or "")
+        for name in order:
+            if f"{prefix}:{name}" in signals:
+                return name
+        return None
+
+    def has(self, text: str, group: str) -> bool:
+        return group in self.scan(text or "")
+
+
+def _prefixed(prefix: str, table: Mapping[str, List[str]]) -> Dict[str, List[str]]:
+    return {f"{prefix}:{name}": phrases for name, phrases in table.items()}
+
+
+matcher = KeywordMatcher(
+    {
+        **_prefixed("category", CATEGORY_MAP),
+        **_prefixed("intent", INTENT_KEYWORDS),
+        **_prefixed("platform", PLATFORM_KEYWORDS),
+        **_prefixed("proof", PROOF_KEYWORDS),
+        **_prefixed("sentiment", SENTIMENT_KEYWORDS),
+        **_prefixed("mention", MENTION_KEYWORDS),
+        "existing_proof": EXISTING_PROOF_PHRASES,
+    }
+)
+
+
+def scan(text: str) -> FrozenSet[str]:
+    return matcher.scan(text or "")
+
+
+def detect_category(text: str) -> Optional[str]:
+    return matcher.first(text, "category", list(CATEGORY_MAP))
+
+
+def detect_intent(text: str) -> str:
+    return matcher.first(text, "intent", ["complaint", "casual", "support"]) or "query"
+
+
+def detect_giveaway_platform(text: str) -> Optional[str]:
+    return matcher.first(text, "platform", ["twitter", "discord", "kick"])
+
+
+def detect_sentiment(text: str) -> str:
+    return matcher.first(text, "sentiment", ["angry", "urgent", "positive"]) or "neutral"
+
+
+def mentions_existing_proof(text: str) -> bool:
+    return matcher.has(text, "existing_proof")
+
+
+def mentions(text: str, name: str) -> bool:
+    return matcher.has(text, f"mention:{name}")
+
+
+def text_proof_signals(text: str, flow: Optional[str]) -> Dict[str, object]:
+    signals = scan(text)
+    return {
+        "winner_detected": flow == "gw" and "proof:winner" in signals,
+        "deposit_detected": flow == "deposit" and "proof:deposit" in signals,
+        "kyc_detected": flow == "50bonus" and "proof:kyc" in signals,
+        "code_proof_detected": "proof:code" in signals,
+        "youtube_proof_detected": "proof:youtube" in signals,
+        "supporting_proof_detected": "proof:supporting" in signals,
+        "platform_hint": detect_giveaway_platform(text) or "unknown",
+    }
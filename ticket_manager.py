@@ -1,8 +1,23 @@
+import hashlib
 import json
 import os
+import shutil
+import struct
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from ticket_sqlite import SqliteTicketStore
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
 
 DATA_DIR = Path(os.getenv("TICKET_DATA_DIR", "ticket_data"))
 DATA_DIR.mkdir(exist_ok=True)
@@ -13,10 +28,34 @@ STATUS_FILE = DATA_DIR / "ticket_status.json"
 CONV_DIR = DATA_DIR / "conversations"
 META_DIR = DATA_DIR / "metadata"
 ATTACHMENTS_DIR = DATA_DIR / "attachments"
+LOCK_DIR = DATA_DIR / "locks"
+# Siblings of ATTACHMENTS_DIR, which the dashboard serves as static files: the
+# blob store and manifests would otherwise expose every ticket's attachments.
+BLOB_DIR = DATA_DIR / "attachment_blobs"
+MANIFEST_DIR = DATA_DIR / "attachment_manifests"
+LEGACY_BLOB_DIR = ATTACHMENTS_DIR / "blobs"
+LEGACY_MANIFEST_DIR = ATTACHMENTS_DIR / "manifests"
+SUMMARY_INDEX_FILE = DATA_DIR / "ticket_index.jsonl"
+LOG_VERSION = 1
+SCHEMA_VERSION = 5
+SCHEMA_FILE = DATA_DIR / "schema.json"
+CACHE_SIZE = int(os.getenv("TICKET_CACHE_SIZE", "512"))
+FSYNC_MODE = os.getenv("TICKET_FSYNC", "off").strip().lower()
+FSYNC_INTERVAL = float(os.getenv("TICKET_FSYNC_INTERVAL", "1.0"))
+STORAGE_BACKEND = os.getenv("TICKET_STORAGE_BACKEND", "json").strip().lower()
+DB_PATH = Path(os.getenv("TICKET_DB_PATH", str(DATA_DIR / "tickets.db")))
+ATTACHMENT_GC_ON_CLOSE = os.getenv("ATTACHMENT_GC_ON_CLOSE", "0").strip().lower() in {"1", "on", "true", "yes"}
+# Blobs younger than this are never collected, so a link being created right now is not raced.
+ATTACHMENT_GC_MIN_AGE = float(os.getenv("ATTACHMENT_GC_MIN_AGE_SECONDS", "3600"))
 
 CONV_DIR.mkdir(exist_ok=True)
 META_DIR.mkdir(exist_ok=True)
 ATTACHMENTS_DIR.mkdir(exist_ok=True)
+LOCK_DIR.mkdir(exist_ok=True)
+
+if STORAGE_BACKEND not in {"json", "sqlite"}:
+    raise SystemExit(f"Unsupported TICKET_STORAGE_BACKEND `{STORAGE_BACKEND}`")
+_store: Optional[SqliteTicketStore] = SqliteTicketStore(DB_PATH) if STORAGE_BACKEND == "sqlite" else None
 
 
 def utc_timestamp() -> str:
@@ -33,17 +72,172 @@ def _load_json(path: Path, default: Any):
         return default
 
 
-def _save_json(path: Path, payload: Any):
+class GroupCommit:
+    # Batches fsync calls: writes mark their file dirty and a background thread
+    # syncs every dirty file once per interval.
+    def __init__(self, interval: float):
+        self.interval = max(interval, 0.01)
+        self.syncs = 0
+        self._dirty: Set[Path] = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def mark(self, path: Path):
+        with self._lock:
+            self._dirty.add(path)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="ticket-fsync", daemon=True)
+                self._thread.start()
+
+    def flush(self):
+        with self._lock:
+            pending, self._dirty = self._dirty, set()
+        for path in pending:
+            try:
+                with path.open("rb") as handle:
+                    os.fsync(handle.fileno())
+                self.syncs += 1
+            except FileNotFoundError:
+                continue
+            except Exception as exc:
+                print(f"[WARN] Failed to fsync {path.name}: {exc}")
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+
+_group_commit = GroupCommit(FSYNC_INTERVAL)
+
+
+def _sync_after_write(path: Path, fileno: int):
+    if FSYNC_MODE == "always":
+        os.fsync(fileno)
+    elif FSYNC_MODE == "batch":
+        _group_commit.mark(path)
+
+
+def _atomic_write_text(path: Path, text: str):
+    _atomic_write_bytes(path, text.encode("utf-8"))
+
+
+def _atomic_write_bytes(path: Path, data: bytes):
+    # Readers in the other process see either the old file or the new one, never a partial write.
     path.parent.mkdir(exist_ok=True)
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
     try:
-        path.write_text(
-            json.dumps(payload, ensure_ascii=False, indent=2),
-            encoding="utf-8",
-        )
+        with temp_path.open("wb") as handle:
+            handle.write(data)
+            handle.flush()
+            if FSYNC_MODE == "always":
+                os.fsync(handle.fileno())
+        os.replace(temp_path, path)
+    except Exception:
+        temp_path.unlink(missing_ok=True)
+        raise
+    if FSYNC_MODE == "batch":
+        _group_commit.mark(path)
+
+
+def _save_json(path: Path, payload: Any, *, compact: bool = False):
+    try:
+        if compact:
+            text = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+        else:
+            text = json.dumps(payload, ensure_ascii=False, indent=2)
+        _atomic_write_text(path, text)
     except Exception as exc:
         print(f"[ERROR] Failed to save {path.name}: {exc}")
 
 
+Signature = Tuple[int, int]
+
+
+def _file_signature(path: Path) -> Optional[Signature]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class FileCache:
+    # Write-through LRU keyed by path. Entries are only trusted while the file's
+    # (mtime, size) signature is unchanged, so writes from another process are seen.
+    def __init__(self, max_entries: int):
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Path, Tuple[Signature, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: Path, signature: Optional[Signature]) -> Any:
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or signature is None or entry[0] != signature:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(path)
+            self.hits += 1
+            return entry[1]
+
+    def peek(self, path: Path) -> Optional[Tuple[Signature, Any]]:
+        with self._lock:
+            return self._entries.get(path)
+
+    def put(self, path: Path, signature: Optional[Signature], value: Any):
+        with self._lock:
+            if signature is None:
+                self._entries.pop(path, None)
+                return
+            self._entries[path] = (signature, value)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, path: Path):
+        with self._lock:
+            self._entries.pop(path, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+_cache = FileCache(CACHE_SIZE)
+
+
+def _cached_read(path: Path, loader: Callable[[Path], Any]) -> Any:
+    signature = _file_signature(path)
+    if signature is None:
+        _cache.discard(path)
+        return None
+    value = _cache.get(path, signature)
+    if value is None:
+        value = loader(path)
+        _cache.put(path, signature, value)
+    return value
+
+
+def _load_json_cached(path: Path, default: Any):
+    value = _cached_read(path, lambda target: _load_json(target, None))
+    return default if value is None else value
+
+
+def _save_json_cached(path: Path, payload: Any):
+    _save_json(path, payload, compact=True)
+    _cache.put(path, _file_signature(path), payload)
+
+
+def cache_stats() -> Dict[str, int]:
+    return _cache.stats()
+
+
 def _load_set(path: Path) -> Set[int]:
     data = _load_json(path, [])
     try:
@@ -54,55 +248,237 @@ def _load_set(path: Path) -> Set[int]:
 
 
 def _save_set(path: Path, values: Set[int]):
-    _save_json(path, sorted(values))
+    _save_json(path, sorted(values), compact=True)
 
 
 def load_active_channels() -> Set[int]:
+    if _store is not None:
+        return _store.load_set("active")
     return _load_set(ACTIVE_FILE)
 
 
 def save_active_channels(values: Set[int]):
+    if _store is not None:
+        _store.save_set("active", values)
+        return
     _save_set(ACTIVE_FILE, values)
 
 
 def load_paused_channels() -> Set[int]:
+    if _store is not None:
+        return _store.load_set("paused")
     return _load_set(PAUSED_FILE)
 
 
 def save_paused_channels(values: Set[int]):
+    if _store is not None:
+        _store.save_set("paused", values)
+        return
     _save_set(PAUSED_FILE, values)
 
 
-def load_status_map() -> Dict[str, str]:
-    return _load_json(STATUS_FILE, {})
+_thread_locks: Dict[str, threading.Lock] = {}
+_thread_locks_guard = threading.Lock()
+
 
+@contextmanager
+def ticket_lock(channel_id: int | str) -> Iterator[None]:
+    # Serializes read-modify-write of one ticket across threads and, where flock
+    # is available, across the bot and dashboard processes.
+    key = str(channel_id)
+    with _thread_locks_guard:
+        thread_lock = _thread_locks.setdefault(key, threading.Lock())
+    with thread_lock:
+        if fcntl is None:
+            yield
+            return
+        LOCK_DIR.mkdir(exist_ok=True)
+        with (LOCK_DIR / f"{key}.lock").open("a") as handle:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
 
-def save_status_map(values: Dict[str, str]):
-    _save_json(STATUS_FILE, values)
+
+def _legacy_status(channel_id: int | str) -> Optional[str]:
+    return _load_json_cached(STATUS_FILE, {}).get(str(channel_id))
+
+
+def get_ticket_status(channel_id: int | str, default: Optional[str] = "OPEN") -> Optional[str]:
+    if _store is not None:
+        return _store.get_status(str(channel_id)) or default
+    metadata = _load_json_cached(metadata_path(channel_id), {})
+    if "status_updated_at" in metadata:
+        return metadata.get("status") or default
+    return _legacy_status(channel_id) or metadata.get("status") or default
 
 
 def set_ticket_status(channel_id: int | str, status: str):
-    data = load_status_map()
-    data[str(channel_id)] = status
-    save_status_map(data)
+    save_ticket_meta(channel_id, {"status": status})
+    if status == "CLOSED" and ATTACHMENT_GC_ON_CLOSE:
+        release_ticket_attachments(channel_id)
+
+
+def load_status_map() -> Dict[str, str]:
+    # Summary rows carry the status and are kept current on every metadata write,
+    # so only tickets without an up-to-date row fall back to their metadata file.
+    rows = _store.load_summaries() if _store is not None else _summary_index.all()
+    statuses: Dict[str, str] = {}
+    for ticket_id in list_ticket_ids():
+        row = rows.get(ticket_id)
+        if row is not None and row.get("v") == SUMMARY_ROW_VERSION:
+            statuses[ticket_id] = row.get("status") or "OPEN"
+        else:
+            statuses[ticket_id] = get_ticket_status(ticket_id)
+    return statuses
 
 
 def conversation_path(channel_id: int | str) -> Path:
+    return CONV_DIR / f"conv_{channel_id}.jsonl"
+
+
+def legacy_conversation_path(channel_id: int | str) -> Path:
     return CONV_DIR / f"conv_{channel_id}.json"
 
 
+def offset_index_path(channel_id: int | str) -> Path:
+    return CONV_DIR / f"conv_{channel_id}.idx"
+
+
 def metadata_path(channel_id: int | str) -> Path:
     return META_DIR / f"meta_{channel_id}.json"
 
 
 def attachment_dir(channel_id: int | str) -> Path:
     folder = ATTACHMENTS_DIR / str(channel_id)
-    folder.mkdir(exist_ok=True)
+    folder.mkdir(parents=True, exist_ok=True)
     return folder
 
 
-def normalize_attachments(attachments: Optional[List[Any]]) -> List[Dict[str, str]]:
-    normalized: List[Dict[str, str]] = []
+def blob_path(sha256: str) -> Path:
+    return BLOB_DIR / sha256[:2] / sha256[2:4] / sha256
+
+
+def attachment_manifest_path(channel_id: int | str) -> Path:
+    return MANIFEST_DIR / f"{channel_id}.json"
+
+
+def load_attachment_manifest(channel_id: int | str) -> Dict[str, Dict[str, Any]]:
+    return _load_json(attachment_manifest_path(channel_id), {})
+
+
+def _ensure_blob(sha256: str, data: Optional[bytes] = None, source: Optional[Path] = None) -> Path:
+    path = blob_path(sha256)
+    if path.exists():
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        if source is not None:
+            try:
+                os.link(source, temp_path)
+            except OSError:
+                shutil.copyfile(source, temp_path)
+        else:
+            temp_path.write_bytes(data or b"")
+        os.replace(temp_path, path)
+    except Exception:
+        temp_path.unlink(missing_ok=True)
+        raise
+    return path
+
+
+def _link_blob(sha256: str, target: Path, data: Optional[bytes] = None, source: Optional[Path] = None):
+    # Ticket folders hold hard links to the blob, so the blob's link count is its refcount.
+    # Filesystems without hard links get a plain copy instead.
+    temp_path = target.with_name(f".{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    for _ in range(2):
+        blob = _ensure_blob(sha256, data, source)
+        try:
+            try:
+                os.link(blob, temp_path)
+            except FileNotFoundError:
+                continue  # collected between the two calls; recreate it
+            except OSError:
+                shutil.copyfile(blob, temp_path)
+            os.replace(temp_path, target)
+            return
+        except Exception:
+            temp_path.unlink(missing_ok=True)
+            raise
+    raise FileNotFoundError(blob_path(sha256))
+
+
+def store_attachment(
+    channel_id: int | str,
+    filename: str,
+    data: bytes,
+    sha256: Optional[str] = None,
+    content_type: str = "",
+) -> Path:
+    sha256 = sha256 or hashlib.sha256(data).hexdigest()
+    folder = attachment_dir(channel_id)
+    with ticket_lock(channel_id):
+        manifest = load_attachment_manifest(channel_id)
+        name = Path(filename).name or "attachment"
+        target = folder / name
+        if target.exists() and manifest.get(name, {}).get("sha256") != sha256:
+            # Another upload already uses this name ("image.png"); keep both.
+            name = f"{target.stem}-{sha256[:8]}{target.suffix}"
+            target = folder / name
+        if manifest.get(name, {}).get("sha256") != sha256 or not target.exists():
+            _link_blob(sha256, target, data=data)
+            manifest[name] = {
+                "sha256": sha256,
+                "size": len(data),
+                "content_type": content_type,
+                "stored_at": utc_timestamp(),
+            }
+            MANIFEST_DIR.mkdir(parents=True, exist_ok=True)
+            _save_json(attachment_manifest_path(channel_id), manifest, compact=True)
+    return target
+
+
+def release_ticket_attachments(channel_id: int | str) -> Dict[str, int]:
+    with ticket_lock(channel_id):
+        manifest = load_attachment_manifest(channel_id)
+        folder = ATTACHMENTS_DIR / str(channel_id)
+        for name in manifest:
+            (folder / name).unlink(missing_ok=True)
+        attachment_manifest_path(channel_id).unlink(missing_ok=True)
+    blobs_removed = 0
+    for entry in manifest.values():
+        path = blob_path(entry["sha256"])
+        try:
+            if path.stat().st_nlink <= 1:
+                path.unlink()
+                blobs_removed += 1
+        except FileNotFoundError:
+            continue
+    return {"files_released": len(manifest), "blobs_removed": blobs_removed}
+
+
+def gc_attachment_blobs(min_age: float = ATTACHMENT_GC_MIN_AGE) -> Dict[str, int]:
+    removed = 0
+    freed = 0
+    cutoff = time.time() - min_age
+    for path in BLOB_DIR.glob("*/*/*"):
+        if path.name.startswith("."):
+            continue
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        if stat.st_nlink <= 1 and stat.st_mtime < cutoff:
+            path.unlink(missing_ok=True)
+            removed += 1
+            freed += stat.st_size
+    return {"blobs_removed": removed, "bytes_freed": freed}
+
+
+def normalize_attachments(attachments: Optional[List[Any]]) -> List[Dict[str, Any]]:
+    normalized: List[Dict[str, Any]] = []
     for item in attachments or []:
         if isinstance(item, dict):
             filename = str(item.get("filename") or item.get("name") or "attachment")
@@ -116,24 +492,26 @@ def normalize_attachments(attachments: Optional[List[Any]]) -> List[Dict[str, st
             local_url = ""
             proxy_url = ""
             content_type = ""
-        normalized.append(
-            {
-                "filename": filename,
-                "url": url,
-                "local_url": local_url,
-                "proxy_url": proxy_url,
-                "content_type": content_type,
-            }
-        )
+        record = {
+            "filename": filename,
+            "url": url,
+            "local_url": local_url,
+            "proxy_url": proxy_url,
+            "content_type": content_type,
+        }
+        if isinstance(item, dict) and item.get("sha256"):
+            record["sha256"] = str(item["sha256"])
+            record["size"] = int(item.get("size") or 0)
+        normalized.append(record)
     return normalized
 
 
-def normalize_message(entry: Any) -> Dict[str, Any]:
+def normalize_message(entry: Any, default_timestamp: Optional[str] = None) -> Dict[str, Any]:
     if isinstance(entry, dict):
         text = str(entry.get("text") or entry.get("content") or "").strip()
         role = str(entry.get("role") or "user")
         author = entry.get("author") or ("Assistant" if role == "assistant" else "User")
-        timestamp = entry.get("timestamp") or utc_timestamp()
+        timestamp = entry.get("timestamp") or default_timestamp or utc_timestamp()
         kind = entry.get("kind") or "message"
         intent = entry.get("intent")
         confidence = entry.get("confidence")
@@ -158,7 +536,7 @@ def normalize_message(entry: Any) -> Dict[str, Any]:
         "author": "User",
         "text": text,
         "content": text,
-        "timestamp": utc_timestamp(),
+        "timestamp": default_timestamp or utc_timestamp(),
         "kind": "message",
         "intent": None,
         "confidence": None,
@@ -167,18 +545,253 @@ def normalize_message(entry: Any) -> Dict[str, Any]:
     }
 
 
+def _log_header(channel_id: int | str) -> str:
+    return json.dumps({"_log": "conversation", "version": LOG_VERSION, "ticket_id": str(channel_id)})
+
+
+def _encode_entry(entry: Dict[str, Any]) -> str:
+    return json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+
+
+def _write_log(channel_id: int | str, conversation: List[Dict[str, Any]]):
+    path = conversation_path(channel_id)
+    lines = [_log_header(channel_id), *(_encode_entry(item) for item in conversation)]
+    try:
+        _atomic_write_text(path, "\n".join(lines) + "\n")
+    except Exception as exc:
+        print(f"[ERROR] Failed to save {path.name}: {exc}")
+    _drop_offset_index(channel_id)
+
+
+def _read_log(path: Path) -> List[Dict[str, Any]]:
+    entries: List[Dict[str, Any]] = []
+    try:
+        handle = path.open("r", encoding="utf-8")
+    except FileNotFoundError:
+        return entries
+    with handle:
+        for line_number, line in enumerate(handle, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError:
+                print(f"[WARN] Skipping unreadable line {line_number} in {path.name}")
+                continue
+            if isinstance(item, dict) and "_log" in item:
+                continue
+            entries.append(item)
+    return entries
+
+
+def _file_timestamp(path: Path) -> Optional[str]:
+    try:
+        return datetime.fromtimestamp(path.stat().st_mtime, timezone.utc).isoformat()
+    except FileNotFoundError:
+        return None
+
+
+def _read_legacy_conversation(path: Path) -> List[Dict[str, Any]]:
+    # Entries without a timestamp get the file's mtime so repeated reads stay stable.
+    fallback = _file_timestamp(path)
+    return [normalize_message(item, fallback) for item in _load_json(path, [])]
+
+
+def _migrate_legacy_log(channel_id: int | str) -> bool:
+    legacy = legacy_conversation_path(channel_id)
+    if conversation_path(channel_id).exists() or not legacy.exists():
+        return False
+    _write_log(channel_id, _read_legacy_conversation(legacy))
+    try:
+        legacy.unlink()
+    except Exception as exc:
+        print(f"[WARN] Failed to remove legacy conversation {legacy.name}: {exc}")
+    return True
+
+
+def _json_conversation(channel_id: int | str) -> List[Dict[str, Any]]:
+    path = conversation_path(channel_id)
+    if not path.exists():
+        path = legacy_conversation_path(channel_id)
+        conversation = _cached_read(path, _read_legacy_conversation)
+    else:
+        conversation = _cached_read(path, lambda target: [normalize_message(item) for item in _read_log(target)])
+    return list(conversation or [])
+
+
 def load_conversation(channel_id: int | str) -> List[Dict[str, Any]]:
+    if _store is not None:
+        return _store.load_conversation(str(channel_id))
+    return _json_conversation(channel_id)
+
+
+# Offset index: a sidecar next to each JSONL log holding the byte offset of every
+# entry line, so a window of messages is read by seeking instead of parsing the
+# whole log. It records the log's inode and how many bytes it covers; a rewritten
+# log (new inode) or a shorter one invalidates it, and appended lines are indexed
+# on the next read.
+_OFFSET_HEADER = struct.Struct("<4sQQ")
+_OFFSET_MAGIC = b"CIX1"
+OFFSET_INDEX_FLUSH_LINES = 32
+CONVERSATION_WINDOW = 50
+_offsets = FileCache(CACHE_SIZE)
+_offsets_lock = threading.Lock()
+
+
+def _drop_offset_index(channel_id: int | str):
+    _offsets.discard(conversation_path(channel_id))
+    try:
+        offset_index_path(channel_id).unlink(missing_ok=True)
+    except Exception as exc:
+        print(f"[WARN] Failed to remove offset index for {channel_id}: {exc}")
+
+
+def _read_offset_index(channel_id: int | str, inode: int, size: int) -> Optional[Tuple[int, int, array]]:
+    try:
+        data = offset_index_path(channel_id).read_bytes()
+        magic, indexed_inode, covered = _OFFSET_HEADER.unpack_from(data)
+    except (FileNotFoundError, struct.error):
+        return None
+    body = data[_OFFSET_HEADER.size:]
+    if magic != _OFFSET_MAGIC or indexed_inode != inode or covered > size or len(body) % 8:
+        return None
+    offsets = array("Q")
+    offsets.frombytes(body)
+    return inode, covered, offsets
+
+
+def _index_lines(handle, start: int, offsets: array) -> int:
+    # Indexes complete lines from `start` the way _read_log reads them (blank,
+    # unreadable and header lines are skipped) and returns the covered byte count.
+    handle.seek(start)
+    position = start
+    for line in handle:
+        if not line.endswith(b"\n"):
+            break
+        stripped = line.strip()
+        if stripped:
+            try:
+                item = json.loads(stripped)
+            except ValueError:
+                item = None
+            if item is not None and not (isinstance(item, dict) and "_log" in item):
+                offsets.append(position)
+        position += len(line)
+    return position
+
+
+def _log_offsets(channel_id: int | str, path: Path) -> Optional[Tuple[int, int, array]]:
+    with _offsets_lock:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            _offsets.discard(path)
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = _offsets.peek(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        state = cached[1] if cached is not None else None
+        if state is None or state[0] != stat.st_ino or state[1] > stat.st_size:
+            state = _read_offset_index(channel_id, stat.st_ino, stat.st_size) or (stat.st_ino, 0, array("Q"))
+        inode, covered, offsets = state
+        if covered < stat.st_size:
+            offsets = array("Q", offsets)
+            indexed = len(offsets)
+            with path.open("rb") as handle:
+                covered = _index_lines(handle, covered, offsets)
+            if len(offsets) - indexed >= OFFSET_INDEX_FLUSH_LINES or not indexed:
+                try:
+                    header = _OFFSET_HEADER.pack(_OFFSET_MAGIC, inode, covered)
+                    _atomic_write_bytes(offset_index_path(channel_id), header + offsets.tobytes())
+                except Exception as exc:
+                    print(f"[WARN] Failed to save offset index for {channel_id}: {exc}")
+        state = (inode, covered, offsets)
+        _offsets.put(path, signature, state)
+        return state
+
+
+def _window_bounds(total: int, before: Optional[int], after: Optional[int], limit: int) -> Tuple[int, int]:
+    # Message positions are 0-based; `before`/`after` are exclusive bounds.
+    end = total if before is None else max(0, min(before, total))
+    if after is not None:
+        start = min(after + 1, end)
+        return start, min(end, start + limit)
+    return max(0, end - limit), end
+
+
+def _json_window(channel_id: int | str, before: Optional[int], after: Optional[int], limit: int):
     path = conversation_path(channel_id)
-    data = _load_json(path, [])
-    normalized = [normalize_message(item) for item in data]
-    if normalized != data:
-        save_conversation(channel_id, normalized)
-    return normalized
+    cached = _cache.peek(path)
+    if cached is not None and cached[0] == _file_signature(path):
+        conversation = cached[1]
+        start, end = _window_bounds(len(conversation), before, after, limit)
+        return list(conversation[start:end]), len(conversation), start
+    state = _log_offsets(channel_id, path)
+    if state is None:
+        # Not migrated from the legacy JSON format yet.
+        conversation = _json_conversation(channel_id)
+        start, end = _window_bounds(len(conversation), before, after, limit)
+        return conversation[start:end], len(conversation), start
+    _, covered, offsets = state
+    start, end = _window_bounds(len(offsets), before, after, limit)
+    if start == end:
+        return [], len(offsets), start
+    base = offsets[start]
+    with path.open("rb") as handle:
+        handle.seek(base)
+        data = handle.read(covered - base)
+    messages = []
+    for index in range(start, end):
+        line_start = offsets[index] - base
+        messages.append(normalize_message(json.loads(data[line_start:data.index(b"\n", line_start)])))
+    return messages, len(offsets), start
+
+
+def load_conversation_window(
+    channel_id: int | str,
+    *,
+    before: Optional[int] = None,
+    after: Optional[int] = None,
+    limit: int = CONVERSATION_WINDOW,
+) -> Dict[str, Any]:
+    limit = max(1, int(limit))
+    if _store is not None:
+        total = _store.message_count(str(channel_id))
+        start, end = _window_bounds(total, before, after, limit)
+        messages = _store.load_messages(str(channel_id), start, end)
+    else:
+        messages, total, start = _json_window(channel_id, before, after, limit)
+    return {
+        "messages": messages,
+        "total": total,
+        "start": start,
+        "has_more_before": start > 0,
+        "has_more_after": start + len(messages) < total,
+    }
+
+
+def message_count(channel_id: int | str) -> int:
+    if _store is not None:
+        return _store.message_count(str(channel_id))
+    return len(_json_conversation(channel_id))
 
 
 def save_conversation(channel_id: int | str, conversation: List[Any]):
     normalized = [normalize_message(item) for item in conversation]
-    _save_json(conversation_path(channel_id), normalized)
+    if _store is not None:
+        _store.save_conversation(str(channel_id), normalized)
+        _update_summary(channel_id)
+        return
+    _write_log(channel_id, normalized)
+    path = conversation_path(channel_id)
+    _cache.put(path, _file_signature(path), normalized)
+    legacy = legacy_conversation_path(channel_id)
+    if legacy.exists():
+        _cache.discard(legacy)
+        legacy.unlink()
+    _update_summary(channel_id)
 
 
 def append_message(
@@ -194,7 +807,6 @@ def append_message(
     metadata: Optional[Dict[str, Any]] = None,
     timestamp: Optional[str] = None,
 ) -> Dict[str, Any]:
-    conversation = load_conversation(channel_id)
     payload = normalize_message(
         {
             "role": role,
@@ -208,34 +820,153 @@ def append_message(
             "attachments": attachments or [],
         }
     )
-    conversation.append(payload)
-    save_conversation(channel_id, conversation)
+    append_entries(channel_id, [payload])
     return payload
 
 
-def clear_conversation(channel_id: int | str):
+def append_entries(channel_id: int | str, entries: List[Any]) -> List[Dict[str, Any]]:
+    normalized = [normalize_message(item) for item in entries]
+    if not normalized:
+        return normalized
+    if _store is not None:
+        seq = _store.append_messages(str(channel_id), normalized)
+        _update_summary(channel_id, entries=normalized, count=seq + len(normalized))
+        return normalized
+
     path = conversation_path(channel_id)
+    if not path.exists():
+        _migrate_legacy_log(channel_id)
+    path.parent.mkdir(exist_ok=True)
+    body = "".join(_encode_entry(item) + "\n" for item in normalized).encode("utf-8")
+    count = None
     try:
-        if path.exists():
-            path.unlink()
+        with path.open("a+b") as handle:
+            prefix = b""
+            size_before = handle.seek(0, os.SEEK_END)
+            if size_before == 0:
+                prefix = (_log_header(channel_id) + "\n").encode("utf-8")
+            else:
+                handle.seek(-1, os.SEEK_END)
+                if handle.read(1) != b"\n":
+                    # A previous writer died mid-line; start a fresh line so only that entry is lost.
+                    prefix = b"\n"
+            handle.write(prefix + body)
+            handle.flush()
+            _sync_after_write(path, handle.fileno())
+            stat = os.fstat(handle.fileno())
+        cached = _cache.peek(path)
+        # The cached entries stay valid only if nobody else appended around our
+        # write: otherwise the new signature would cover bytes we never parsed.
+        if cached is not None and cached[0][1] == size_before and stat.st_size == size_before + len(prefix) + len(body):
+            cached[1].extend(normalized)
+            _cache.put(path, (stat.st_mtime_ns, stat.st_size), cached[1])
+            count = len(cached[1])
+        else:
+            _cache.discard(path)
     except Exception as exc:
-        print(f"[WARN] Failed to clear conversation for {channel_id}: {exc}")
+        print(f"[ERROR] Failed to append to {path.name}: {exc}")
+        return normalized
+    _update_summary(channel_id, entries=normalized, count=count)
+    return normalized
+
+
+def message_etag(entry: Optional[Dict[str, Any]]) -> str:
+    if not entry:
+        return ""
+    encoded = json.dumps(entry, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+def clear_conversation(channel_id: int | str):
+    if _store is None:
+        _drop_offset_index(channel_id)
+        for path in (conversation_path(channel_id), legacy_conversation_path(channel_id)):
+            _cache.discard(path)
+            try:
+                if path.exists():
+                    path.unlink()
+            except Exception as exc:
+                print(f"[WARN] Failed to clear conversation for {channel_id}: {exc}")
+    else:
+        _store.clear_conversation(str(channel_id))
+    _update_summary(channel_id)
+
+
+def list_ticket_ids() -> List[str]:
+    if _store is not None:
+        return _store.list_ticket_ids()
+    return _json_ticket_ids()
+
+
+def _json_ticket_ids() -> List[str]:
+    ids = set()
+    if CONV_DIR.exists():
+        for file in CONV_DIR.iterdir():
+            if file.name.startswith("conv_") and file.suffix in {".json", ".jsonl"}:
+                ids.add(file.stem[len("conv_"):])
+    if META_DIR.exists():
+        for file in META_DIR.iterdir():
+            if file.name.startswith("meta_") and file.suffix == ".json":
+                ids.add(file.stem[len("meta_"):])
+    return sorted(ids)
 
 
 def load_ticket_meta(channel_id: int | str) -> Dict[str, Any]:
-    return _load_json(metadata_path(channel_id), {})
+    if _store is not None:
+        return _store.load_meta(str(channel_id))
+    return dict(_load_json_cached(metadata_path(channel_id), {}))
 
 
-def save_ticket_meta(channel_id: int | str, metadata: Dict[str, Any]):
-    current = load_ticket_meta(channel_id)
-    merged = {**current, **metadata, "updated_at": utc_timestamp()}
-    _save_json(metadata_path(channel_id), merged)
+def save_ticket_meta(channel_id: int | str, metadata: Dict[str, Any], removed: Iterable[str] = ()):
+    # Merges metadata into the stored record; keys listed in removed are dropped.
+    removed = set(removed)
+    if _store is not None:
+        merged = _store.save_meta(str(channel_id), metadata, utc_timestamp(), removed=removed)
+        with ticket_lock(channel_id):
+            _refresh_summary(channel_id, metadata=merged)
+        return
+    with ticket_lock(channel_id):
+        current = load_ticket_meta(channel_id)
+        updated_at = utc_timestamp()
+        merged = {key: value for key, value in {**current, **metadata}.items() if key not in removed}
+        merged["updated_at"] = updated_at
+        if "status" in metadata:
+            merged["status_updated_at"] = updated_at
+        _save_json_cached(metadata_path(channel_id), merged)
+        _refresh_summary(channel_id, metadata=merged)
+
+
+def query_ticket_ids(
+    *,
+    status: Optional[str] = None,
+    category: Optional[str] = None,
+    assigned_to: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> List[str]:
+    if _store is not None:
+        return _store.query_ticket_ids(status=status, category=category, assigned_to=assigned_to, limit=limit)
+
+    matches: List[Tuple[str, str]] = []
+    for ticket_id in _json_ticket_ids():
+        metadata = load_ticket_meta(ticket_id)
+        if status is not None and get_ticket_status(ticket_id, None) != status:
+            continue
+        if category is not None and metadata.get("category") != category:
+            continue
+        if assigned_to is not None and metadata.get("assigned_to") != assigned_to:
+            continue
+        conversation = _json_conversation(ticket_id)
+        matches.append((conversation[-1].get("timestamp") or "" if conversation else "", ticket_id))
+    matches.sort(key=lambda item: item[1])
+    matches.sort(key=lambda item: item[0], reverse=True)
+    ids = [ticket_id for _, ticket_id in matches]
+    return ids[:limit] if limit is not None else ids
 
 
 def get_ticket_snapshot(channel_id: int | str) -> Dict[str, Any]:
     conversation = load_conversation(channel_id)
     metadata = load_ticket_meta(channel_id)
-    status = load_status_map().get(str(channel_id), "OPEN")
+    status = get_ticket_status(channel_id)
     last_message = conversation[-1] if conversation else None
     return {
         "ticket_id": str(channel_id),
@@ -244,3 +975,414 @@ def get_ticket_snapshot(channel_id: int | str) -> Dict[str, Any]:
         "last_message": last_message,
         "metadata": metadata,
     }
+
+
+# Summary index: one precomputed row per ticket so the dashboard can list tickets
+# without parsing every conversation. Rows are updated incrementally by the write
+# paths above; anything time-dependent (waiting time, overdue) is left to readers.
+SUMMARY_META_KEYS = (
+    "display_name",
+    "user_name",
+    "category",
+    "intent",
+    "username",
+    "last_summary",
+    "channel_name",
+    "assigned_to",
+    "priority",
+    "sentiment",
+    "tags",
+    "auto_reply_enabled",
+)
+SUMMARY_ROW_VERSION = 1
+_SUMMARY_LOCK = "summary-index"
+
+
+def _is_staff_entry(entry: Dict[str, Any]) -> bool:
+    return entry.get("role") == "assistant" or entry.get("author") == "ADMIN"
+
+
+def _summary_meta(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    meta = {key: metadata[key] for key in SUMMARY_META_KEYS if key in metadata}
+    meta["note_count"] = len(metadata.get("internal_notes") or [])
+    return meta
+
+
+def _advance_summary_row(row: Dict[str, Any], entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    recent = list(row.get("recent_attachments") or [])
+    for entry in entries:
+        attachments = entry.get("attachments") or []
+        row["count"] += 1
+        row["attachments_count"] += len(attachments)
+        recent = [*recent, bool(attachments)][-3:]
+        if entry.get("role") == "user":
+            if row.get("first_user_at") is None:
+                row["first_user_at"] = entry.get("timestamp") or ""
+                row["first_user_author"] = entry.get("author")
+            row["last_user_author"] = entry.get("author")
+        if row.get("first_staff_at") is None and _is_staff_entry(entry):
+            row["first_staff_at"] = entry.get("timestamp") or ""
+        row["last_message"] = {
+            "text": entry.get("text") or "",
+            "timestamp": entry.get("timestamp"),
+            "intent": entry.get("intent"),
+            "metadata": {"category": (entry.get("metadata") or {}).get("category")},
+        }
+    row["recent_attachments"] = recent
+    return row
+
+
+def build_summary_row(
+    channel_id: int | str,
+    conversation: List[Dict[str, Any]],
+    metadata: Dict[str, Any],
+    status: Optional[str],
+) -> Dict[str, Any]:
+    row = {
+        "ticket_id": str(channel_id),
+        "v": SUMMARY_ROW_VERSION,
+        "status": status or "OPEN",
+        "count": 0,
+        "attachments_count": 0,
+        "first_user_at": None,
+        "first_user_author": None,
+        "last_user_author": None,
+        "first_staff_at": None,
+        "last_message": {},
+        "recent_attachments": [],
+        "meta": _summary_meta(metadata),
+    }
+    return _advance_summary_row(row, conversation)
+
+
+class SummaryIndex:
+    # JSON-backend storage for summary rows: an append-only JSONL file where the
+    # last row for a ticket wins. Each process tails the file from its last
+    # offset, so rows written by the bot show up in the dashboard and vice versa.
+    # Appends and compaction are serialized across processes by a lock file.
+    def __init__(self, path: Path, compact_ratio: float = 2.0, compact_min_lines: int = 1000):
+        self.path = path
+        self.compact_ratio = compact_ratio
+        self.compact_min_lines = compact_min_lines
+        self.rows: Dict[str, Dict[str, Any]] = {}
+        self._offset = 0
+        self._inode: Optional[int] = None
+        self._lines = 0
+        self._guard = threading.Lock()
+
+    def _tail(self):
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            self.rows, self._offset, self._inode, self._lines = {}, 0, None, 0
+            return
+        if stat.st_ino != self._inode or stat.st_size < self._offset:
+            # Compacted or replaced by another process; read it again from the start.
+            self.rows, self._offset, self._inode, self._lines = {}, 0, stat.st_ino, 0
+        if stat.st_size == self._offset:
+            return
+        with self.path.open("rb") as handle:
+            handle.seek(self._offset)
+            chunk = handle.read(stat.st_size - self._offset)
+        complete = chunk.rfind(b"\n") + 1  # a line still being written is picked up next time
+        for line in chunk[:complete].splitlines():
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(row, dict) and row.get("ticket_id") is not None:
+                self.rows[str(row["ticket_id"])] = row
+                self._lines += 1
+        self._offset += complete
+
+    def all(self) -> Dict[str, Dict[str, Any]]:
+        with self._guard:
+            self._tail()
+            return dict(self.rows)
+
+    def get(self, ticket_id: str) -> Optional[Dict[str, Any]]:
+        with self._guard:
+            self._tail()
+            return self.rows.get(ticket_id)
+
+    def put(self, row: Dict[str, Any]):
+        with ticket_lock(_SUMMARY_LOCK), self._guard:
+            self._tail()
+            line = (json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+            with self.path.open("ab") as handle:
+                handle.write(line)
+            if self._inode is None:
+                self._inode = self.path.stat().st_ino
+            self._offset += len(line)
+            self._lines += 1
+            self.rows[row["ticket_id"]] = row
+            if self._lines > max(self.compact_min_lines, len(self.rows) * self.compact_ratio):
+                self._compact()
+
+    def replace_all(self, rows: Iterable[Dict[str, Any]]):
+        with ticket_lock(_SUMMARY_LOCK), self._guard:
+            self.rows = {row["ticket_id"]: row for row in rows}
+            self._compact()
+
+    def _compact(self):
+        body = "".join(json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n" for row in self.rows.values())
+        _atomic_write_text(self.path, body)
+        stat = self.path.stat()
+        self._inode, self._offset, self._lines = stat.st_ino, stat.st_size, len(self.rows)
+
+
+_summary_index = SummaryIndex(SUMMARY_INDEX_FILE)
+
+
+def _summary_get(channel_id: int | str) -> Optional[Dict[str, Any]]:
+    if _store is not None:
+        return _store.load_summary(str(channel_id))
+    return _summary_index.get(str(channel_id))
+
+
+def _summary_put(row: Dict[str, Any]):
+    if _store is not None:
+        _store.save_summary(row["ticket_id"], row)
+        return
+    _summary_index.put(row)
+
+
+def _rebuild_summary_row(channel_id: int | str, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    metadata = load_ticket_meta(channel_id) if metadata is None else metadata
+    return build_summary_row(channel_id, load_conversation(channel_id), metadata, get_ticket_status(channel_id))
+
+
+def _refresh_summary(
+    channel_id: int | str,
+    *,
+    entries: Optional[List[Dict[str, Any]]] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+    count: Optional[int] = None,
+):
+    # Caller holds ticket_lock(channel_id). Falls back to a full rebuild when there
+    # is no row yet or the row no longer lines up with the conversation log;
+    # `count` is the log length after `entries`, when the writer already knows it.
+    try:
+        row = _summary_get(channel_id)
+        if row is None or row.get("v") != SUMMARY_ROW_VERSION or (entries is None and metadata is None):
+            row = _rebuild_summary_row(channel_id, metadata)
+        else:
+            row = {**row, "recent_attachments": list(row.get("recent_attachments") or [])}
+            if entries:
+                if row["count"] + len(entries) == (message_count(channel_id) if count is None else count):
+                    _advance_summary_row(row, entries)
+                else:
+                    row = _rebuild_summary_row(channel_id, metadata)
+            if metadata is not None:
+                row["meta"] = _summary_meta(metadata)
+                row["status"] = get_ticket_status(channel_id)
+        _summary_put(row)
+    except Exception as exc:
+        print(f"[WARN] Failed to update the summary index for {channel_id}: {exc}")
+
+
+def _update_summary(
+    channel_id: int | str,
+    *,
+    entries: Optional[List[Dict[str, Any]]] = None,
+    count: Optional[int] = None,
+):
+    with ticket_lock(channel_id):
+        _refresh_summary(channel_id, entries=entries, count=count)
+
+
+def load_ticket_summaries() -> Dict[str, Dict[str, Any]]:
+    rows = _store.load_summaries() if _store is not None else _summary_index.all()
+    summaries: Dict[str, Dict[str, Any]] = {}
+    for ticket_id in list_ticket_ids():
+        row = rows.get(ticket_id)
+        if row is None or row.get("v") != SUMMARY_ROW_VERSION:
+            # Tickets written before the index existed are backfilled on first read.
+            row = load_ticket_summary(ticket_id)
+        if row is not None:
+            summaries[ticket_id] = row
+    return summaries
+
+
+def load_ticket_summary(channel_id: int | str) -> Optional[Dict[str, Any]]:
+    row = _summary_get(channel_id)
+    if row is not None and row.get("v") == SUMMARY_ROW_VERSION:
+        return row
+    row = _rebuild_summary_row(channel_id)
+    if not row["count"] and not load_ticket_meta(channel_id):
+        return None
+    with ticket_lock(channel_id):
+        _summary_put(row)
+    return row
+
+
+def rebuild_summary_index() -> Dict[str, int]:
+    rows = [_rebuild_summary_row(ticket_id) for ticket_id in list_ticket_ids()]
+    if _store is not None:
+        for row in rows:
+            _store.save_summary(row["ticket_id"], row)
+    else:
+        _summary_index.replace_all(rows)
+    return {"summaries_indexed": len(rows)}
+
+
+def schema_version() -> int:
+    data = _load_json(SCHEMA_FILE, {})
+    try:
+        return int(data.get("version") or 0)
+    except (AttributeError, TypeError, ValueError):
+        return 0
+
+
+def _migrate_conversation_logs() -> Dict[str, int]:
+    converted = 0
+    for file in sorted(CONV_DIR.glob("conv_*.json")):
+        if _migrate_legacy_log(file.stem[len("conv_"):]):
+            converted += 1
+    return {"conversations_converted": converted}
+
+
+def _migrate_status_map() -> Dict[str, int]:
+    statuses = _load_json(STATUS_FILE, {})
+    moved = 0
+    for channel_id, status in statuses.items():
+        metadata = load_ticket_meta(channel_id)
+        if "status_updated_at" in metadata:
+            continue
+        save_ticket_meta(channel_id, {"status": status})
+        moved += 1
+    if STATUS_FILE.exists():
+        STATUS_FILE.replace(STATUS_FILE.with_name(f"{STATUS_FILE.name}.migrated"))
+        _cache.discard(STATUS_FILE)
+    return {"statuses_moved": moved}
+
+
+def _migrate_attachment_blobs() -> Dict[str, int]:
+    moved = 0
+    deduplicated = 0
+    if not ATTACHMENTS_DIR.exists():
+        return {"attachments_linked": 0, "attachment_bytes_deduplicated": 0}
+    for folder in sorted(ATTACHMENTS_DIR.iterdir()):
+        if not folder.is_dir() or folder in {LEGACY_BLOB_DIR, LEGACY_MANIFEST_DIR}:
+            continue
+        channel_id = folder.name
+        with ticket_lock(channel_id):
+            manifest = load_attachment_manifest(channel_id)
+            changed = False
+            for file in sorted(folder.iterdir()):
+                if not file.is_file() or file.name.startswith(".") or file.name in manifest:
+                    continue
+                data = file.read_bytes()
+                sha256 = hashlib.sha256(data).hexdigest()
+                if blob_path(sha256).exists():
+                    deduplicated += len(data)
+                _link_blob(sha256, file, source=file)
+                manifest[file.name] = {"sha256": sha256, "size": len(data), "content_type": "", "stored_at": utc_timestamp()}
+                changed = True
+                moved += 1
+            if changed:
+                MANIFEST_DIR.mkdir(parents=True, exist_ok=True)
+                _save_json(attachment_manifest_path(channel_id), manifest, compact=True)
+    return {"attachments_linked": moved, "attachment_bytes_deduplicated": deduplicated}
+
+
+def _move_attachment_store() -> Dict[str, int]:
+    # Earlier versions kept blobs and manifests inside ATTACHMENTS_DIR. Renames
+    # keep the hard links intact; manifests written since the upgrade are merged.
+    moved = 0
+    if LEGACY_BLOB_DIR.exists():
+        if not BLOB_DIR.exists():
+            os.replace(LEGACY_BLOB_DIR, BLOB_DIR)
+        else:
+            for path in LEGACY_BLOB_DIR.glob("*/*/*"):
+                target = BLOB_DIR / path.relative_to(LEGACY_BLOB_DIR)
+                if not target.exists():
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(path, target)
+            shutil.rmtree(LEGACY_BLOB_DIR, ignore_errors=True)
+        moved += 1
+    if LEGACY_MANIFEST_DIR.exists():
+        MANIFEST_DIR.mkdir(parents=True, exist_ok=True)
+        for path in LEGACY_MANIFEST_DIR.glob("*.json"):
+            channel_id = path.stem
+            with ticket_lock(channel_id):
+                manifest = {**_load_json(path, {}), **load_attachment_manifest(channel_id)}
+                _save_json(attachment_manifest_path(channel_id), manifest, compact=True)
+                path.unlink()
+                moved += 1
+        shutil.rmtree(LEGACY_MANIFEST_DIR, ignore_errors=True)
+    return {"attachment_store_paths_moved": moved}
+
+
+MIGRATIONS: List[Tuple[int, Callable[[], Dict[str, int]]]] = [
+    (1, _migrate_conversation_logs),
+    (2, _migrate_status_map),
+    (3, _migrate_attachment_blobs),
+    (4, rebuild_summary_index),
+    (5, _move_attachment_store),
+]
+
+
+def migrate(force: bool = False) -> Dict[str, Any]:
+    if _store is not None:
+        # Attachments live on disk with either backend; both steps are idempotent.
+        return {
+            **_store.migrate(),
+            **_move_attachment_store(),
+            **_migrate_attachment_blobs(),
+            **rebuild_summary_index(),
+        }
+    current = 0 if force else schema_version()
+    report: Dict[str, Any] = {"from_version": current, "to_version": current}
+    for version, step in MIGRATIONS:
+        if version <= current:
+            continue
+        report.update(step())
+        current = version
+        _save_json(SCHEMA_FILE, {"version": current, "migrated_at": utc_timestamp()})
+        report["to_version"] = current
+    return report
+
+
+def import_json_to_sqlite(db_path: Path = DB_PATH) -> Dict[str, int]:
+    store = SqliteTicketStore(db_path)
+    store.save_set("active", _load_set(ACTIVE_FILE))
+    store.save_set("paused", _load_set(PAUSED_FILE))
+    tickets = 0
+    messages = 0
+    for ticket_id in _json_ticket_ids():
+        conversation = _json_conversation(ticket_id)
+        store.save_conversation(ticket_id, conversation)
+        metadata = dict(_load_json(metadata_path(ticket_id), {}))
+        legacy_status = _legacy_status(ticket_id)
+        if legacy_status and "status_updated_at" not in metadata:
+            metadata["status"] = legacy_status
+        store.save_meta(ticket_id, metadata, metadata.get("updated_at") or utc_timestamp())
+        tickets += 1
+        messages += len(conversation)
+    store.close()
+    return {"tickets_imported": tickets, "messages_imported": messages}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ticket data maintenance")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    migrate_parser = subcommands.add_parser("migrate", help="Upgrade ticket data to the current schema version")
+    migrate_parser.add_argument("--force", action="store_true", help="Re-run every migration step")
+    import_parser = subcommands.add_parser("import-sqlite", help="Copy the JSON ticket files into an SQLite database")
+    import_parser.add_argument("--db", default=str(DB_PATH), help="Target database path")
+    gc_parser = subcommands.add_parser("gc-attachments", help="Delete attachment blobs no ticket links to")
+    gc_parser.add_argument("--min-age", type=float, default=ATTACHMENT_GC_MIN_AGE, help="Only collect blobs older than this many seconds")
+    subcommands.add_parser("reindex", help="Rebuild the ticket summary index from the stored tickets")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        print(json.dumps(migrate(force=args.force), indent=2))
+    elif args.command == "import-sqlite":
+        print(json.dumps(import_json_to_sqlite(Path(args.db)), indent=2))
+    elif args.command == "gc-attachments":
+        print(json.dumps(gc_attachment_blobs(args.min_age), indent=2))
+    elif args.command == "reindex":
+        print(json.dumps(rebuild_summary_index(), indent=2))
@@ -0,0 +1,170 @@
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, FrozenSet, Iterator, Mapping, Optional, Tuple
+
+PROOF_FLAGS = (
+    "winner_detected",
+    "deposit_detected",
+    "kyc_detected",
+    "code_proof_detected",
+    "youtube_proof_detected",
+    "supporting_proof_detected",
+    "has_relevant_proof",
+)
+_FLAG_BITS = {name: 1 << index for index, name in enumerate(PROOF_FLAGS)}
+_FIRST_VALUE_KEYS = ("platform_hint", "visible_text")
+# Every combination of detections, decoded once, so serializing is a dict copy.
+_FLAG_DICTS = tuple(
+    {name: bool(flags & bit) for name, bit in _FLAG_BITS.items()} for flags in range(1 << len(PROOF_FLAGS))
+)
+
+
+class ProofSignals:
+    # What the text and screenshot analysis has established for a ticket. The
+    # detections only ever turn on, so they are kept as bits of a single int.
+    __slots__ = ("flags", "confidence", "platform_hint", "visible_text", "extra")
+
+    def __init__(
+        self,
+        flags: int = 0,
+        confidence: float = 0.0,
+        platform_hint: Optional[str] = None,
+        visible_text: Optional[str] = None,
+        extra: Optional[Dict[str, Any]] = None,
+    ):
+        self.flags = flags
+        self.confidence = confidence
+        self.platform_hint = platform_hint
+        self.visible_text = visible_text
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, data: Optional[Mapping[str, Any]]) -> "ProofSignals":
+        signals = cls()
+        if data:
+            signals.merge(data)
+        return signals
+
+    def merge(self, incoming: Mapping[str, Any]) -> "ProofSignals":
+        # Detections are sticky, confidence keeps its maximum and any other value
+        # keeps the first non-empty one seen.
+        for key, value in incoming.items():
+            bit = _FLAG_BITS.get(key)
+            if bit is not None:
+                if value:
+                    self.flags |= bit
+            elif key == "confidence":
+                self.confidence = max(self.confidence, float(value or 0.0))
+            elif key in _FIRST_VALUE_KEYS:
+                if value and not getattr(self, key):
+                    setattr(self, key, value)
+            elif value and not (self.extra or {}).get(key):
+                if self.extra is None:
+                    self.extra = {}
+                self.extra[key] = value
+        return self
+
+    def get(self, key: str, default: Any = None) -> Any:
+        bit = _FLAG_BITS.get(key)
+        if bit is not None:
+            return bool(self.flags & bit)
+        if key == "confidence":
+            return self.confidence
+        if key in _FIRST_VALUE_KEYS:
+            value = getattr(self, key)
+        else:
+            value = (self.extra or {}).get(key)
+        return default if value is None else value
+
+    def __getitem__(self, key: str) -> Any:
+        return self.get(key)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ProofSignals):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"ProofSignals({self.to_dict()!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = _FLAG_DICTS[self.flags].copy()
+        data["confidence"] = self.confidence
+        if self.platform_hint:
+            data["platform_hint"] = self.platform_hint
+        if self.visible_text:
+            data["visible_text"] = self.visible_text
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+
+@dataclass(slots=True)
+class TicketState:
+    # The bot's working view of one ticket, rebuilt from the conversation log and
+    # checkpointed into ticket metadata. Item access (`state["flow"]`,
+    # `state.get("flow")`) is kept so helpers also accept plain dict states.
+    flow: Optional[str] = None
+    guild_id: Optional[int] = None
+    gw_platform: Optional[str] = None
+    username: Optional[str] = None
+    code: Optional[str] = None
+    attachments_total: int = 0
+    escalated: bool = False
+    asked_first_ever: bool = False
+    first_ever_confirmed: Optional[str] = None
+    last_assistant: Optional[str] = None
+    intent: str = "query"
+    summary: str = ""
+    proof_ready: bool = False
+    proof_notes: str = ""
+    proof_type: Optional[str] = None
+    analysis_confidence: float = 0.0
+    gw_required_attachments: int = 0
+    proof_signals: ProofSignals = field(default_factory=ProofSignals)
+    checklist: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    history_seq: int = 0
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "TicketState":
+        state = cls()
+        state.update(data)
+        return state
+
+    def update(self, data: Mapping[str, Any]):
+        # Keys from older checkpoints that are no longer part of the state are ignored.
+        for key, value in data.items():
+            if key in _STATE_KEYS:
+                self[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {name: getattr(self, name) for name in _STATE_FIELDS}
+        data["proof_signals"] = self.proof_signals.to_dict()
+        return data
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = getattr(self, key) if key in _STATE_KEYS else None
+        return default if value is None else value
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in _STATE_KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key not in _STATE_KEYS:
+            raise KeyError(key)
+        if key == "proof_signals" and not isinstance(value, ProofSignals):
+            value = ProofSignals.from_dict(value)
+        elif key == "checklist" and value is None:
+            value = {}
+        setattr(self, key, value)
+
+    def __contains__(self, key: object) -> bool:
+        return key in _STATE_KEYS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(_STATE_FIELDS)
+
+
+_STATE_FIELDS: Tuple[str, ...] = tuple(item.name for item in fields(TicketState))
+_STATE_KEYS: FrozenSet[str] = frozenset(_STATE_FIELDS)
@@ -0,0 +1,207 @@
+import base64
+import bisect
+import itertools
+import json
+import threading
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+PENDING_STATUSES = ("OPEN", "ESCALATED", "PAUSED")
+OVERDUE_AFTER_SECONDS = 8 * 60
+PRIORITY_RANK = {"HIGH": 0, "MEDIUM": 1, "LOW": 2}
+SORTS = ("newest", "oldest", "messages", "priority")
+# Card fields with a posting set, i.e. filters answered without scanning.
+INDEXED_FIELDS = ("status", "category", "priority", "intent", "assigned_to")
+
+
+class TicketFilters(NamedTuple):
+    status: Optional[str] = None
+    category: Optional[str] = None
+    priority: Optional[str] = None
+    intent: Optional[str] = None
+    assigned_to: Optional[str] = None
+    overdue: Optional[bool] = None
+    q: str = ""
+    sort: str = "newest"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _epoch(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return (parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)).timestamp()
+
+
+def _haystack(card: Dict[str, Any]) -> str:
+    # The same fields the ticket list used to search client-side.
+    parts = [card.get("ticket_id"), card.get("user_name"), card.get("last_message"), card.get("intent"), card.get("category")]
+    parts.extend(card.get("tags") or [])
+    return " ".join(str(part) for part in parts if part).lower()
+
+
+class _Entry(NamedTuple):
+    row: Dict[str, Any]
+    card: Dict[str, Any]
+    epoch: Optional[float]
+    haystack: str
+
+
+def _sort_key(sort: str, ticket_id: str, entry: _Entry) -> Tuple[Any, ...]:
+    # Ascending keys in page order; tickets without a timestamp go last in
+    # "newest" and first in "oldest", as a plain string sort would put them.
+    newest = -entry.epoch if entry.epoch is not None else float("inf")
+    if sort == "oldest":
+        return (entry.epoch if entry.epoch is not None else float("-inf"), ticket_id)
+    if sort == "messages":
+        return (-int(entry.card.get("count") or 0), newest, ticket_id)
+    if sort == "priority":
+        return (PRIORITY_RANK.get(entry.card.get("priority"), 99), newest, ticket_id)
+    return (newest, ticket_id)
+
+
+def encode_cursor(sort: str, key: Tuple[Any, ...]) -> str:
+    raw = json.dumps([sort, list(key)], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[Any, ...]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, key = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception as exc:
+        raise InvalidCursor("Malformed cursor") from exc
+    if cursor_sort != sort or not isinstance(key, list):
+        raise InvalidCursor("Cursor belongs to a different sort order")
+    return tuple(key)
+
+
+class TicketListIndex:
+    # Dashboard ticket cards indexed for list queries. refresh() takes the summary
+    # index rows and rebuilds a card only when its row changed; filters on
+    # INDEXED_FIELDS intersect posting sets, and each sort order is a sorted key
+    # list built on first use after a change, paged by key (keyset pagination) so
+    # cursors stay valid while tickets move.
+    def __init__(self, build_card: Callable[[Dict[str, Any]], Dict[str, Any]]):
+        self.build_card = build_card
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _Entry] = {}
+        self._postings: Dict[str, Dict[Any, Set[str]]] = {field: {} for field in INDEXED_FIELDS}
+        self._orders: Dict[str, Tuple[List[Tuple[Any, ...]], List[str]]] = {}
+
+    def _unpost(self, ticket_id: str, card: Dict[str, Any]):
+        for field in INDEXED_FIELDS:
+            bucket = self._postings[field].get(card.get(field))
+            if bucket is not None:
+                bucket.discard(ticket_id)
+                if not bucket:
+                    del self._postings[field][card.get(field)]
+
+    def _post(self, ticket_id: str, card: Dict[str, Any]):
+        for field in INDEXED_FIELDS:
+            self._postings[field].setdefault(card.get(field), set()).add(ticket_id)
+
+    def refresh(self, rows: Dict[str, Dict[str, Any]]) -> int:
+        with self._lock:
+            changed = 0
+            for ticket_id in [item for item in self._entries if item not in rows]:
+                self._unpost(ticket_id, self._entries.pop(ticket_id).card)
+                changed += 1
+            for ticket_id, row in rows.items():
+                entry = self._entries.get(ticket_id)
+                if entry is not None and (entry.row is row or entry.row == row):
+                    continue
+                card = self.build_card(row)
+                if entry is not None:
+                    self._unpost(ticket_id, entry.card)
+                self._entries[ticket_id] = _Entry(row, card, _epoch(card.get("last_message_at")), _haystack(card))
+                self._post(ticket_id, card)
+                changed += 1
+            if changed:
+                self._orders.clear()
+            return changed
+
+    def _order(self, sort: str) -> Tuple[List[Tuple[Any, ...]], List[str]]:
+        order = self._orders.get(sort)
+        if order is None:
+            keyed = sorted((_sort_key(sort, ticket_id, entry), ticket_id) for ticket_id, entry in self._entries.items())
+            order = self._orders[sort] = ([key for key, _ in keyed], [ticket_id for _, ticket_id in keyed])
+        return order
+
+    def _matches(self, filters: TicketFilters, now: float) -> Optional[Set[str]]:
+        # None means "every ticket"; otherwise the set of matching ticket ids.
+        selected: Optional[Set[str]] = None
+        for field in INDEXED_FIELDS:
+            value = getattr(filters, field)
+            if value is None:
+                continue
+            bucket = self._postings[field].get(value, set())
+            selected = set(bucket) if selected is None else selected & bucket
+            if not selected:
+                return set()
+        query = filters.q.strip().lower()
+        if filters.overdue is None and not query:
+            return selected
+        matched = set()
+        for ticket_id in self._entries if selected is None else selected:
+            entry = self._entries[ticket_id]
+            if query and query not in entry.haystack:
+                continue
+            if filters.overdue is not None:
+                overdue = (
+                    entry.card.get("status") in PENDING_STATUSES
+                    and entry.epoch is not None
+                    and now - entry.epoch > OVERDUE_AFTER_SECONDS
+                )
+                if overdue != filters.overdue:
+                    continue
+            matched.add(ticket_id)
+        return matched
+
+    def page(
+        self,
+        filters: TicketFilters,
+        *,
+        limit: int,
+        cursor: Optional[str] = None,
+        now: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        now = datetime.now(timezone.utc).timestamp() if now is None else now
+        with self._lock:
+            matched = self._matches(filters, now)
+            keys, ticket_ids = self._order(filters.sort)
+            try:
+                start = bisect.bisect_right(keys, decode_cursor(cursor, filters.sort)) if cursor else 0
+            except TypeError as exc:
+                raise InvalidCursor("Malformed cursor") from exc
+            cards: List[Dict[str, Any]] = []
+            last_key = None
+            position = start
+            while position < len(ticket_ids) and len(cards) < limit:
+                ticket_id = ticket_ids[position]
+                if matched is None or ticket_id in matched:
+                    cards.append(self._entries[ticket_id].card)
+                    last_key = keys[position]
+                position += 1
+            has_more = any(
+                matched is None or ticket_id in matched for ticket_id in itertools.islice(ticket_ids, position, None)
+            )
+            return {
+                "tickets": cards,
+                "next_cursor": encode_cursor(filters.sort, last_key) if has_more and last_key is not None else None,
+                "total": len(self._entries) if matched is None else len(matched),
+            }
+
+    def cards(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [entry.card for entry in self._entries.values()]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
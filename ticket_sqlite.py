@@ -0,0 +1,248 @@
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tickets (
+    ticket_id TEXT PRIMARY KEY,
+    status TEXT,
+    category TEXT,
+    assigned_to TEXT,
+    last_message_at TEXT,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    meta TEXT NOT NULL DEFAULT '{}',
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tickets_status ON tickets(status);
+CREATE INDEX IF NOT EXISTS idx_tickets_category ON tickets(category);
+CREATE INDEX IF NOT EXISTS idx_tickets_assigned_to ON tickets(assigned_to);
+CREATE INDEX IF NOT EXISTS idx_tickets_last_message_at ON tickets(last_message_at);
+
+CREATE TABLE IF NOT EXISTS messages (
+    ticket_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (ticket_id, seq)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS ticket_summaries (
+    ticket_id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS channel_sets (
+    name TEXT NOT NULL,
+    channel_id INTEGER NOT NULL,
+    PRIMARY KEY (name, channel_id)
+) WITHOUT ROWID;
+"""
+
+
+def _dumps(payload: Any) -> str:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+
+
+class SqliteTicketStore:
+    # One connection per thread; WAL lets the bot and dashboard processes read
+    # while the other writes.
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self.migrate()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def migrate(self) -> Dict[str, Any]:
+        conn = self._connection()
+        current = conn.execute("PRAGMA user_version").fetchone()[0]
+        conn.executescript(SCHEMA)
+        if current < SCHEMA_VERSION:
+            conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        return {"from_version": current, "to_version": max(current, SCHEMA_VERSION)}
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def load_set(self, name: str) -> Set[int]:
+        rows = self._connection().execute("SELECT channel_id FROM channel_sets WHERE name = ?", (name,))
+        return {int(row[0]) for row in rows}
+
+    def save_set(self, name: str, values: Iterable[int]):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM channel_sets WHERE name = ?", (name,))
+            conn.executemany(
+                "INSERT OR IGNORE INTO channel_sets (name, channel_id) VALUES (?, ?)",
+                [(name, int(value)) for value in values],
+            )
+
+    def load_conversation(self, ticket_id: str) -> List[Dict[str, Any]]:
+        rows = self._connection().execute(
+            "SELECT payload FROM messages WHERE ticket_id = ? ORDER BY seq",
+            (str(ticket_id),),
+        )
+        return [json.loads(row[0]) for row in rows]
+
+    def load_messages(self, ticket_id: str, start: int, stop: int) -> List[Dict[str, Any]]:
+        rows = self._connection().execute(
+            "SELECT payload FROM messages WHERE ticket_id = ? AND seq >= ? AND seq < ? ORDER BY seq",
+            (str(ticket_id), int(start), int(stop)),
+        )
+        return [json.loads(row[0]) for row in rows]
+
+    def save_conversation(self, ticket_id: str, conversation: List[Dict[str, Any]]):
+        ticket_id = str(ticket_id)
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM messages WHERE ticket_id = ?", (ticket_id,))
+            conn.executemany(
+                "INSERT INTO messages (ticket_id, seq, payload) VALUES (?, ?, ?)",
+                [(ticket_id, seq, _dumps(entry)) for seq, entry in enumerate(conversation)],
+            )
+            last_message_at = conversation[-1].get("timestamp") if conversation else None
+            conn.execute("INSERT OR IGNORE INTO tickets (ticket_id) VALUES (?)", (ticket_id,))
+            conn.execute(
+                "UPDATE tickets SET message_count = ?, last_message_at = ? WHERE ticket_id = ?",
+                (len(conversation), last_message_at, ticket_id),
+            )
+
+    def append_message(self, ticket_id: str, entry: Dict[str, Any]) -> int:
+        return self.append_messages(ticket_id, [entry])
+
+    def append_messages(self, ticket_id: str, entries: List[Dict[str, Any]]) -> int:
+        ticket_id = str(ticket_id)
+        with self._transaction() as conn:
+            conn.execute("INSERT OR IGNORE INTO tickets (ticket_id) VALUES (?)", (ticket_id,))
+            seq = conn.execute("SELECT message_count FROM tickets WHERE ticket_id = ?", (ticket_id,)).fetchone()[0]
+            conn.executemany(
+                "INSERT INTO messages (ticket_id, seq, payload) VALUES (?, ?, ?)",
+                [(ticket_id, seq + offset, _dumps(entry)) for offset, entry in enumerate(entries)],
+            )
+            conn.execute(
+                "UPDATE tickets SET message_count = ?, last_message_at = ? WHERE ticket_id = ?",
+                (seq + len(entries), entries[-1].get("timestamp") if entries else None, ticket_id),
+            )
+        return seq
+
+    def clear_conversation(self, ticket_id: str):
+        ticket_id = str(ticket_id)
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM messages WHERE ticket_id = ?", (ticket_id,))
+            conn.execute(
+                "UPDATE tickets SET message_count = 0, last_message_at = NULL WHERE ticket_id = ?",
+                (ticket_id,),
+            )
+
+    def load_meta(self, ticket_id: str) -> Dict[str, Any]:
+        row = self._connection().execute("SELECT meta FROM tickets WHERE ticket_id = ?", (str(ticket_id),)).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def save_meta(
+        self,
+        ticket_id: str,
+        patch: Dict[str, Any],
+        updated_at: str,
+        removed: Iterable[str] = (),
+    ) -> Dict[str, Any]:
+        ticket_id = str(ticket_id)
+        removed = set(removed)
+        with self._transaction() as conn:
+            row = conn.execute("SELECT meta FROM tickets WHERE ticket_id = ?", (ticket_id,)).fetchone()
+            merged = {**(json.loads(row[0]) if row else {}), **patch}
+            merged = {key: value for key, value in merged.items() if key not in removed}
+            merged["updated_at"] = updated_at
+            if "status" in patch:
+                merged["status_updated_at"] = updated_at
+            conn.execute("INSERT OR IGNORE INTO tickets (ticket_id) VALUES (?)", (ticket_id,))
+            conn.execute(
+                "UPDATE tickets SET meta = ?, status = ?, category = ?, assigned_to = ?, updated_at = ? WHERE ticket_id = ?",
+                (
+                    _dumps(merged),
+                    merged.get("status"),
+                    merged.get("category"),
+                    merged.get("assigned_to"),
+                    updated_at,
+                    ticket_id,
+                ),
+            )
+        return merged
+
+    def load_summary(self, ticket_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT payload FROM ticket_summaries WHERE ticket_id = ?",
+            (str(ticket_id),),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_summary(self, ticket_id: str, summary: Dict[str, Any]):
+        self._connection().execute(
+            "INSERT OR REPLACE INTO ticket_summaries (ticket_id, payload) VALUES (?, ?)",
+            (str(ticket_id), _dumps(summary)),
+        )
+
+    def load_summaries(self) -> Dict[str, Dict[str, Any]]:
+        rows = self._connection().execute("SELECT ticket_id, payload FROM ticket_summaries")
+        return {row[0]: json.loads(row[1]) for row in rows}
+
+    def get_status(self, ticket_id: str) -> Optional[str]:
+        row = self._connection().execute("SELECT status FROM tickets WHERE ticket_id = ?", (str(ticket_id),)).fetchone()
+        return row[0] if row else None
+
+    def message_count(self, ticket_id: str) -> int:
+        row = self._connection().execute(
+            "SELECT message_count FROM tickets WHERE ticket_id = ?",
+            (str(ticket_id),),
+        ).fetchone()
+        return int(row[0]) if row else 0
+
+    def list_ticket_ids(self) -> List[str]:
+        return [row[0] for row in self._connection().execute("SELECT ticket_id FROM tickets ORDER BY ticket_id")]
+
+    def query_ticket_ids(
+        self,
+        *,
+        status: Optional[str] = None,
+        category: Optional[str] = None,
+        assigned_to: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[str]:
+        clauses: List[str] = []
+        params: List[Any] = []
+        for column, value in (("status", status), ("category", category), ("assigned_to", assigned_to)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        query = "SELECT ticket_id FROM tickets"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY last_message_at DESC, ticket_id"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(int(limit))
+        return [row[0] for row in self._connection().execute(query, params)]
@@ -0,0 +1,268 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger("ticket_worker")
+
+
+class Turn:
+    __slots__ = ("queue", "ticket_id", "generation")
+
+    def __init__(self, queue: "TicketTurnQueue", ticket_id: str, generation: int):
+        self.queue = queue
+        self.ticket_id = ticket_id
+        self.generation = generation
+
+    @property
+    def superseded(self) -> bool:
+        # True once a newer message for the ticket arrived after this turn was taken.
+        return self.queue.generation(self.ticket_id) != self.generation
+
+    def drop(self):
+        self.queue._counters["dropped"] += 1
+
+    async def interruptible(self, awaitable: Awaitable[Any]) -> Optional[Any]:
+        # Runs `awaitable` until it finishes or a newer message supersedes this turn,
+        # in which case it is cancelled (wherever it is waiting) and None is returned.
+        if self.superseded:
+            return None
+        task = asyncio.ensure_future(awaitable)
+        self.queue._interruptible[self.ticket_id] = task
+        try:
+            await asyncio.wait({task})
+        finally:
+            if self.queue._interruptible.get(self.ticket_id) is task:
+                del self.queue._interruptible[self.ticket_id]
+            if not task.done():
+                task.cancel()
+        if task.cancelled():
+            return None
+        return task.result()
+
+
+TurnHandler = Callable[[str, List[Any], Turn], Awaitable[None]]
+
+
+class TicketTurnQueue:
+    # One worker task per active ticket. Messages arriving within the debounce
+    # window are handed to the handler together as a single turn, turns for a
+    # ticket never overlap, and the worker exits once the ticket goes quiet.
+    def __init__(self, handle_turn: TurnHandler, *, debounce: float = 1.5, max_wait: float = 6.0):
+        self.handle_turn = handle_turn
+        self.debounce = max(0.0, debounce)
+        self.max_wait = max(self.debounce, max_wait)
+        self._pending: Dict[str, List[Any]] = {}
+        self._last_arrival: Dict[str, float] = {}
+        self._generations: Dict[str, int] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+        self._interruptible: Dict[str, asyncio.Future] = {}
+        self._counters = {"submitted": 0, "turns": 0, "merged": 0, "dropped": 0, "interrupted": 0, "failed": 0}
+
+    def generation(self, ticket_id: int | str) -> int:
+        return self._generations.get(str(ticket_id), 0)
+
+    def submit(self, ticket_id: int | str, item: Any) -> int:
+        key = str(ticket_id)
+        self._counters["submitted"] += 1
+        self._pending.setdefault(key, []).append(item)
+        self._last_arrival[key] = time.monotonic()
+        self._generations[key] = self._generations.get(key, 0) + 1
+        running = self._interruptible.pop(key, None)
+        if running is not None and not running.done():
+            running.cancel()
+            self._counters["interrupted"] += 1
+        if key not in self._workers:
+            self._workers[key] = asyncio.get_running_loop().create_task(self._run(key), name=f"ticket-turns-{key}")
+        return self._generations[key]
+
+    async def _settle(self, key: str):
+        started = time.monotonic()
+        while True:
+            now = time.monotonic()
+            delay = min(self._last_arrival[key] + self.debounce - now, started + self.max_wait - now)
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+    async def _run(self, key: str):
+        try:
+            while self._pending.get(key):
+                await self._settle(key)
+                items = self._pending.pop(key)
+                self._counters["turns"] += 1
+                self._counters["merged"] += len(items) - 1
+                try:
+                    await self.handle_turn(key, items, Turn(self, key, self._generations[key]))
+                except asyncio.CancelledError:
+                    raise
+                except Exception as exc:
+                    self._counters["failed"] += 1
+                    logger.exception("Turn for ticket %s failed: %s", key, exc)
+        finally:
+            # No await between the empty check above and this cleanup, so a concurrent
+            # submit() either lands in the loop or starts a fresh worker.
+            self._workers.pop(key, None)
+            if not self._pending.get(key):
+                self._pending.pop(key, None)
+                self._last_arrival.pop(key, None)
+                self._generations.pop(key, None)
+
+    def active(self, ticket_id: int | str) -> bool:
+        return str(ticket_id) in self._workers
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._counters,
+            "active_tickets": len(self._workers),
+            "queued_messages": sum(len(items) for items in self._pending.values()),
+            "debounce_seconds": self.debounce,
+        }
+
+    async def drain(self):
+        while self._workers:
+            await asyncio.gather(*list(self._workers.values()), return_exceptions=True)
+
+    async def close(self):
+        for task in self._workers.values():
+            task.cancel()
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
+        self._workers.clear()
+
+
+class TicketSlot:
+    __slots__ = ("state", "lock", "touched")
+
+    def __init__(self):
+        self.state: Optional[Any] = None
+        self.lock: Optional[asyncio.Lock] = None
+        self.touched = time.monotonic()
+
+
+class TicketRegistry:
+    # The bot's in-memory per-ticket runtime (conversation state and lock), bounded
+    # by an LRU size cap and an idle TTL. Evicted state is handed to `persist` first
+    # so the next message restores it from the ticket's metadata checkpoint. Tickets
+    # whose lock is held or that `in_use` reports busy are never swept.
+    def __init__(
+        self,
+        persist: Optional[Callable[[str, Any], None]] = None,
+        *,
+        max_tickets: int = 1024,
+        idle_ttl: float = 1800.0,
+        in_use: Optional[Callable[[str], bool]] = None,
+    ):
+        self.persist = persist
+        self.max_tickets = max(1, max_tickets)
+        self.idle_ttl = idle_ttl
+        self.in_use = in_use
+        self._slots: "OrderedDict[str, TicketSlot]" = OrderedDict()
+        self._counters = {"created": 0, "expired": 0, "evicted": 0, "closed": 0, "persist_failed": 0}
+
+    def _touch(self, key: str) -> TicketSlot:
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._slots[key] = TicketSlot()
+            self._counters["created"] += 1
+        else:
+            self._slots.move_to_end(key)
+            slot.touched = time.monotonic()
+        return slot
+
+    def get(self, ticket_id: int | str, default: Any = None) -> Any:
+        key = str(ticket_id)
+        slot = self._slots.get(key)
+        if slot is None or slot.state is None:
+            return default
+        self._touch(key)
+        return slot.state
+
+    def __getitem__(self, ticket_id: int | str) -> Any:
+        state = self.get(ticket_id)
+        if state is None:
+            raise KeyError(ticket_id)
+        return state
+
+    def __setitem__(self, ticket_id: int | str, state: Any):
+        key = str(ticket_id)
+        self._touch(key).state = state
+        self._trim(keep=key)
+
+    def __contains__(self, ticket_id: object) -> bool:
+        slot = self._slots.get(str(ticket_id))
+        return slot is not None and slot.state is not None
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def pop(self, ticket_id: int | str, default: Any = None) -> Any:
+        # Discards without persisting; use evict() to keep the state recoverable.
+        slot = self._slots.pop(str(ticket_id), None)
+        if slot is None or slot.state is None:
+            return default
+        return slot.state
+
+    def lock(self, ticket_id: int | str) -> asyncio.Lock:
+        key = str(ticket_id)
+        slot = self._touch(key)
+        if slot.lock is None:
+            slot.lock = asyncio.Lock()
+        self._trim(keep=key)
+        return slot.lock
+
+    def _busy(self, key: str, slot: TicketSlot) -> bool:
+        if slot.lock is not None and slot.lock.locked():
+            return True
+        return bool(self.in_use and self.in_use(key))
+
+    def _drop(self, key: str, slot: TicketSlot, reason: str):
+        if slot.state is not None and self.persist is not None:
+            try:
+                self.persist(key, slot.state)
+            except Exception as exc:
+                # Keep the entry rather than lose state the checkpoint does not have.
+                self._counters["persist_failed"] += 1
+                logger.warning("Persisting state for ticket %s failed; keeping it in memory: %s", key, exc)
+                return
+        del self._slots[key]
+        self._counters[reason] += 1
+
+    def evict(self, ticket_id: int | str) -> bool:
+        # For callers that know the ticket is finished (e.g. it was closed); only a
+        # held lock defers it, and the idle sweep picks it up afterwards.
+        key = str(ticket_id)
+        slot = self._slots.get(key)
+        if slot is None or (slot.lock is not None and slot.lock.locked()):
+            return False
+        self._drop(key, slot, "closed")
+        return key not in self._slots
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        now = time.monotonic() if now is None else now
+        removed = 0
+        for key, slot in list(self._slots.items()):
+            if now - slot.touched < self.idle_ttl:
+                break  # entries are kept in last-used order
+            if not self._busy(key, slot):
+                self._drop(key, slot, "expired")
+                removed += key not in self._slots
+        return removed
+
+    def _trim(self, keep: str):
+        self.sweep()
+        if len(self._slots) <= self.max_tickets:
+            return
+        for key, slot in list(self._slots.items()):
+            if len(self._slots) <= self.max_tickets:
+                break
+            if key != keep and not self._busy(key, slot):
+                self._drop(key, slot, "evicted")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._counters,
+            "tickets": len(self._slots),
+            "max_tickets": self.max_tickets,
+            "idle_ttl_seconds": self.idle_ttl,
+        }